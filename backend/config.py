@@ -18,11 +18,70 @@ class Settings(BaseSettings):
     
     # Gemini AI
     GEMINI_API_KEY: str = ""  # Will be required for AI features
+    GEMINI_TIMEOUT_SECONDS: float = 30.0  # Per-request timeout for generate_content
     
     # LiveKit Configuration
     LIVEKIT_API_KEY: str = "your-api-key"
     LIVEKIT_API_SECRET: str = "your-api-secret"
     LIVEKIT_URL: str = "wss://your-livekit-server.livekit.io"
+    LIVEKIT_TOKEN_TTL_SECONDS: int = 3600  # Lifetime of participant access tokens
+    LIVEKIT_TOKEN_REFRESH_MARGIN_SECONDS: int = 300  # Re-sign cached tokens this long before expiry
+    LIVEKIT_TOKEN_CACHE_SIZE: int = 10000  # Cached tokens are also evicted after LIVEKIT_TOKEN_TTL_SECONDS
+    LIVEKIT_ROOM_POLL_INTERVAL_SECONDS: float = 2.0  # How often the shared poller calls ListRooms
+    LIVEKIT_ROOM_STATUS_MAX_AGE_SECONDS: float = 5.0  # Oldest room status served to clients
+    
+    # File storage: name uploads by SHA-256 and skip writing duplicates
+    BLOB_CONTENT_ADDRESSED: bool = True
+    UPLOAD_CONCURRENCY: int = 4  # Parallel blob uploads per multi-file request
+    
+    # Local /uploads links: signed and expiring; served by nginx when behind it
+    UPLOADS_REQUIRE_SIGNATURE: bool = True
+    UPLOADS_URL_TTL_SECONDS: int = 3600  # Links stay valid between 1x and 2x this
+    UPLOADS_X_ACCEL_PREFIX: str = ""  # e.g. "/protected-uploads" (internal nginx location); empty = serve from Python
+    
+    # Background blob deletion (blob_deletions outbox) and orphan reconciliation
+    BLOB_DELETE_INTERVAL_SECONDS: float = 5.0  # Poll interval; also the first retry delay
+    BLOB_DELETE_BATCH_SIZE: int = 100
+    BLOB_DELETE_MAX_BACKOFF_SECONDS: float = 3600.0
+    BLOB_RECONCILE_INTERVAL_HOURS: float = 24.0  # Periodic orphan report (never deletes); 0 disables it
+    BLOB_ORPHAN_GRACE_HOURS: float = 24.0  # Never treat files younger than this as orphans
+    
+    # Image variants (thumb/medium WebP) rendered at upload time
+    IMAGE_WORKERS: int = 2  # Size of the process pool used for resizing
+    IMAGE_WEBP_QUALITY: int = 80
+    
+    # Admin analytics time series
+    ANALYTICS_DEFAULT_TIMEZONE: str = "UTC"
+    ANALYTICS_MAX_BUCKETS: int = 1000
+    ROLLUP_INTERVAL_SECONDS: float = 300.0  # Incremental daily rollup job
+    ROLLUP_SAFETY_LAG_SECONDS: float = 120.0  # Re-scan window for late-committing transactions
+    
+    # Admin list totals (?count=cached)
+    ADMIN_COUNT_CACHE_TTL_SECONDS: float = 60.0
+    
+    # Admin CSV bulk import of doctors, pharmacies and clinics
+    IMPORT_HASH_WORKERS: int = 4  # Size of the process pool used for bcrypt
+    IMPORT_MAX_ROWS: int = 50000
+    
+    # Pharmacy price lists (auto quotes)
+    PRICE_LIST_MAX_ITEMS: int = 20000
+    
+    # Patient notifications (batched writer, unread counter cache)
+    NOTIFICATION_FLUSH_INTERVAL_SECONDS: float = 0.5
+    NOTIFICATION_BATCH_SIZE: int = 500  # Flush early once this many rows are buffered
+    NOTIFICATION_MAX_PENDING: int = 50000  # Buffer cap while the database is unreachable (oldest dropped)
+    NOTIFICATION_UNREAD_TTL_SECONDS: float = 60.0
+    
+    # Admin dashboard counters snapshot
+    ADMIN_STATS_REFRESH_SECONDS: float = 30.0  # Background refresh interval
+    ADMIN_STATS_MAX_AGE_SECONDS: float = 120.0  # Older snapshots are recomputed on read
+    
+    # Outbound HTTP connection pool (Vercel Blob, LiveKit API)
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_DNS_CACHE_TTL_SECONDS: int = 300
+    HTTP_TIMEOUT_SECONDS: float = 30.0
+    HTTP_UPLOAD_TIMEOUT_SECONDS: float = 300.0  # Blob uploads (up to 10MB from slow clients)
     
     # CORS
     CORS_ORIGINS: str = '["http://localhost:5173", "http://localhost:5174", "http://localhost:3000"]'
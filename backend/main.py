@@ -1,7 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from config import settings
+from services.metrics import metrics
+from services.livekit_service import room_status_cache
+from services.blob_cleanup import blob_deletion_worker
+from services.dashboard_stats import dashboard_stats
+from services.rollups import rollup_job
+from services.http_client import http_client
+from services.image_service import image_service
+from services.provider_import import provider_importer
+from services.notifications import notification_service
+from services.signed_urls import SignedUploadsJSONResponse
 from database import engine, Base
 from routers import users_router, doctors_router, ai_router
 
@@ -17,6 +27,8 @@ from pathlib import Path
 from routers import clinic, lab_quotations
 from routers.lab_reports import router as lab_reports_router
 from routers.ratings import router as ratings_router
+from routers.uploads import router as uploads_router
+from routers.notifications import router as notifications_router
 
 
 # Create database tables
@@ -26,7 +38,8 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="Click & Care API",
     description="Backend API for Click & Care Medical Platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=SignedUploadsJSONResponse
 )
 
 # Configure CORS - MUST be before other middleware and routes
@@ -36,7 +49,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    # "*" is ignored for credentialed requests; list the pagination headers explicitly
+    expose_headers=["*", "X-Next-Cursor", "X-Poll-Cursor", "X-Total-Count", "X-Total-Is-Estimate"],
 )
 
 # Health check endpoint for Docker
@@ -49,12 +63,21 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Metrics endpoint for Prometheus scraping
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics_endpoint():
+    """Expose in-process metrics (LLM latency, tokens, errors, fallbacks) in Prometheus format"""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Create uploads directory if it doesn't exist
 uploads_dir = Path("uploads")
 uploads_dir.mkdir(exist_ok=True)
 
-# Mount static files for uploaded images
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Uploaded files: signed, expiring links checked here, bytes sent by nginx (X-Accel-Redirect)
+app.include_router(uploads_router)
 
 # Include routers
 app.include_router(users_router)
@@ -71,6 +94,7 @@ app.include_router(clinic.router)
 app.include_router(lab_quotations.router)
 app.include_router(lab_reports_router)
 app.include_router(ratings_router)
+app.include_router(notifications_router)
 
 
 @app.on_event("startup")
@@ -96,6 +120,28 @@ async def startup_event():
     else:
         print("WARNING: GEMINI_API_KEY is not set!")
     print("="*60 + "\n")
+    
+    # Pooled keep-alive connections for outbound calls (Vercel Blob, LiveKit)
+    await http_client.start()
+    
+    # One shared LiveKit ListRooms poller feeds /livekit/room-status
+    room_status_cache.start()
+    blob_deletion_worker.start()
+    dashboard_stats.start()
+    rollup_job.start()
+    notification_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    await room_status_cache.stop()
+    await blob_deletion_worker.stop()
+    await dashboard_stats.stop()
+    await rollup_job.stop()
+    await notification_service.stop()
+    await http_client.close()
+    image_service.shutdown()
+    provider_importer.shutdown()
 
 @app.get("/")
 def root():
@@ -0,0 +1,76 @@
+"""
+Migration to create the daily analytics rollup tables and their watermark
+table, and to index updated_at on the tables whose changes the incremental
+rollup job scans for.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+def create_rollup_tables(conn) -> None:
+    """Create the rollup and watermark tables if they do not exist."""
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS daily_appointment_rollups (
+                id SERIAL PRIMARY KEY,
+                day DATE NOT NULL,
+                status VARCHAR NOT NULL,
+                doctor_id INTEGER NOT NULL,
+                specialization VARCHAR,
+                count INTEGER NOT NULL DEFAULT 0,
+                CONSTRAINT uq_daily_appointment_rollup UNIQUE (day, status, doctor_id, specialization)
+            );
+            CREATE INDEX IF NOT EXISTS ix_daily_appointment_rollups_day ON daily_appointment_rollups (day);
+
+            CREATE TABLE IF NOT EXISTS daily_consultation_rollups (
+                day DATE PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            );
+
+            CREATE TABLE IF NOT EXISTS daily_quotation_rollups (
+                id SERIAL PRIMARY KEY,
+                day DATE NOT NULL,
+                kind VARCHAR NOT NULL,
+                outcome VARCHAR NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                CONSTRAINT uq_daily_quotation_rollup UNIQUE (day, kind, outcome)
+            );
+            CREATE INDEX IF NOT EXISTS ix_daily_quotation_rollups_day ON daily_quotation_rollups (day);
+
+            CREATE TABLE IF NOT EXISTS rollup_watermarks (
+                name VARCHAR PRIMARY KEY,
+                watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+    )
+    print("✅ Ensured rollup tables and rollup_watermarks exist")
+
+
+def create_updated_at_indexes(conn) -> None:
+    """Index updated_at where the rollup job looks for changed rows."""
+    for table in ("appointments", "quotation_requests", "lab_test_quotation_requests"):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_updated_at ON {table} (updated_at)"))
+        print(f"✅ Ensured ix_{table}_updated_at exists")
+
+
+def migrate():
+    """Run the migration within a transaction."""
+    with engine.begin() as conn:
+        print("Starting analytics rollups migration...")
+        create_rollup_tables(conn)
+        create_updated_at_indexes(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
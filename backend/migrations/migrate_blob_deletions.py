@@ -0,0 +1,49 @@
+"""
+Migration to create the blob_deletions outbox table drained by the
+background blob cleanup worker.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+def create_blob_deletions_table(conn) -> None:
+    """Create the blob_deletions table and its due-time index if they do not exist."""
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS blob_deletions (
+                id SERIAL PRIMARY KEY,
+                url VARCHAR NOT NULL,
+                sha256 VARCHAR(64),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                last_error TEXT,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_blob_deletions_url ON blob_deletions (url)"))
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_blob_deletions_next_attempt_at ON blob_deletions (next_attempt_at)")
+    )
+    print("✅ Ensured blob_deletions table exists (indexed by url and next_attempt_at)")
+
+
+def migrate():
+    """Run the migration within a transaction."""
+    with engine.begin() as conn:
+        print("Starting blob deletions migration...")
+        create_blob_deletions_table(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,48 @@
+"""
+Migration to index created_at on the tables behind the admin analytics
+time series, so range-filtered GROUP BY queries avoid full table scans.
+
+Indexes are built CONCURRENTLY (outside a transaction) so writes to these
+tables are not blocked while the migration runs.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+TABLES = [
+    "users",
+    "doctors",
+    "ai_consultations",
+    "appointments",
+    "prescriptions",
+    "quotation_requests",
+    "lab_test_quotation_requests",
+]
+
+
+def create_created_at_indexes(conn) -> None:
+    """Create ix_<table>_created_at for every analytics table."""
+    for table in TABLES:
+        conn.execute(
+            text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_created_at ON {table} (created_at)")
+        )
+        print(f"✅ Ensured ix_{table}_created_at exists")
+
+
+def migrate():
+    """Run the migration in autocommit mode (required by CREATE INDEX CONCURRENTLY)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("Starting created_at index migration...")
+        create_created_at_indexes(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
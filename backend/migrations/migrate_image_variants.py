@@ -0,0 +1,40 @@
+"""
+Migration to add JSON columns holding the WebP thumbnail/medium variants
+generated for profile pictures and certificates.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+COLUMNS = [
+    ("stored_blobs", "variants"),
+    ("users", "profile_picture_variants"),
+    ("doctors", "profile_picture_variants"),
+    ("doctors", "certificate_variants"),
+]
+
+
+def add_variant_columns(conn) -> None:
+    """Add the nullable JSON variant columns if they do not exist."""
+    for table, column in COLUMNS:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} JSON"))
+        print(f"✅ Ensured {table}.{column} exists")
+
+
+def migrate():
+    """Run the migration within a transaction."""
+    with engine.begin() as conn:
+        print("Starting image variants migration...")
+        add_variant_columns(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
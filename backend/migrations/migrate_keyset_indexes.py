@@ -0,0 +1,53 @@
+"""
+Migration to add (created_at DESC NULLS LAST, id DESC) indexes used by
+keyset pagination in the admin patient, doctor, pharmacy and clinic lists.
+
+Indexes are built CONCURRENTLY (outside a transaction) so writes to these
+tables are not blocked while the migration runs.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+TABLES = ["users", "doctors", "pharmacies", "clinics"]
+
+
+def create_keyset_indexes(conn) -> None:
+    """
+    Create ix_<table>_created_at_id for every admin list table.
+
+    The index matches the list order (created_at DESC NULLS LAST, id DESC).
+    An index left by an earlier run of this migration as (created_at, id)
+    is rebuilt.
+    """
+    for table in TABLES:
+        name = f"ix_{table}_created_at_id"
+        definition = conn.execute(
+            text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": name}
+        ).scalar()
+        if definition and "NULLS LAST" not in definition:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            print(f"Dropped {name} with the old (created_at, id) definition")
+        conn.execute(
+            text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} (created_at DESC NULLS LAST, id DESC)")
+        )
+        print(f"✅ Ensured {name} exists")
+
+
+def migrate():
+    """Run the migration in autocommit mode (required by CREATE INDEX CONCURRENTLY)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("Starting keyset pagination index migration...")
+        create_keyset_indexes(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,45 @@
+"""
+Migration to add the indexes behind the patient notification feed.
+
+- notifications (user_id, id): the ?since= delta query and newest-first
+  pages are a range scan on this index
+- notifications (user_id) WHERE NOT is_read: partial index for the unread
+  counter, which stays small because most notifications get read
+
+Indexes are built CONCURRENTLY (outside a transaction) so notification
+writes are not blocked while the migration runs.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+INDEXES = {
+    "ix_notifications_user_id_id": "notifications (user_id, id)",
+    "ix_notifications_user_unread": "notifications (user_id) WHERE NOT is_read",
+}
+
+
+def create_notification_indexes(conn) -> None:
+    """Create the notification indexes if they are missing."""
+    for name, definition in INDEXES.items():
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+        print(f"✅ Ensured {name} exists")
+
+
+def migrate():
+    """Run the migration in autocommit mode (required by CREATE INDEX CONCURRENTLY)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("Starting notification index migration...")
+        create_notification_indexes(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
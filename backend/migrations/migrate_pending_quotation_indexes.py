@@ -0,0 +1,46 @@
+"""
+Migration to add the indexes behind the pharmacy pending-quotation feed.
+
+- quotation_request_pharmacies (pharmacy_id, quotation_request_id): finds the
+  requests targeted at one pharmacy (the unique constraint leads with
+  quotation_request_id, so it cannot serve this lookup)
+- quotation_responses (pharmacy_id, quotation_request_id): the NOT EXISTS
+  probe that drops requests the pharmacy has already answered
+
+Indexes are built CONCURRENTLY (outside a transaction) so writes to these
+tables are not blocked while the migration runs.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+INDEXES = {
+    "ix_quotation_request_pharmacies_pharmacy_request": "quotation_request_pharmacies (pharmacy_id, quotation_request_id)",
+    "ix_quotation_responses_pharmacy_request": "quotation_responses (pharmacy_id, quotation_request_id)",
+}
+
+
+def create_pending_quotation_indexes(conn) -> None:
+    """Create the pending-feed indexes if they are missing."""
+    for name, definition in INDEXES.items():
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+        print(f"✅ Ensured {name} exists")
+
+
+def migrate():
+    """Run the migration in autocommit mode (required by CREATE INDEX CONCURRENTLY)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("Starting pending quotation index migration...")
+        create_pending_quotation_indexes(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
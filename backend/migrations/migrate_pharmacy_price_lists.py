@@ -0,0 +1,83 @@
+"""
+Migration for pharmacy price lists and automatic quotes.
+
+- pharmacy_price_lists: one row per pharmacy with its auto-quote settings
+- pharmacy_price_list_items: the catalog, indexed by (medicine_key, pharmacy_id)
+  for matching prescriptions against every targeted pharmacy at once
+- quotation_responses.status: allows 'draft' (auto quotes awaiting review)
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+def create_price_list_tables(conn) -> None:
+    """Create the price list tables if they do not exist."""
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS pharmacy_price_lists (
+                pharmacy_id INTEGER PRIMARY KEY REFERENCES pharmacies(id) ON DELETE CASCADE,
+                auto_quote BOOLEAN NOT NULL DEFAULT TRUE,
+                auto_publish BOOLEAN NOT NULL DEFAULT FALSE,
+                delivery_charge NUMERIC(10, 2) NOT NULL DEFAULT 0,
+                estimated_delivery_time VARCHAR,
+                item_count INTEGER NOT NULL DEFAULT 0,
+                uploaded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE
+            );
+
+            CREATE TABLE IF NOT EXISTS pharmacy_price_list_items (
+                id SERIAL PRIMARY KEY,
+                pharmacy_id INTEGER NOT NULL REFERENCES pharmacy_price_lists(pharmacy_id) ON DELETE CASCADE,
+                medicine_name VARCHAR(200) NOT NULL,
+                medicine_key VARCHAR(200) NOT NULL,
+                unit_price NUMERIC(10, 2) NOT NULL,
+                in_stock BOOLEAN NOT NULL DEFAULT TRUE,
+                CONSTRAINT uq_pharmacy_price_list_item UNIQUE (pharmacy_id, medicine_key)
+            );
+            CREATE INDEX IF NOT EXISTS ix_pharmacy_price_list_items_medicine_pharmacy
+                ON pharmacy_price_list_items (medicine_key, pharmacy_id);
+            """
+        )
+    )
+    print("✅ Ensured pharmacy_price_lists and pharmacy_price_list_items exist")
+
+
+def allow_draft_status(conn) -> None:
+    """Accept 'draft' in quotation_responses.status (CHECK constraint or native enum)."""
+    enum_exists = conn.execute(
+        text("SELECT 1 FROM pg_type WHERE typname = 'quotationstatus'")
+    ).scalar()
+    if enum_exists:
+        conn.execute(text("ALTER TYPE quotationstatus ADD VALUE IF NOT EXISTS 'draft'"))
+    else:
+        conn.execute(
+            text(
+                """
+                ALTER TABLE quotation_responses DROP CONSTRAINT IF EXISTS quotation_responses_status_check;
+                ALTER TABLE quotation_responses ADD CONSTRAINT quotation_responses_status_check
+                    CHECK (status IN ('quoted', 'accepted', 'rejected', 'cancelled', 'draft'));
+                """
+            )
+        )
+    print("✅ quotation_responses.status accepts 'draft'")
+
+
+def migrate():
+    """Run the migration (autocommit: ALTER TYPE ... ADD VALUE cannot run in a transaction block)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("Starting pharmacy price list migration...")
+        create_price_list_tables(conn)
+        allow_draft_status(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,95 @@
+"""
+Migration to create the normalized quotation line items and the medicine
+price index, then backfill them from quotation_responses.quoted_items.
+
+- quotation_line_items: one row per quoted medicine, written alongside the JSON
+- pharmacy_medicine_prices: latest unit price per (pharmacy, medicine)
+- medicine_price_index: min/median/max per medicine across those prices
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine, SessionLocal
+from services import price_index
+
+
+def create_price_index_tables(conn) -> None:
+    """Create the line item and price index tables if they do not exist."""
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS quotation_line_items (
+                id SERIAL PRIMARY KEY,
+                quotation_response_id INTEGER NOT NULL REFERENCES quotation_responses(id) ON DELETE CASCADE,
+                quotation_request_id INTEGER NOT NULL REFERENCES quotation_requests(id) ON DELETE CASCADE,
+                pharmacy_id INTEGER NOT NULL REFERENCES pharmacies(id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                medicine_name VARCHAR(200) NOT NULL,
+                medicine_key VARCHAR(200) NOT NULL,
+                quantity INTEGER NOT NULL,
+                unit_price NUMERIC(10, 2) NOT NULL,
+                total_price NUMERIC(10, 2) NOT NULL,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS ix_quotation_line_items_quotation_response_id
+                ON quotation_line_items (quotation_response_id);
+            CREATE INDEX IF NOT EXISTS ix_quotation_line_items_request_medicine
+                ON quotation_line_items (quotation_request_id, medicine_key);
+
+            CREATE TABLE IF NOT EXISTS pharmacy_medicine_prices (
+                id SERIAL PRIMARY KEY,
+                pharmacy_id INTEGER NOT NULL REFERENCES pharmacies(id) ON DELETE CASCADE,
+                medicine_key VARCHAR(200) NOT NULL,
+                unit_price NUMERIC(10, 2) NOT NULL,
+                quotation_response_id INTEGER REFERENCES quotation_responses(id) ON DELETE SET NULL,
+                quoted_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                CONSTRAINT uq_pharmacy_medicine_price UNIQUE (pharmacy_id, medicine_key)
+            );
+            CREATE INDEX IF NOT EXISTS ix_pharmacy_medicine_prices_medicine
+                ON pharmacy_medicine_prices (medicine_key);
+
+            CREATE TABLE IF NOT EXISTS medicine_price_index (
+                medicine_key VARCHAR(200) PRIMARY KEY,
+                medicine_name VARCHAR(200) NOT NULL,
+                pharmacy_count INTEGER NOT NULL DEFAULT 0,
+                min_price NUMERIC(10, 2),
+                median_price NUMERIC(10, 2),
+                max_price NUMERIC(10, 2),
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+    )
+    print("✅ Ensured quotation_line_items, pharmacy_medicine_prices and medicine_price_index exist")
+
+
+def backfill() -> None:
+    """Rebuild line items and the price index from the existing quoted_items JSON."""
+    db = SessionLocal()
+    try:
+        counts = price_index.rebuild(db)
+        db.commit()
+        print(f"✅ Backfilled {counts['line_items']} line items, {counts['medicines']} medicines")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def migrate():
+    """Create the tables, then backfill them in one transaction."""
+    with engine.begin() as conn:
+        print("Starting quotation line item migration...")
+        create_price_index_tables(conn)
+    backfill()
+    print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,46 @@
+"""
+Migration to create the stored_blobs table used for content-addressed,
+reference-counted file storage.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+def create_stored_blobs_table(conn) -> None:
+    """Create the stored_blobs table if it does not exist."""
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS stored_blobs (
+                id SERIAL PRIMARY KEY,
+                sha256 VARCHAR(64) NOT NULL UNIQUE,
+                url VARCHAR NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                content_type VARCHAR,
+                ref_count INTEGER NOT NULL DEFAULT 1,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE
+            );
+            """
+        )
+    )
+    print("✅ Ensured stored_blobs table exists (unique sha256 and url)")
+
+
+def migrate():
+    """Run the migration within a transaction."""
+    with engine.begin() as conn:
+        print("Starting stored blobs migration...")
+        create_stored_blobs_table(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,58 @@
+"""
+Migration to add pg_trgm GIN indexes on the columns searched by the admin
+patient, doctor, pharmacy and clinic lists and by /api/admin/search.
+
+Leading-wildcard ILIKE ('%term%') cannot use a btree index; a trigram GIN
+index serves it (and similarity ranking) without a sequential scan.
+Indexes are built CONCURRENTLY (outside a transaction) so writes to these
+tables are not blocked while the migration runs.
+"""
+
+import sys
+import os
+
+# Ensure backend package is importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+SEARCH_COLUMNS = {
+    "users": ["name", "phone"],
+    "doctors": ["name", "full_name", "phone", "specialization"],
+    "pharmacies": ["pharmacy_name", "license_number", "phone", "city"],
+    "clinics": ["clinic_name", "license_number", "phone", "city"],
+}
+
+
+def create_trigram_indexes(conn) -> None:
+    """Create ix_<table>_<column>_trgm for every searched column."""
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    print("✅ Ensured pg_trgm extension exists")
+
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            conn.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{column}_trgm "
+                    f"ON {table} USING gin ({column} gin_trgm_ops)"
+                )
+            )
+            print(f"✅ Ensured ix_{table}_{column}_trgm exists")
+
+
+def migrate():
+    """Run the migration in autocommit mode (required by CREATE INDEX CONCURRENTLY)."""
+    if engine.dialect.name != "postgresql":
+        print("Trigram indexes require PostgreSQL; skipping.")
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("Starting trigram search index migration...")
+        create_trigram_indexes(conn)
+        print("🚀 Migration finished successfully!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, Text, JSON, ForeignKey, Numeric, Float, UniqueConstraint, Date
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, Text, JSON, ForeignKey, Numeric, Float, UniqueConstraint, Date, Index, text
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 from database import Base
 import enum
+from datetime import datetime
 
 class UserRole(str, enum.Enum):
     PATIENT = "patient"
@@ -11,6 +12,10 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination in admin lists (newest first, legacy NULL created_at last)
+        Index("ix_users_created_at_id", text("created_at DESC NULLS LAST"), text("id DESC")).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     phone = Column(String, unique=True, index=True, nullable=False)
@@ -28,13 +33,18 @@ class User(Base):
     state = Column(String, nullable=True)
     city = Column(String, nullable=True)
     profile_picture_url = Column(String, nullable=True)
+    profile_picture_variants = Column(JSON, nullable=True)  # {"thumb": url, "medium": url} WebP variants
     
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Range scans for analytics
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class Doctor(Base):
     __tablename__ = "doctors"
+    __table_args__ = (
+        # Keyset pagination in admin lists (newest first, legacy NULL created_at last)
+        Index("ix_doctors_created_at_id", text("created_at DESC NULLS LAST"), text("id DESC")).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     phone = Column(String, unique=True, index=True, nullable=False)
@@ -53,11 +63,13 @@ class Doctor(Base):
     fcps_certificate_url = Column(String, nullable=True)  # FCPS certificate file path
     degrees = Column(JSON, nullable=True)  # List of degrees: [{"degree": "MBBS", "institution": "DMC", "year": "2015"}, ...]
     profile_picture_url = Column(String, nullable=True)
+    profile_picture_variants = Column(JSON, nullable=True)  # {"thumb": url, "medium": url} WebP variants
+    certificate_variants = Column(JSON, nullable=True)  # {"mbbs": {"thumb": url, ...}, "fcps": {...}} for image certificates
     schedule = Column(JSON, nullable=True)  # Weekly schedule: {"monday": [{"start": "09:00", "end": "17:00"}], ...}
     
     is_verified = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Range scans for analytics
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class AIConsultation(Base):
@@ -70,7 +82,7 @@ class AIConsultation(Base):
     symptoms_extracted = Column(JSON, nullable=True)
     recommended_doctors = Column(JSON, nullable=True)
     conversation_context = Column(JSON, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Range scans for analytics
     
     # Relationships
     user = relationship("User", backref="consultations")
@@ -101,8 +113,8 @@ class Appointment(Base):
     doctor_notes = Column(Text, nullable=True)
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Range scans for analytics
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)  # Rollup change detection
     
     # Relationships
     patient = relationship("User", backref="appointments")
@@ -125,7 +137,7 @@ class Prescription(Base):
     follow_up = Column(Text, nullable=True)
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Range scans for analytics
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
@@ -171,6 +183,10 @@ class Symptom(Base):
 
 class Pharmacy(Base):
     __tablename__ = "pharmacies"
+    __table_args__ = (
+        # Keyset pagination in admin lists (newest first, legacy NULL created_at last)
+        Index("ix_pharmacies_created_at_id", text("created_at DESC NULLS LAST"), text("id DESC")).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     phone = Column(String, unique=True, index=True, nullable=False)
@@ -208,6 +224,7 @@ class QuotationStatus(str, enum.Enum):
     ACCEPTED = "accepted"
     REJECTED = "rejected"
     CANCELLED = "cancelled"
+    DRAFT = "draft"  # Auto quote from a price list, waiting for the pharmacy to publish it
 
 class QuotationRequest(Base):
     __tablename__ = "quotation_requests"
@@ -221,8 +238,8 @@ class QuotationRequest(Base):
     patient_notes = Column(Text, nullable=True)  # Additional requests or preferences
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Range scans for analytics
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)  # Rollup change detection
     
     # Relationships
     patient = relationship("User", backref="quotation_requests")
@@ -235,6 +252,10 @@ class QuotationRequest(Base):
 
 class QuotationResponse(Base):
     __tablename__ = "quotation_responses"
+    __table_args__ = (
+        # NOT EXISTS probe for "already answered by this pharmacy" in the pending feed
+        Index("ix_quotation_responses_pharmacy_request", "pharmacy_id", "quotation_request_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     quotation_request_id = Column(Integer, ForeignKey("quotation_requests.id"), nullable=False)
@@ -272,14 +293,102 @@ class QuotationRequestPharmacy(Base):
 
     __table_args__ = (
         UniqueConstraint("quotation_request_id", "pharmacy_id", name="uq_request_pharmacy"),
+        Index("ix_quotation_request_pharmacies_pharmacy_request", "pharmacy_id", "quotation_request_id"),  # Pending feed per pharmacy
     )
 
     quotation_request = relationship("QuotationRequest", back_populates="target_pharmacies")
     pharmacy = relationship("Pharmacy", backref="quotation_request_targets")
 
 
+class QuotationLineItem(Base):
+    """One quoted medicine of a QuotationResponse (normalized copy of quoted_items)"""
+    __tablename__ = "quotation_line_items"
+    __table_args__ = (
+        Index("ix_quotation_line_items_request_medicine", "quotation_request_id", "medicine_key"),  # Price comparison
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    quotation_response_id = Column(Integer, ForeignKey("quotation_responses.id", ondelete="CASCADE"), nullable=False, index=True)
+    quotation_request_id = Column(Integer, ForeignKey("quotation_requests.id", ondelete="CASCADE"), nullable=False)
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)  # Index in quoted_items
+    medicine_name = Column(String(200), nullable=False)  # As the pharmacy typed it
+    medicine_key = Column(String(200), nullable=False)  # Lowercased, whitespace collapsed
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    total_price = Column(Numeric(10, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    quotation_response = relationship("QuotationResponse", backref="line_items")
+
+
+class PharmacyMedicinePrice(Base):
+    """Latest unit price each pharmacy quoted for a medicine"""
+    __tablename__ = "pharmacy_medicine_prices"
+    __table_args__ = (
+        UniqueConstraint("pharmacy_id", "medicine_key", name="uq_pharmacy_medicine_price"),
+        Index("ix_pharmacy_medicine_prices_medicine", "medicine_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id", ondelete="CASCADE"), nullable=False)
+    medicine_key = Column(String(200), nullable=False)
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    quotation_response_id = Column(Integer, ForeignKey("quotation_responses.id", ondelete="SET NULL"), nullable=True)
+    quoted_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class PharmacyPriceList(Base):
+    """A pharmacy's uploaded catalog and its auto-quote settings"""
+    __tablename__ = "pharmacy_price_lists"
+
+    pharmacy_id = Column(Integer, ForeignKey("pharmacies.id", ondelete="CASCADE"), primary_key=True)
+    auto_quote = Column(Boolean, default=True, nullable=False)  # Draft quotes for new requests from this catalog
+    auto_publish = Column(Boolean, default=False, nullable=False)  # Send them to the patient without review
+    delivery_charge = Column(Numeric(10, 2), default=0, nullable=False)
+    estimated_delivery_time = Column(String, nullable=True)
+    item_count = Column(Integer, default=0, nullable=False)
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    pharmacy = relationship("Pharmacy", backref=backref("price_list", uselist=False))
+
+
+class PharmacyPriceListItem(Base):
+    """One medicine of a pharmacy price list"""
+    __tablename__ = "pharmacy_price_list_items"
+    __table_args__ = (
+        UniqueConstraint("pharmacy_id", "medicine_key", name="uq_pharmacy_price_list_item"),
+        Index("ix_pharmacy_price_list_items_medicine_pharmacy", "medicine_key", "pharmacy_id"),  # Auto-quote matching
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    pharmacy_id = Column(Integer, ForeignKey("pharmacy_price_lists.pharmacy_id", ondelete="CASCADE"), nullable=False)
+    medicine_name = Column(String(200), nullable=False)
+    medicine_key = Column(String(200), nullable=False)  # services.price_index.medicine_key
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    in_stock = Column(Boolean, default=True, nullable=False)
+
+
+class MedicinePriceIndex(Base):
+    """Market price of a medicine across pharmacies' latest quotes"""
+    __tablename__ = "medicine_price_index"
+
+    medicine_key = Column(String(200), primary_key=True)
+    medicine_name = Column(String(200), nullable=False)  # Most recently quoted spelling
+    pharmacy_count = Column(Integer, nullable=False, default=0)
+    min_price = Column(Numeric(10, 2), nullable=True)
+    median_price = Column(Numeric(10, 2), nullable=True)
+    max_price = Column(Numeric(10, 2), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_id", "user_id", "id"),  # ?since= delta feed
+        Index("ix_notifications_user_unread", "user_id", postgresql_where=text("NOT is_read")),  # Unread counter
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -296,6 +405,10 @@ class Notification(Base):
 
 class Clinic(Base):
     __tablename__ = "clinics"
+    __table_args__ = (
+        # Keyset pagination in admin lists (newest first, legacy NULL created_at last)
+        Index("ix_clinics_created_at_id", text("created_at DESC NULLS LAST"), text("id DESC")).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     clinic_name = Column(String, nullable=False, index=True)
@@ -341,8 +454,8 @@ class LabTestQuotationRequest(Base):
     status = Column(String, default="pending")  # pending, accepted, completed, cancelled
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Range scans for analytics
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)  # Rollup change detection
     
     # Relationships
     prescription = relationship("Prescription", backref="lab_quotation_requests")
@@ -452,3 +565,89 @@ class DoctorRating(Base):
     patient = relationship("User", back_populates="ratings_given")
     appointment = relationship("Appointment", back_populates="rating")
 
+
+class StoredBlob(Base):
+    """
+    Content-addressed file registry - one row per distinct file content,
+    with a count of the records that reference its URL
+    """
+    __tablename__ = "stored_blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, nullable=False, index=True)
+    url = Column(String, unique=True, nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=True)
+    ref_count = Column(Integer, default=1, nullable=False)
+    variants = Column(JSON, nullable=True)  # Derived images: {"thumb": url, "medium": url}
+    
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class BlobDeletion(Base):
+    """
+    Outbox of stored files waiting to be deleted - rows are written in the
+    same transaction that drops the last reference and drained by the
+    background blob cleanup worker
+    """
+    __tablename__ = "blob_deletions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, nullable=False, index=True)
+    sha256 = Column(String(64), nullable=True)  # Content hash; skip the delete if it was re-registered
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False, index=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# ============== Analytics Rollups ==============
+
+class DailyAppointmentRollup(Base):
+    """Appointments created per local day, by status, doctor and specialization"""
+    __tablename__ = "daily_appointment_rollups"
+    __table_args__ = (
+        UniqueConstraint('day', 'status', 'doctor_id', 'specialization', name='uq_daily_appointment_rollup'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    status = Column(String, nullable=False)
+    doctor_id = Column(Integer, nullable=False)
+    specialization = Column(String, nullable=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DailyConsultationRollup(Base):
+    """AI consultations per local day"""
+    __tablename__ = "daily_consultation_rollups"
+    
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DailyQuotationRollup(Base):
+    """Quotation requests created per local day by kind (pharmacy/lab) and current outcome"""
+    __tablename__ = "daily_quotation_rollups"
+    __table_args__ = (
+        UniqueConstraint('day', 'kind', 'outcome', name='uq_daily_quotation_rollup'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # 'pharmacy' or 'lab'
+    outcome = Column(String, nullable=False)  # Request status: pending, quoted, accepted, ...
+    count = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """High-water mark of source changes already folded into a rollup"""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -3,7 +3,7 @@ Admin Router
 Handles admin authentication and management operations
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
@@ -13,16 +13,66 @@ from database import get_db
 from models import Admin, User, Doctor, Appointment, Prescription, Specialization, Symptom, AppointmentStatus, Clinic
 from schemas import (
     AdminLogin, AdminResponse, 
-    UserResponse, DoctorVerificationUpdate,
+    UserResponse, DoctorVerificationUpdate, BulkVerificationUpdate, BulkIdsRequest,
     SpecializationCreate, SpecializationUpdate, SpecializationResponse,
     SymptomCreate, SymptomUpdate, SymptomResponse,
     UserManagementUpdate
 )
 from auth import verify_password, get_password_hash, create_access_token, get_current_admin
 from config import settings
+from services.pagination import COUNT_MODES, InvalidCursorError, count_total, fetch_page
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
+
+def _check_count_mode(count: str):
+    if count not in COUNT_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"count must be one of: {', '.join(COUNT_MODES)}"
+        )
+
+
+def _page(query, model, limit: int, cursor: Optional[str], skip: int):
+    """Keyset page when a cursor is given, offset page otherwise"""
+    try:
+        return fetch_page(query, model, limit, cursor=cursor, skip=skip)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _appointment_counts(db: Session, column, ids: List[int]) -> dict:
+    """{id: appointment count} for a page of patients or doctors in one grouped query"""
+    if not ids:
+        return {}
+    return dict(
+        db.query(column, func.count(Appointment.id))
+        .filter(column.in_(ids))
+        .group_by(column)
+        .all()
+    )
+
+
+def _bulk_verify(db: Session, model, data: BulkVerificationUpdate, admin: Admin, returning: List[str]) -> dict:
+    """One UPDATE ... RETURNING for a bulk verify/activate request"""
+    from services.bulk_admin import bulk_update, verification_values
+    
+    if data.is_verified is None and data.is_active is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide is_verified and/or is_active"
+        )
+    values = verification_values(model, data.is_verified, data.is_active, admin.id)
+    return bulk_update(db, model, data.ids, values, returning)
+
+
+def _set_page_headers(response: Response, next_cursor: Optional[str], total: Optional[int], total_is_estimate: bool):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Total-Is-Estimate"] = "true" if total_is_estimate else "false"
+
 # ============== Authentication ==============
 
 @router.post("/login")
@@ -85,118 +135,65 @@ async def get_admin_profile(
 
 @router.get("/dashboard/stats")
 async def get_dashboard_stats(
+    fresh: bool = False,
     current_admin: Admin = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get dashboard statistics"""
-    from models import Pharmacy, Clinic
-    from datetime import timedelta
-    
-    # Count totals
-    total_patients = db.query(User).count()
-    total_doctors = db.query(Doctor).count()
-    total_appointments = db.query(Appointment).count()
-    total_prescriptions = db.query(Prescription).count()
-    total_pharmacies = db.query(Pharmacy).count()
-    total_clinics = db.query(Clinic).count()
-    
-    # Count pending verifications
-    unverified_doctors = db.query(Doctor).filter(Doctor.is_verified == False).count()
-    unverified_pharmacies = db.query(Pharmacy).filter(Pharmacy.is_verified == False, Pharmacy.is_active == True).count()
-    unverified_clinics = db.query(Clinic).filter(Clinic.is_verified == False, Clinic.is_active == True).count()
-    
-    # Count by status
-    pending_appointments = db.query(Appointment).filter(
-        Appointment.status == AppointmentStatus.PENDING
-    ).count()
-    
-    confirmed_appointments = db.query(Appointment).filter(
-        Appointment.status == AppointmentStatus.CONFIRMED
-    ).count()
-    
-    # Recent registrations (last 7 days)
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    
-    new_patients = db.query(User).filter(User.created_at >= week_ago).count()
-    new_doctors = db.query(Doctor).filter(Doctor.created_at >= week_ago).count()
-    new_pharmacies = db.query(Pharmacy).filter(Pharmacy.created_at >= week_ago).count()
-    new_clinics = db.query(Clinic).filter(Clinic.created_at >= week_ago).count()
+    """
+    Get dashboard statistics
+    Served from a snapshot refreshed in the background; ?fresh=1 recomputes it now.
+    snapshot_age_seconds tells how old the numbers are.
+    """
+    from services.dashboard_stats import dashboard_stats
     
-    return {
-        "totals": {
-            "patients": total_patients,
-            "doctors": total_doctors,
-            "appointments": total_appointments,
-            "prescriptions": total_prescriptions,
-            "pharmacies": total_pharmacies,
-            "clinics": total_clinics
-        },
-        "pending": {
-            "unverified_doctors": unverified_doctors,
-            "unverified_pharmacies": unverified_pharmacies,
-            "unverified_clinics": unverified_clinics,
-            "pending_appointments": pending_appointments,
-            "confirmed_appointments": confirmed_appointments
-        },
-        "recent": {
-            "new_patients_7d": new_patients,
-            "new_doctors_7d": new_doctors,
-            "new_pharmacies_7d": new_pharmacies,
-            "new_clinics_7d": new_clinics
-        }
-    }
+    return await dashboard_stats.get(db, fresh=fresh)
 
 @router.get("/dashboard/daily-stats")
 async def get_daily_stats(
     current_admin: Admin = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get daily statistics for the current week"""
-    from datetime import timedelta, date
+    """
+    Get daily statistics for the current week
+
+    Days are calendar days in ANALYTICS_DEFAULT_TIMEZONE (the rollup
+    timezone). Closed days come from the daily rollups; today is counted
+    live, since the rollups trail by up to ROLLUP_INTERVAL_SECONDS.
+    """
+    from datetime import timedelta
     from models import AIConsultation
+    from services.rollups import read_rollups, rollup_job
     
     # Get current date and the start of the week (Sunday)
-    today = date.today()
+    today = datetime.now(rollup_job.zone).date()
     current_weekday = today.weekday()  # Monday = 0, Sunday = 6
     
     # Calculate Sunday of current week
     days_since_sunday = (current_weekday + 1) % 7
     sunday = today - timedelta(days=days_since_sunday)
     
-    daily_stats = []
+    # Read the pre-aggregated daily rollups: 7 days, not every appointment row
+    stats = read_rollups(db, sunday, sunday + timedelta(days=6))
+    
+    # Today is still changing: count it from the source tables
+    today_index = (today - sunday).days
+    start, end = rollup_job.day_bounds(db, today)
+    stats["appointments"]["total"][today_index] = db.query(func.count(Appointment.id)).filter(
+        Appointment.created_at >= start, Appointment.created_at < end
+    ).scalar()
+    stats["consultations"][today_index] = db.query(func.count(AIConsultation.id)).filter(
+        AIConsultation.created_at >= start, AIConsultation.created_at < end
+    ).scalar()
     
-    # Generate stats for each day of the week
+    daily_stats = []
     for i in range(7):
         current_date = sunday + timedelta(days=i)
-        next_date = current_date + timedelta(days=1)
-        
-        # Only include past days and today
-        if current_date > today:
-            daily_stats.append({
-                "date": current_date.isoformat(),
-                "day_name": current_date.strftime("%a"),
-                "day_number": current_date.day,
-                "appointments": 0,
-                "consultations": 0
-            })
-            continue
-        
-        # Count appointments created on this day
-        appointments_count = db.query(Appointment).filter(
-            func.date(Appointment.created_at) == current_date
-        ).count()
-        
-        # Count AI consultations on this day
-        consultations_count = db.query(AIConsultation).filter(
-            func.date(AIConsultation.created_at) == current_date
-        ).count()
-        
         daily_stats.append({
             "date": current_date.isoformat(),
             "day_name": current_date.strftime("%a"),  # Mon, Tue, etc.
             "day_number": current_date.day,
-            "appointments": appointments_count,
-            "consultations": consultations_count
+            "appointments": stats["appointments"]["total"][i],
+            "consultations": stats["consultations"][i]
         })
     
     return {
@@ -205,19 +202,320 @@ async def get_daily_stats(
         "daily_data": daily_stats
     }
 
+@router.get("/analytics/timeseries")
+async def get_time_series(
+    metrics: str = "appointments,consultations,signups",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    granularity: str = "day",
+    tz: Optional[str] = None,
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Counts per hour/day/week/month for appointments, consultations, signups,
+    doctor_signups, prescriptions, quotations and lab_quotations
+    
+    start/end are ISO dates or datetimes (end exclusive, default: the last
+    30 days). Buckets follow the given IANA time zone; empty buckets are 0.
+    """
+    from datetime import timedelta
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    from services.analytics import METRICS, GRANULARITIES, bucket_starts, parse_local_datetime, time_series
+    
+    metric_names = [m.strip() for m in metrics.split(",") if m.strip()]
+    unknown = [m for m in metric_names if m not in METRICS]
+    if not metric_names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown metrics: {', '.join(unknown) or '(none)'}. Available: {', '.join(METRICS)}"
+        )
+    
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid granularity. Use one of: {', '.join(GRANULARITIES)}"
+        )
+    
+    tz = tz or settings.ANALYTICS_DEFAULT_TIMEZONE
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown timezone: {tz}"
+        )
+    
+    try:
+        end_local = parse_local_datetime(end, zone) or datetime.now(zone).replace(tzinfo=None)
+        start_local = parse_local_datetime(start, zone) or end_local - timedelta(days=30)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start and end must be ISO 8601 dates or datetimes"
+        )
+    
+    if start_local >= end_local:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    
+    if len(bucket_starts(start_local, end_local, granularity)) > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large for {granularity} buckets (max {settings.ANALYTICS_MAX_BUCKETS})"
+        )
+    
+    return time_series(db, metric_names, start_local, end_local, granularity, tz)
+
+@router.get("/analytics/rollups")
+async def get_rollup_analytics(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    dimension: str = "status",
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Daily appointments (by status, doctor or specialization), consultations
+    and quotations (by kind and outcome) from the rollup tables
+    
+    start/end are ISO dates (inclusive, default: the last 30 days). Numbers
+    lag the live tables by at most one rollup interval.
+    """
+    from datetime import date, timedelta
+    from services.rollups import read_rollups, rollup_job
+    
+    if dimension not in ("status", "doctor", "specialization"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="dimension must be one of: status, doctor, specialization"
+        )
+    
+    try:
+        end_date = date.fromisoformat(end) if end else date.today()
+        start_date = date.fromisoformat(start) if start else end_date - timedelta(days=29)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start and end must be ISO dates (YYYY-MM-DD)"
+        )
+    
+    if start_date > end_date or (end_date - start_date).days >= settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"start must not be after end, and the range is limited to {settings.ANALYTICS_MAX_BUCKETS} days"
+        )
+    
+    return {
+        **read_rollups(db, start_date, end_date, dimension),
+        "timezone": settings.ANALYTICS_DEFAULT_TIMEZONE,
+        "last_run": rollup_job.last_run
+    }
+
+@router.post("/analytics/rollups/run")
+async def run_rollups(
+    rebuild: bool = False,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Run the incremental rollup job now (rebuild=true recomputes every day)"""
+    import asyncio
+    from services.rollups import rollup_job
+    
+    return await asyncio.to_thread(rollup_job.run_once, rebuild)
+
+@router.get("/storage/stats")
+async def get_storage_stats(
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Content-addressed storage usage and deduplication ratio"""
+    from services.blob_service import blob_service
+    
+    from models import BlobDeletion
+    from sqlalchemy import func
+    
+    pending, failing = db.query(
+        func.count(BlobDeletion.id),
+        func.count(BlobDeletion.id).filter(BlobDeletion.attempts > 0)
+    ).one()
+    
+    return {
+        **blob_service.get_dedup_stats(db),
+        "pending_deletions": pending,
+        "failing_deletions": failing
+    }
+
+@router.post("/storage/reconcile")
+async def reconcile_storage(
+    dry_run: bool = True,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Find stored files no record references and (unless dry_run) queue them for deletion
+    """
+    from services.blob_cleanup import blob_deletion_worker
+    
+    return await blob_deletion_worker.reconcile(dry_run=dry_run)
+
+# ============== Search ==============
+
+@router.get("/search")
+async def search_everything(
+    q: str,
+    types: Optional[str] = None,
+    limit: int = 20,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Search patients, doctors, pharmacies and clinics at once
+    Entity types are queried in parallel; hits are typed and ranked by score.
+    types is an optional comma-separated subset (patient,doctor,pharmacy,clinic).
+    """
+    from services.admin_search import SEARCH_TARGETS, search_all
+
+    q = q.strip()
+    if len(q) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must be at least 2 characters"
+        )
+
+    requested = [t.strip() for t in types.split(",") if t.strip()] if types else list(SEARCH_TARGETS)
+    unknown = [t for t in requested if t not in SEARCH_TARGETS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"types must be among: {', '.join(SEARCH_TARGETS)}"
+        )
+
+    return await search_all(q, requested, max(1, min(limit, 100)))
+
+# ============== Bulk Export ==============
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = "csv",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Stream a whole dataset (patients, doctors, appointments, prescriptions,
+    quotations, quotation_responses) as csv, ndjson or parquet
+
+    start/end are ISO dates (inclusive, UTC) on created_at; status is a
+    comma-separated list of values valid for the dataset.
+    """
+    from datetime import date
+    from fastapi.responses import StreamingResponse
+    from services.export import DATASETS, FORMATS, PARQUET_AVAILABLE, stream_export
+
+    if dataset not in DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dataset. Available: {', '.join(DATASETS)}"
+        )
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(FORMATS)}"
+        )
+    if format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export needs pyarrow, which is not installed on this deployment. Use csv or ndjson."
+        )
+
+    try:
+        start_date = date.fromisoformat(start) if start else None
+        end_date = date.fromisoformat(end) if end else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start and end must be ISO dates (YYYY-MM-DD)"
+        )
+
+    statuses = [s.strip() for s in status_filter.split(",") if s.strip()] if status_filter else []
+    allowed = DATASETS[dataset].status_values()
+    unknown = [s for s in statuses if s not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown status for {dataset}: {', '.join(unknown)}. Available: {', '.join(allowed) or '(none)'}"
+        )
+
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(dataset, format, start_date, end_date, statuses),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# ============== Bulk Import ==============
+
+@router.post("/import/{kind}")
+async def import_providers(
+    kind: str,
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    verified: bool = False,
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    Onboard doctors, pharmacies or clinics from a CSV file
+
+    Columns are the signup fields of the provider type plus `password` (or
+    `hashed_password` with an existing bcrypt hash). Every row is validated;
+    rows with errors are skipped and reported by line number while the rest
+    are inserted in one statement. dry_run=true only validates;
+    verified=true marks imported providers as verified by the current admin.
+    """
+    import asyncio
+    import io
+    from services.provider_import import KINDS, provider_importer
+
+    if kind not in KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown provider type. Available: {', '.join(KINDS)}"
+        )
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await asyncio.to_thread(
+            provider_importer.run, kind, stream,
+            dry_run=dry_run, verified=verified, admin_id=current_admin.id
+        )
+    except ValueError as e:
+        # Bad header, too many rows or a file that is not UTF-8 text
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        stream.detach()
+
 # ============== Patient Management ==============
 
 @router.get("/patients")
 async def get_all_patients(
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    count: str = "exact",
     search: Optional[str] = None,
     is_active: Optional[bool] = None,
     current_admin: Admin = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get all patients with filtering and pagination"""
+    """
+    Get all patients with filtering and pagination
+    Newest first. Pass next_cursor back as ?cursor= for keyset paging (skip is
+    ignored then); count=exact|cached|estimate|none picks how total is computed.
+    """
     
+    _check_count_mode(count)
     query = db.query(User)
     
     # Apply filters
@@ -231,18 +529,15 @@ async def get_all_patients(
         query = query.filter(User.is_active == is_active)
     
     # Get total count
-    total = query.count()
+    total, total_is_estimate = count_total(db, query, count)
     
     # Apply pagination
-    patients = query.offset(skip).limit(limit).all()
+    patients, next_cursor = _page(query, User, limit, cursor, skip)
     
-    # Get appointment counts for each patient
+    # Appointment counts for the whole page in one grouped query
+    appointment_counts = _appointment_counts(db, Appointment.patient_id, [p.id for p in patients])
     result = []
     for patient in patients:
-        appointment_count = db.query(Appointment).filter(
-            Appointment.patient_id == patient.id
-        ).count()
-        
         result.append({
             "id": patient.id,
             "phone": patient.phone,
@@ -251,16 +546,19 @@ async def get_all_patients(
             "blood_group": patient.blood_group,
             "city": patient.city,
             "profile_picture_url": patient.profile_picture_url,
+            "profile_picture_variants": patient.profile_picture_variants,
             "is_active": patient.is_active,
             "created_at": patient.created_at,
-            "appointment_count": appointment_count
+            "appointment_count": appointment_counts.get(patient.id, 0)
         })
     
     return {
         "patients": result,
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
 @router.get("/patients/{patient_id}")
@@ -279,14 +577,15 @@ async def get_patient_details(
             detail="Patient not found"
         )
     
-    # Get appointments with doctor details
-    appointments = db.query(Appointment).filter(
+    # Get appointments with doctor details (doctor joined in the same query)
+    appointments = db.query(Appointment, Doctor).outerjoin(
+        Doctor, Doctor.id == Appointment.doctor_id
+    ).filter(
         Appointment.patient_id == patient_id
     ).order_by(Appointment.created_at.desc()).all()
     
     appointments_data = []
-    for apt in appointments:
-        doctor = db.query(Doctor).filter(Doctor.id == apt.doctor_id).first()
+    for apt, doctor in appointments:
         appointments_data.append({
             "id": apt.id,
             "appointment_date": apt.appointment_date,
@@ -378,14 +677,14 @@ async def get_patient_prescriptions(
             detail="Patient not found"
         )
     
-    prescriptions = db.query(Prescription).filter(
+    prescriptions = db.query(Prescription, Doctor).outerjoin(
+        Doctor, Doctor.id == Prescription.doctor_id
+    ).filter(
         Prescription.patient_id == patient_id
     ).order_by(Prescription.created_at.desc()).all()
     
     result = []
-    for presc in prescriptions:
-        doctor = db.query(Doctor).filter(Doctor.id == presc.doctor_id).first()
-        
+    for presc, doctor in prescriptions:
         presc_dict = {
             "id": presc.id,
             "appointment_id": presc.appointment_id,
@@ -413,14 +712,20 @@ async def get_patient_prescriptions(
 async def get_all_doctors(
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    count: str = "exact",
     search: Optional[str] = None,
     is_verified: Optional[bool] = None,
     is_active: Optional[bool] = None,
     current_admin: Admin = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get all doctors with filtering and pagination"""
+    """
+    Get all doctors with filtering and pagination
+    Newest first; cursor and count work as for /patients.
+    """
     
+    _check_count_mode(count)
     query = db.query(Doctor)
     
     # Apply filters
@@ -439,18 +744,15 @@ async def get_all_doctors(
         query = query.filter(Doctor.is_active == is_active)
     
     # Get total count
-    total = query.count()
+    total, total_is_estimate = count_total(db, query, count)
     
     # Apply pagination
-    doctors = query.offset(skip).limit(limit).all()
+    doctors, next_cursor = _page(query, Doctor, limit, cursor, skip)
     
-    # Get appointment counts for each doctor
+    # Appointment counts for the whole page in one grouped query
+    appointment_counts = _appointment_counts(db, Appointment.doctor_id, [d.id for d in doctors])
     result = []
     for doctor in doctors:
-        appointment_count = db.query(Appointment).filter(
-            Appointment.doctor_id == doctor.id
-        ).count()
-        
         result.append({
             "id": doctor.id,
             "phone": doctor.phone,
@@ -460,17 +762,20 @@ async def get_all_doctors(
             "license_number": doctor.license_number,
             "bmdc_number": doctor.bmdc_number,
             "profile_picture_url": doctor.profile_picture_url,
+            "profile_picture_variants": doctor.profile_picture_variants,
             "is_verified": doctor.is_verified,
             "is_active": doctor.is_active,
             "created_at": doctor.created_at,
-            "appointment_count": appointment_count
+            "appointment_count": appointment_counts.get(doctor.id, 0)
         })
     
     return {
         "doctors": result,
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
 @router.get("/doctors/{doctor_id}")
@@ -489,20 +794,17 @@ async def get_doctor_details(
             detail="Doctor not found"
         )
     
-    # Get appointment stats
-    total_appointments = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor_id
-    ).count()
-    
-    completed_appointments = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor_id,
-        Appointment.status == AppointmentStatus.COMPLETED
-    ).count()
-    
-    # Get prescriptions count
-    prescriptions = db.query(Prescription).filter(
+    # Appointment and prescription stats in one round trip
+    prescription_count = db.query(func.count(Prescription.id)).filter(
         Prescription.doctor_id == doctor_id
-    ).count()
+    ).scalar_subquery()
+    total_appointments, completed_appointments, prescriptions = db.query(
+        func.count(Appointment.id),
+        func.count(Appointment.id).filter(Appointment.status == AppointmentStatus.COMPLETED),
+        prescription_count
+    ).filter(
+        Appointment.doctor_id == doctor_id
+    ).one()
     
     return {
         "doctor": {
@@ -566,6 +868,18 @@ async def update_doctor_verification(
         }
     }
 
+@router.post("/doctors/bulk-verify")
+async def bulk_update_doctor_verification(
+    update_data: BulkVerificationUpdate,
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Verify/unverify or activate/deactivate many doctors in one statement
+    Returns an outcome (updated or not_found) for every requested id.
+    """
+    return _bulk_verify(db, Doctor, update_data, current_admin, ["name", "full_name", "is_verified", "is_active"])
+
 # ============== Specialization Management ==============
 
 @router.get("/specializations", response_model=List[SpecializationResponse])
@@ -775,10 +1089,13 @@ async def delete_symptom(
 
 @router.get("/pharmacies", response_model=List[dict])
 async def get_all_pharmacies(
+    response: Response,
     current_admin: Admin = Depends(get_current_admin),
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: str = "none",
     is_verified: Optional[bool] = None,
     is_active: Optional[bool] = None,
     search: Optional[str] = None
@@ -786,6 +1103,8 @@ async def get_all_pharmacies(
     """
     Get all pharmacies with optional filters.
     Supports filtering by verification status, active status, and search.
+    The body stays a plain list: the next page cursor is returned in the
+    X-Next-Cursor header and, when count is not none, the total in X-Total-Count.
     """
     from models import Pharmacy
     from sqlalchemy import or_, and_
@@ -810,7 +1129,10 @@ async def get_all_pharmacies(
     if filters:
         query = query.filter(and_(*filters))
     
-    pharmacies = query.order_by(Pharmacy.created_at.desc()).offset(skip).limit(limit).all()
+    _check_count_mode(count)
+    total, total_is_estimate = count_total(db, query, count)
+    pharmacies, next_cursor = _page(query, Pharmacy, limit, cursor, skip)
+    _set_page_headers(response, next_cursor, total, total_is_estimate)
     
     # Format response
     return [
@@ -932,6 +1254,24 @@ async def verify_pharmacy(
     }
 
 
+@router.post("/pharmacies/bulk-verify", response_model=dict)
+async def bulk_verify_pharmacies(
+    update_data: BulkVerificationUpdate,
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Verify/reject or activate/deactivate many pharmacies in one statement.
+    Returns an outcome (updated or not_found) for every requested id.
+    """
+    from models import Pharmacy
+    
+    return _bulk_verify(
+        db, Pharmacy, update_data, current_admin,
+        ["pharmacy_name", "is_verified", "is_active", "verified_at"]
+    )
+
+
 @router.get("/pharmacies/stats/summary", response_model=dict)
 async def get_pharmacy_stats(
     current_admin: Admin = Depends(get_current_admin),
@@ -961,10 +1301,13 @@ async def get_pharmacy_stats(
 
 @router.get("/clinics", response_model=List[dict])
 async def get_all_clinics(
+    response: Response,
     current_admin: Admin = Depends(get_current_admin),
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: str = "none",
     is_verified: Optional[bool] = None,
     is_active: Optional[bool] = None,
     search: Optional[str] = None
@@ -972,6 +1315,8 @@ async def get_all_clinics(
     """
     Get all clinics with optional filters.
     Supports filtering by verification status, active status, and search.
+    The body stays a plain list: the next page cursor is returned in the
+    X-Next-Cursor header and, when count is not none, the total in X-Total-Count.
     """
     from sqlalchemy import or_, and_
     
@@ -995,7 +1340,10 @@ async def get_all_clinics(
     if filters:
         query = query.filter(and_(*filters))
     
-    clinics = query.order_by(Clinic.created_at.desc()).offset(skip).limit(limit).all()
+    _check_count_mode(count)
+    total, total_is_estimate = count_total(db, query, count)
+    clinics, next_cursor = _page(query, Clinic, limit, cursor, skip)
+    _set_page_headers(response, next_cursor, total, total_is_estimate)
     
     # Format response
     return [
@@ -1161,6 +1509,39 @@ async def toggle_clinic_active_status(
     }
 
 
+@router.post("/clinics/bulk-verify", response_model=dict)
+async def bulk_verify_clinics(
+    update_data: BulkVerificationUpdate,
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Verify/reject or activate/deactivate many clinics in one statement.
+    Returns an outcome (updated or not_found) for every requested id.
+    """
+    return _bulk_verify(
+        db, Clinic, update_data, current_admin,
+        ["clinic_name", "is_verified", "is_active", "verified_at"]
+    )
+
+
+@router.post("/clinics/bulk-toggle-active", response_model=dict)
+async def bulk_toggle_clinic_active_status(
+    request: BulkIdsRequest,
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Flip is_active on many clinics in one statement; each row is toggled from its own value."""
+    from sqlalchemy import not_
+    from services.bulk_admin import bulk_update
+    
+    return bulk_update(
+        db, Clinic, request.ids,
+        {"is_active": not_(Clinic.is_active), "updated_at": func.now()},
+        ["clinic_name", "is_active"]
+    )
+
+
 @router.get("/clinics/stats/summary", response_model=dict)
 async def get_clinic_stats(
     current_admin: Admin = Depends(get_current_admin),
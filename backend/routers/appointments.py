@@ -12,9 +12,18 @@ from database import get_db
 from auth import get_current_user, get_current_doctor
 from models import User, Doctor, Appointment, AppointmentStatus
 from schemas import AppointmentCreate, AppointmentUpdate, AppointmentResponse
+from services.livekit_service import livekit_service
+from services.notifications import notification, notification_service
 
 router = APIRouter(prefix="/api/appointments", tags=["Appointments"])
 
+# Status changes the patient is notified about: status -> (title, verb)
+APPOINTMENT_NOTIFICATIONS = {
+    AppointmentStatus.CONFIRMED: ("Appointment confirmed", "confirmed"),
+    AppointmentStatus.CANCELLED: ("Appointment cancelled", "cancelled"),
+    AppointmentStatus.COMPLETED: ("Appointment completed", "completed"),
+}
+
 @router.post("/", response_model=AppointmentResponse)
 async def create_appointment(
     appointment_data: AppointmentCreate,
@@ -430,6 +439,7 @@ async def update_appointment(
             )
         
         # Update fields if provided
+        previous_status = appointment.status
         if update_data.status:
             appointment.status = update_data.status
         
@@ -439,6 +449,19 @@ async def update_appointment(
         db.commit()
         db.refresh(appointment)
         
+        if appointment.status == AppointmentStatus.CANCELLED:
+            livekit_service.revoke_appointment_tokens(appointment.id)
+        
+        if appointment.status != previous_status and appointment.status in APPOINTMENT_NOTIFICATIONS:
+            title, verb = APPOINTMENT_NOTIFICATIONS[appointment.status]
+            notification_service.publish([notification(
+                appointment.patient_id,
+                title,
+                f"Dr. {current_doctor.full_name} {verb} your appointment on {appointment.appointment_date} ({appointment.time_slot})",
+                category="appointment",
+                data={"appointment_id": appointment.id, "status": appointment.status.value}
+            )])
+        
         # Get patient details for response
         patient = db.query(User).filter(User.id == appointment.patient_id).first()
         
@@ -518,6 +541,9 @@ async def cancel_appointment(
         appointment.status = AppointmentStatus.CANCELLED
         db.commit()
         
+        # Stop handing out cached video call tokens for this appointment
+        livekit_service.revoke_appointment_tokens(appointment_id)
+        
         return {
             "message": "Appointment cancelled successfully",
             "appointment_id": appointment_id
@@ -164,7 +164,8 @@ async def upload_profile_picture(
     db: Session = Depends(get_db)
 ):
     """Upload and update doctor profile picture"""
-    from services.blob_service import blob_service
+    from services.blob_service import blob_service, FileTooLargeError
+    from services.image_service import image_service
     
     # Validate file type
     allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
@@ -174,34 +175,45 @@ async def upload_profile_picture(
             detail="Invalid file type. Only JPEG, PNG, GIF, and WebP images are allowed."
         )
     
-    # Validate file size (max 5MB)
-    contents = await file.read()
-    if len(contents) > 5 * 1024 * 1024:  # 5MB in bytes
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File size too large. Maximum size is 5MB."
-        )
-    
+    stored = None
     try:
-        # Upload to Vercel Blob Storage
-        profile_picture_url = await blob_service.upload_file(
-            file_content=contents,
-            filename=file.filename,
+        # Stream to Vercel Blob Storage, enforcing the 5MB limit as chunks arrive
+        stored = await blob_service.store_upload(
+            db,
+            file,
             folder="profile_pictures",
-            content_type=file.content_type
+            max_size=5 * 1024 * 1024
         )
+        profile_picture_url = stored["url"]
+        
+        # Thumbnail/medium WebP variants for list pages
+        variants = await image_service.create_variants(db, file, stored)
+        
+        # Drop the replaced picture's reference (same URL too: store_upload counted this upload)
+        await blob_service.release_file(db, current_doctor.profile_picture_url)
         
         # Update doctor profile picture URL
         current_doctor.profile_picture_url = profile_picture_url
+        current_doctor.profile_picture_variants = variants
         
         db.commit()
         db.refresh(current_doctor)
         
         return {
             "message": "Profile picture uploaded successfully",
-            "profile_picture_url": profile_picture_url
+            "profile_picture_url": profile_picture_url,
+            "profile_picture_variants": variants
         }
+    except FileTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File size too large. Maximum size is 5MB."
+        )
     except Exception as e:
+        # Don't leak the file stored for an upload that was never saved
+        db.rollback()
+        if stored is not None:
+            await blob_service.discard_uploads(db, [stored])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload file: {str(e)}"
@@ -215,7 +227,8 @@ async def upload_certificate(
     db: Session = Depends(get_db)
 ):
     """Upload and update doctor certificates (MBBS or FCPS)"""
-    from services.blob_service import blob_service
+    from services.blob_service import blob_service, FileTooLargeError
+    from services.image_service import image_service
     
     # Validate certificate type
     if certificate_type not in ["mbbs", "fcps"]:
@@ -232,37 +245,54 @@ async def upload_certificate(
             detail="Invalid file type. Only PDF, JPEG, and PNG files are allowed."
         )
     
-    # Validate file size (max 10MB)
-    contents = await file.read()
-    if len(contents) > 10 * 1024 * 1024:  # 10MB in bytes
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File size too large. Maximum size is 10MB."
-        )
-    
+    stored = None
     try:
-        # Upload to Vercel Blob Storage
-        certificate_url = await blob_service.upload_file(
-            file_content=contents,
-            filename=file.filename,
+        # Stream to Vercel Blob Storage, enforcing the 10MB limit as chunks arrive
+        stored = await blob_service.store_upload(
+            db,
+            file,
             folder=f"certificates/{certificate_type}",
-            content_type=file.content_type
+            max_size=10 * 1024 * 1024
+        )
+        certificate_url = stored["url"]
+        
+        # Preview variants for image certificates (PDFs get none)
+        variants = await image_service.create_variants(db, file, stored)
+        
+        # Drop the replaced certificate's reference before pointing at the new file
+        previous_url = (
+            current_doctor.mbbs_certificate_url if certificate_type == "mbbs" else current_doctor.fcps_certificate_url
         )
+        await blob_service.release_file(db, previous_url)
         
         # Update doctor certificate URL
         if certificate_type == "mbbs":
             current_doctor.mbbs_certificate_url = certificate_url
         else:  # fcps
             current_doctor.fcps_certificate_url = certificate_url
+        current_doctor.certificate_variants = {
+            **(current_doctor.certificate_variants or {}),
+            certificate_type: variants
+        }
         
         db.commit()
         db.refresh(current_doctor)
         
         return {
             "message": f"{certificate_type.upper()} certificate uploaded successfully",
-            "certificate_url": certificate_url
+            "certificate_url": certificate_url,
+            "certificate_variants": variants
         }
+    except FileTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File size too large. Maximum size is 10MB."
+        )
     except Exception as e:
+        # Don't leak the file stored for an upload that was never saved
+        db.rollback()
+        if stored is not None:
+            await blob_service.discard_uploads(db, [stored])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload certificate: {str(e)}"
@@ -411,6 +441,7 @@ async def get_all_doctors(db: Session = Depends(get_db)):
                 "specialization": doctor.specialization,
                 "phone": doctor.phone,
                 "profile_picture_url": doctor.profile_picture_url,
+                "profile_picture_variants": doctor.profile_picture_variants,
                 "schedule": doctor.schedule,
                 "is_verified": doctor.is_verified,
                 "average_rating": doctor.average_rating or 0.0,
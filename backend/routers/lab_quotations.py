@@ -10,6 +10,7 @@ from schemas import (
     LabTestQuotationResponseCreate, LabTestQuotationResponseModel
 )
 from auth import get_current_user, get_current_clinic
+from services.quotation_acceptance import QuotationAcceptanceError, accept_lab_test_quotation
 
 router = APIRouter(prefix="/api/lab-quotations", tags=["lab-quotations"])
 
@@ -382,51 +383,15 @@ def accept_lab_quotation(
 ):
     """
     Patient accepts a quotation response
+    (one locked transaction; only one response per request can be accepted)
     """
     
-    response = db.query(LabTestQuotationResponse).filter(
-        LabTestQuotationResponse.id == response_id
-    ).first()
+    try:
+        result = accept_lab_test_quotation(db, response_id, current_user.id)
+    except QuotationAcceptanceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    if not response:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Quotation response not found"
-        )
-    
-    # Verify request belongs to user
-    request = db.query(LabTestQuotationRequest).filter(
-        LabTestQuotationRequest.id == response.quotation_request_id,
-        LabTestQuotationRequest.patient_id == current_user.id
-    ).first()
-    
-    if not request:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized"
-        )
-    
-    if response.is_accepted:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Quotation already accepted"
-        )
-    
-    # Update response
-    response.is_accepted = True
-    from datetime import datetime
-    response.accepted_at = datetime.utcnow()
-    
-    # Update request status
-    request.status = "accepted"
-    
-    db.commit()
-    
-    return {
-        "message": "Quotation accepted successfully",
-        "response_id": response.id,
-        "clinic_id": response.clinic_id
-    }
+    return {"message": "Quotation accepted successfully", **result}
 
 
 @router.get("/verified-clinics", response_model=list[dict])
@@ -13,12 +13,17 @@ from models import (
 )
 from schemas import LabReportCreate, LabReportResponse, TestResultItem
 from auth import get_current_user, get_current_clinic
+from services.notifications import notification, notification_service
 from typing import List, Optional
 import os
 import uuid
 import random
+import asyncio
 from datetime import datetime
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/lab-reports", tags=["lab-reports"])
 
@@ -48,27 +53,51 @@ def validate_file(file: UploadFile) -> bool:
     return True
 
 
-async def save_upload_file(file: UploadFile, prefix: str = "") -> str:
-    """Save uploaded file to Vercel Blob and return URL"""
-    from services.blob_service import blob_service
+async def save_upload_file(file: UploadFile, db: Session, prefix: str = "") -> dict:
+    """Stream uploaded file to Vercel Blob (deduplicated by content) and return the stored entry"""
+    from services.blob_service import blob_service, FileTooLargeError
     
-    # Read file content
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
+    # Upload to Vercel Blob Storage in chunks, enforcing the size limit as we go
+    try:
+        return await blob_service.store_upload(
+            db,
+            file,
+            folder="lab_reports",
+            max_size=MAX_FILE_SIZE
+        )
+    except FileTooLargeError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File size exceeds 10MB limit"
         )
+
+
+async def save_upload_files(files: List[UploadFile], db: Session) -> List[dict]:
+    """
+    Upload several files concurrently (at most UPLOAD_CONCURRENCY at a time)
     
-    # Upload to Vercel Blob Storage
-    file_url = await blob_service.upload_file(
-        file_content=content,
-        filename=file.filename,
-        folder="lab_reports",
-        content_type=file.content_type
-    )
+    Results come back in the order of `files`, whatever order the uploads
+    finish in. If any upload fails, the session is rolled back, the files
+    that did upload are removed, and the first error is raised.
+    """
+    from services.blob_service import blob_service
+    from config import settings
+    
+    semaphore = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
+    
+    async def upload_one(file: UploadFile) -> dict:
+        async with semaphore:
+            return await save_upload_file(file, db)
+    
+    results = await asyncio.gather(*[upload_one(f) for f in files], return_exceptions=True)
     
-    return file_url
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        db.rollback()
+        await blob_service.discard_uploads(db, [r for r in results if isinstance(r, dict)])
+        raise errors[0]
+    
+    return results
 
 
 @router.post("/create", response_model=dict)
@@ -89,6 +118,7 @@ async def create_lab_report(
     Clinic creates a lab report for an accepted quotation
     Supports PDF report and multiple images
     """
+    from services.blob_service import blob_service
     
     # Verify quotation response exists and belongs to clinic
     quotation_response = db.query(LabTestQuotationResponse).filter(
@@ -138,18 +168,19 @@ async def create_lab_report(
     while db.query(LabReport).filter(LabReport.report_id == report_id).first():
         report_id = generate_report_id()
     
-    # Handle file uploads
-    report_file_url = None
+    # Validate every file before uploading any of them
+    uploads = []
     if report_file:
         validate_file(report_file)
-        report_file_url = await save_upload_file(report_file, prefix=f"report_{report_id}")
+        uploads.append(report_file)
+    for image in report_images or []:
+        validate_file(image)
+        uploads.append(image)
     
-    report_images_urls = []
-    if report_images:
-        for idx, image in enumerate(report_images):
-            validate_file(image)
-            image_url = await save_upload_file(image, prefix=f"report_{report_id}_img{idx}")
-            report_images_urls.append(image_url)
+    # Handle file uploads (concurrently; positions map results back to fields)
+    stored_files = await save_upload_files(uploads, db)
+    report_file_url = stored_files[0]["url"] if report_file else None
+    report_images_urls = [stored["url"] for stored in stored_files[1 if report_file else 0:]]
     
     # Parse test date if provided
     parsed_test_date = None
@@ -177,14 +208,32 @@ async def create_lab_report(
         verified_at=datetime.utcnow()
     )
     
-    db.add(lab_report)
-    
-    # Update quotation request status
-    quotation_request.status = "completed"
-    
-    db.commit()
+    try:
+        db.add(lab_report)
+        
+        # Update quotation request status
+        quotation_request.status = "completed"
+        
+        db.commit()
+    except Exception:
+        logger.exception(f"Failed to create lab report {report_id}")
+        # Don't leak the blobs uploaded for a report that was never saved
+        db.rollback()
+        await blob_service.discard_uploads(db, stored_files)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create lab report"
+        )
     db.refresh(lab_report)
     
+    notification_service.publish([notification(
+        lab_report.patient_id,
+        "Lab report ready",
+        f"{current_clinic.clinic_name} uploaded your report \"{report_title}\"",
+        category="lab_report",
+        data={"lab_report_id": lab_report.id, "report_id": report_id, "clinic_id": current_clinic.id}
+    )])
+    
     return {
         "message": "Lab report created successfully",
         "report_id": lab_report.report_id,
@@ -410,14 +459,17 @@ def get_accepted_quotations_pending_reports(
 
 
 @router.delete("/{report_id}")
-def delete_lab_report(
+async def delete_lab_report(
     report_id: int,
     current_clinic: Clinic = Depends(get_current_clinic),
     db: Session = Depends(get_db)
 ):
     """
     Delete a lab report (clinic only)
+    Files are queued in the blob_deletions outbox and removed in the background
     """
+    from services.blob_service import blob_service
+    from services.blob_cleanup import blob_deletion_worker
     
     report = db.query(LabReport).filter(
         LabReport.id == report_id,
@@ -430,19 +482,16 @@ def delete_lab_report(
             detail="Lab report not found"
         )
     
-    # Delete associated files
+    # Release associated files (shared content is only queued for deletion with its last reference)
     if report.report_file_url:
-        file_path = report.report_file_url.lstrip('/')
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        await blob_service.release_file(db, report.report_file_url)
     
     if report.report_images:
         for image_url in report.report_images:
-            image_path = image_url.lstrip('/')
-            if os.path.exists(image_path):
-                os.remove(image_path)
+            await blob_service.release_file(db, image_url)
     
     db.delete(report)
     db.commit()
+    blob_deletion_worker.notify()
     
     return {"message": "Lab report deleted successfully"}
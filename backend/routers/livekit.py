@@ -1,16 +1,19 @@
 """
 LiveKit API routes for video conferencing
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import json
 import logging
 
 from database import get_db
-from models import User, Doctor, Appointment
+from models import User, Doctor, Appointment, AppointmentStatus
 from auth import get_current_user
-from services.livekit_service import livekit_service
+from services.livekit_service import livekit_service, room_status_cache, room_event_hub
 
 logger = logging.getLogger(__name__)
 
@@ -48,46 +51,33 @@ async def join_appointment_call(
                 detail="Appointment not found"
             )
         
-        #check for restart
-
         # Check if user is authorized (patient or doctor)
-        print(f"\n🔐 AUTHORIZATION CHECK:")
-        print(f"   current_user.id: {current_user.id} (type: {type(current_user).__name__})")
-        print(f"   appointment.patient_id: {appointment.patient_id}")
-        print(f"   appointment.doctor_id: {appointment.doctor_id}")
-        print(f"   Has specialization (is doctor): {hasattr(current_user, 'specialization')}")
-        
         is_patient = current_user.id == appointment.patient_id
         is_doctor = current_user.id == appointment.doctor_id
         
-        print(f"   Is patient match: {is_patient}")
-        print(f"   Is doctor match: {is_doctor}")
-        
         if not is_patient and not is_doctor:
-            print(f"   ❌ AUTHORIZATION FAILED: User {current_user.id} is neither patient nor doctor")
+            logger.warning(f"User {current_user.id} is neither patient nor doctor of appointment {appointment.id}")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to join this appointment"
             )
         
+        if appointment.status == AppointmentStatus.CANCELLED:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Appointment has been cancelled"
+            )
+        
         # Generate room name based on appointment
         room_name = f"appointment_{appointment.id}_{request.room_type}"
         
         # Determine participant identity and name
-        print(f"\n🔍 PARTICIPANT IDENTITY DEBUG:")
-        print(f"   Current user ID: {current_user.id}")
-        print(f"   Has specialization: {hasattr(current_user, 'specialization')}")
-        print(f"   Appointment patient_id: {appointment.patient_id}")
-        print(f"   Appointment doctor_id: {appointment.doctor_id}")
-        
         if hasattr(current_user, 'specialization'):  # Doctor
             participant_identity = f"doctor_{current_user.id}"
             participant_name = f"Dr. {current_user.full_name}"
-            print(f"   ✅ IDENTIFIED AS DOCTOR: {participant_identity}")
         else:  # Patient
             participant_identity = f"patient_{current_user.id}"
             participant_name = current_user.name or current_user.full_name
-            print(f"   ✅ IDENTIFIED AS PATIENT: {participant_identity}")
         
         # Generate access token
         token_data = livekit_service.generate_access_token(
@@ -96,9 +86,7 @@ async def join_appointment_call(
             participant_name=participant_name
         )
         
-        logger.info(f"🎥 Generated LiveKit token for user {current_user.id} ({participant_name}) in room {room_name}")
-        logger.info(f"   Participant identity: {participant_identity}")
-        logger.info(f"   LiveKit URL: {token_data['url']}")
+        logger.info(f"🎥 LiveKit token issued for {participant_identity} in room {room_name}")
         
         return JoinRoomResponse(
             token=token_data['token'],
@@ -221,22 +209,19 @@ async def get_room_status(
         db.close()
         
         try:
-            print(f"\n🔍 CHECKING LIVEKIT ROOM: {room_name}")
-            logger.info(f"🔍 Checking room status for: {room_name}")
-            room_info = await livekit_service.get_room_info(room_name)
-            print(f"✅ ROOM INFO: {room_info}")
-            logger.info(f"✅ Room info received: {room_info}")
+            # Served from the shared snapshot (refreshed by one background poller)
+            room_info = await room_status_cache.get(room_name)
             
             is_active = room_info.get('is_active', False)
             participant_count = room_info.get('num_participants', 0)
             
-            print(f"📊 RESULT - Active: {is_active}, Participants: {participant_count}")
-            logger.info(f"📊 Room {room_name} - Active: {is_active}, Participants: {participant_count}")
+            logger.debug(f"📊 Room {room_name} - Active: {is_active}, Participants: {participant_count}")
             
             return {
                 "is_active": is_active,
                 "participant_count": participant_count,
-                "room_name": room_name
+                "room_name": room_name,
+                "age_seconds": room_info.get('age_seconds')
             }
         except Exception as check_error:
             # Room doesn't exist or is empty - this is normal when no one is in the room
@@ -256,4 +241,97 @@ async def get_room_status(
         return {
             "is_active": False,
             "participant_count": 0
-        }
\ No newline at end of file
+        }
+
+
+@router.post("/webhook")
+async def livekit_webhook(request: Request):
+    """
+    Receive LiveKit server webhooks (room_started, participant_joined, ...)
+    
+    The request is authenticated by its signed Authorization header, not a
+    user token. Events update the room status cache and are pushed to
+    clients subscribed to /livekit/events/{appointment_id}.
+    """
+    body = (await request.body()).decode('utf-8')
+    try:
+        event = livekit_service.receive_webhook(body, request.headers.get('Authorization', ''))
+    except Exception as e:
+        logger.warning(f"Rejected LiveKit webhook: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook signature"
+        )
+    
+    room_event_hub.publish(event)
+    return {"received": True}
+
+@router.get("/events/{appointment_id}")
+async def stream_room_events(
+    appointment_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of presence changes in an appointment's room
+    
+    Sends the current room status first, then one event per
+    participant_joined / participant_left / room_finished webhook, so the
+    patient and doctor learn the other party joined without polling.
+    """
+    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    
+    if not appointment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found"
+        )
+    
+    is_patient = appointment.patient_id == current_user.id
+    is_doctor = hasattr(current_user, 'specialization') and appointment.doctor_id == current_user.id
+    
+    if not (is_patient or is_doctor):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to watch this appointment"
+        )
+    
+    room_name = f"appointment_{appointment_id}_consultation"
+    
+    # Release the DB connection; the stream may stay open for a long time
+    db.close()
+    
+    queue = room_event_hub.subscribe(room_name)
+    
+    async def event_stream():
+        try:
+            room_info = await room_status_cache.get(room_name)
+            initial = {
+                "event": "room_status",
+                "room_name": room_name,
+                "is_active": room_info.get('is_active', False),
+                "num_participants": room_info.get('num_participants', 0),
+                "participants": room_event_hub.participants(room_name)
+            }
+            yield f"event: room_status\ndata: {json.dumps(initial)}\n\n"
+            
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {payload['event']}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            room_event_hub.unsubscribe(room_name, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx response buffering for SSE
+        }
+    )
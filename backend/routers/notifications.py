@@ -0,0 +1,165 @@
+"""
+Notifications Router
+Patient notification feed (?since= deltas), unread counter, read state and
+a Server-Sent Events stream that pushes new notifications as they are written
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from auth import get_current_user
+from database import get_db
+from models import Notification, User
+from schemas import NotificationFeed, NotificationMarkRead, NotificationResponse
+from services.notifications import notification_service
+
+router = APIRouter(prefix="/api/notifications", tags=["notifications"])
+
+
+def get_current_patient(current_user=Depends(get_current_user)) -> User:
+    """Notifications belong to patients (users table); doctors get 403"""
+    if not isinstance(current_user, User):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Notifications are only available to patients"
+        )
+    return current_user
+
+
+@router.get("", response_model=NotificationFeed)
+def list_notifications(
+    since: Optional[int] = Query(None, ge=0, description="cursor from a previous response: only newer notifications"),
+    before: Optional[int] = Query(None, ge=1, description="Older page: notifications with id below this"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    Notification feed of the current patient
+
+    Without `since`: the newest `limit` notifications, newest first (use
+    `before` with the smallest id to page back). With `since`: only
+    notifications created after that cursor, oldest first, so a poll that
+    finds nothing new is a single index range scan. Keep passing the
+    returned `cursor` as `since`; `has_more` means another call will
+    return more.
+    """
+    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+
+    if since is not None:
+        rows = query.filter(Notification.id > since).order_by(Notification.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = rows[-1].id if rows else since
+    else:
+        if before is not None:
+            query = query.filter(Notification.id < before)
+        rows = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before is None:
+            cursor = rows[0].id if rows else 0
+        else:
+            cursor = None
+
+    return {
+        "notifications": rows,
+        "cursor": cursor,
+        "has_more": has_more,
+        "unread_count": notification_service.unread_count(db, current_user.id)
+    }
+
+
+@router.get("/unread-count")
+def get_unread_count(
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """Number of unread notifications (cached; recounted at most once per TTL)"""
+    return {"unread_count": notification_service.unread_count(db, current_user.id)}
+
+
+@router.post("/read-all")
+def mark_all_read(
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """Mark every unread notification of the current patient as read"""
+    changed = notification_service.mark_read(db, current_user.id)
+    return {
+        "updated": len(changed),
+        "unread_count": notification_service.unread_count(db, current_user.id)
+    }
+
+
+@router.patch("/{notification_id}", response_model=NotificationResponse)
+def mark_notification(
+    notification_id: int,
+    update_data: NotificationMarkRead,
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """Mark one notification read (or unread again)"""
+    notification_service.mark_read(db, current_user.id, [notification_id], update_data.is_read)
+
+    notification = db.query(Notification).filter(
+        Notification.id == notification_id,
+        Notification.user_id == current_user.id
+    ).first()
+    if not notification:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Notification not found"
+        )
+    return notification
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    current_user: User = Depends(get_current_patient),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of the current patient's notifications
+
+    Sends the unread count first, then a `notification` event for each new
+    row, `read` events when notifications are marked read elsewhere and
+    `unread_count` events whenever the counter changes.
+    """
+    user_id = current_user.id
+    unread_count = notification_service.unread_count(db, user_id)
+
+    # Release the DB connection; the stream may stay open for a long time
+    db.close()
+
+    queue = notification_service.subscribe(user_id)
+
+    async def event_stream():
+        try:
+            yield f"event: unread_count\ndata: {json.dumps({'unread_count': unread_count})}\n\n"
+
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+        finally:
+            notification_service.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx response buffering for SSE
+        }
+    )
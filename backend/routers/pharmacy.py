@@ -3,19 +3,22 @@ Router for pharmacy authentication and profile management.
 Handles signup, login, and profile operations for pharmacies.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+import io
+
+from fastapi import APIRouter, HTTPException, Depends, File, Form, Query, UploadFile, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select, or_, and_
 from datetime import datetime, timedelta
 from typing import Optional
 
 from database import get_db
-from models import Pharmacy
+from models import Pharmacy, PharmacyPriceList, PharmacyPriceListItem
 from schemas import (
     PharmacyCreate, 
     PharmacyLogin, 
     PharmacyResponse, 
     PharmacyProfileUpdate,
+    PriceListSettingsUpdate,
     Token
 )
 from auth import (
@@ -24,6 +27,8 @@ from auth import (
     create_access_token,
     get_current_pharmacy
 )
+from services.price_index import medicine_key
+from services.price_list import PriceListError, parse_price_list, replace_price_list
 
 router = APIRouter(prefix="/api/pharmacy", tags=["pharmacy"])
 
@@ -254,3 +259,115 @@ def check_verification_status(current_pharmacy: Pharmacy = Depends(get_current_p
                    else "Pharmacy is pending admin verification"
     }
 
+
+# Price list (catalog used for automatic quotes)
+
+def _price_list_settings(price_list: PharmacyPriceList) -> dict:
+    return {
+        "auto_quote": price_list.auto_quote,
+        "auto_publish": price_list.auto_publish,
+        "delivery_charge": float(price_list.delivery_charge),
+        "estimated_delivery_time": price_list.estimated_delivery_time,
+        "item_count": price_list.item_count,
+        "uploaded_at": price_list.uploaded_at,
+        "updated_at": price_list.updated_at
+    }
+
+
+@router.put("/price-list", response_model=dict)
+def upload_price_list(
+    file: UploadFile = File(...),
+    auto_quote: Optional[bool] = Form(None),
+    auto_publish: Optional[bool] = Form(None),
+    delivery_charge: Optional[float] = Form(None, ge=0),
+    estimated_delivery_time: Optional[str] = Form(None, max_length=100),
+    current_pharmacy: Pharmacy = Depends(get_current_pharmacy),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload the pharmacy's price list as CSV, replacing the previous one.
+    Columns: medicine, unit_price and optionally in_stock (true/false).
+    New quotation requests are then quoted automatically from it: as drafts
+    to review, or sent straight to the patient with auto_publish=true.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        items = parse_price_list(stream)
+    except PriceListError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": str(e), "errors": e.errors} if e.errors else str(e)
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Price list must be a UTF-8 CSV file"
+        )
+    finally:
+        stream.detach()
+    
+    price_list = replace_price_list(
+        db, current_pharmacy.id, items,
+        auto_quote=auto_quote,
+        auto_publish=auto_publish,
+        delivery_charge=delivery_charge,
+        estimated_delivery_time=estimated_delivery_time
+    )
+    return {"message": "Price list uploaded successfully", **_price_list_settings(price_list)}
+
+
+@router.get("/price-list", response_model=dict)
+def get_price_list(
+    search: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    current_pharmacy: Pharmacy = Depends(get_current_pharmacy),
+    db: Session = Depends(get_db)
+):
+    """Current price list settings and its items (alphabetical, optionally filtered by name)"""
+    price_list = db.get(PharmacyPriceList, current_pharmacy.id)
+    if not price_list:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No price list uploaded yet"
+        )
+    
+    query = db.query(PharmacyPriceListItem).filter(PharmacyPriceListItem.pharmacy_id == current_pharmacy.id)
+    if search:
+        query = query.filter(PharmacyPriceListItem.medicine_key.contains(medicine_key(search), autoescape=True))
+    items = query.order_by(PharmacyPriceListItem.medicine_key).offset(offset).limit(limit).all()
+    
+    return {
+        **_price_list_settings(price_list),
+        "items": [
+            {
+                "medicine_name": item.medicine_name,
+                "unit_price": float(item.unit_price),
+                "in_stock": item.in_stock
+            }
+            for item in items
+        ]
+    }
+
+
+@router.patch("/price-list", response_model=dict)
+def update_price_list_settings(
+    settings_data: PriceListSettingsUpdate,
+    current_pharmacy: Pharmacy = Depends(get_current_pharmacy),
+    db: Session = Depends(get_db)
+):
+    """Change auto-quote settings without uploading the catalog again"""
+    price_list = db.get(PharmacyPriceList, current_pharmacy.id)
+    if not price_list:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No price list uploaded yet"
+        )
+    
+    for field, value in settings_data.dict(exclude_unset=True).items():
+        if value is not None:
+            setattr(price_list, field, value)
+    db.commit()
+    db.refresh(price_list)
+    
+    return _price_list_settings(price_list)
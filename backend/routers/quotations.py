@@ -3,7 +3,9 @@ Router for quotation management.
 Handles quotation requests from patients and quotation responses from pharmacies.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import select, and_, or_, func
 from datetime import datetime
@@ -25,9 +27,17 @@ from schemas import (
     QuotationRequestResponse,
     QuotationResponseCreate,
     QuotationResponseUpdate,
-    QuotationResponseResponse
+    QuotationResponseResponse,
+    QuotationDraftPublish
 )
 from auth import get_current_user, get_current_pharmacy
+from services.auto_quote import create_auto_quotes
+from services.notifications import notification, notification_service
+from services.pagination import InvalidCursorError, encode_cursor, fetch_page, newer_than_cursor
+from services.price_index import market_benchmarks, price_comparison, record_quote
+from services.quotation_acceptance import QuotationAcceptanceError, accept_pharmacy_quotation
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/quotations", tags=["quotations"])
 
@@ -108,9 +118,34 @@ def create_quotation_request(
                 )
             )
 
+        # Price pharmacies with an uploaded price list right away; a failure
+        # there must not cost the patient the request itself
+        try:
+            with db.begin_nested():
+                auto_quotes = create_auto_quotes(db, quotation_request, selected_pharmacy_ids)
+        except Exception:
+            logger.exception(f"Automatic quotes failed for quotation request {quotation_request.id}")
+            auto_quotes = []
+
         db.commit()
         db.refresh(quotation_request)
         
+        pharmacy_names = {pharmacy.id: pharmacy.pharmacy_name for pharmacy in pharmacies}
+        notification_service.publish([
+            notification(
+                current_user.id,
+                "New quotation received",
+                f"{pharmacy_names[quote['pharmacy_id']]} quoted {quote['total_amount']:.2f} for your prescription",
+                category="quotation",
+                data={
+                    "quotation_request_id": quotation_request.id,
+                    "response_id": quote["response_id"],
+                    "pharmacy_id": quote["pharmacy_id"]
+                }
+            )
+            for quote in auto_quotes if quote["status"] == QuotationStatus.QUOTED.value
+        ])
+        
         return {
             "message": "Quotation request created successfully",
             "request_id": quotation_request.id,
@@ -124,7 +159,9 @@ def create_quotation_request(
                     "state": pharmacy.state
                 }
                 for pharmacy in pharmacies
-            ]
+            ],
+            # Only the published ones are visible to the patient; drafts wait for the pharmacy
+            "auto_quotes": [quote for quote in auto_quotes if quote["status"] != QuotationStatus.DRAFT.value]
         }
         
     except HTTPException:
@@ -179,6 +216,7 @@ def get_my_quotation_requests(
                         "status": resp.status.value,
                         "created_at": resp.created_at
                     } for resp in req.quotation_responses
+                    if resp.status != QuotationStatus.DRAFT
                 ] if req.quotation_responses else [],
                 "target_pharmacies": [
                     {
@@ -226,24 +264,37 @@ def get_quotation_responses(
         
         # Get all responses for this request
         responses = db.query(QuotationResponse).filter(
-            QuotationResponse.quotation_request_id == request_id
+            QuotationResponse.quotation_request_id == request_id,
+            QuotationResponse.status != QuotationStatus.DRAFT
         ).options(
-            selectinload(QuotationResponse.pharmacy)
+            selectinload(QuotationResponse.pharmacy),
+            selectinload(QuotationResponse.line_items)
         ).order_by(QuotationResponse.total_amount).all()
         
         # Format response
         formatted_responses = []
         for resp in responses:
-            # Normalize quoted_items to ensure consistent field names
-            normalized_items = []
-            for item in resp.quoted_items:
-                normalized_item = {
-                    "medicine_name": item.get("medicine") or item.get("medicine_name"),
-                    "quantity": item.get("quantity"),
-                    "unit_price": item.get("unit_price"),
-                    "total_price": item.get("total_price")
-                }
-                normalized_items.append(normalized_item)
+            if resp.line_items:
+                normalized_items = [
+                    {
+                        "medicine_name": item.medicine_name,
+                        "quantity": item.quantity,
+                        "unit_price": float(item.unit_price),
+                        "total_price": float(item.total_price)
+                    }
+                    for item in sorted(resp.line_items, key=lambda item: item.position)
+                ]
+            else:
+                # Quotes written before quotation_line_items was backfilled
+                normalized_items = []
+                for item in resp.quoted_items:
+                    normalized_item = {
+                        "medicine_name": item.get("medicine") or item.get("medicine_name"),
+                        "quantity": item.get("quantity"),
+                        "unit_price": item.get("unit_price"),
+                        "total_price": item.get("total_price")
+                    }
+                    normalized_items.append(normalized_item)
             
             response_dict = {
                 "id": resp.id,
@@ -281,44 +332,98 @@ def get_quotation_responses(
         )
 
 
+@router.get("/request/{request_id}/price-comparison", response_model=List[dict])
+def get_price_comparison(
+    request_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Compare the quotes of a request medicine by medicine.
+    Each medicine lists every pharmacy's unit price (cheapest first) and the
+    market min/median/max across pharmacies' latest quotes.
+    """
+    request = db.query(QuotationRequest.id).filter(
+        QuotationRequest.id == request_id,
+        QuotationRequest.patient_id == current_user.id
+    ).first()
+    
+    if not request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quotation request not found"
+        )
+    
+    return price_comparison(db, request_id)
+
+
 # Pharmacy Endpoints
 
+@router.get("/market-prices", response_model=List[dict])
+def get_market_prices(
+    medicine: List[str] = Query(..., min_length=1, max_length=50, description="Medicine names (repeat the parameter)"),
+    current_pharmacy: Pharmacy = Depends(get_current_pharmacy),
+    db: Session = Depends(get_db)
+):
+    """
+    Market benchmark for medicines: min/median/max of every pharmacy's
+    latest quoted unit price, next to this pharmacy's own latest price.
+    """
+    return market_benchmarks(db, current_pharmacy.id, medicine)
+
+
 @router.get("/pending", response_model=List[QuotationRequestResponse])
 def get_pending_quotation_requests(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
     current_pharmacy: Pharmacy = Depends(get_current_pharmacy),
     db: Session = Depends(get_db)
 ):
     """
-    Get all pending quotation requests that pharmacy hasn't responded to yet.
+    Get pending quotation requests that pharmacy hasn't responded to yet.
     Only shows requests with status 'pending' or 'quoted' (but not already quoted by this pharmacy).
+    
+    Newest first, at most `limit` per page. The X-Next-Cursor header pages to
+    older requests (?cursor=); X-Poll-Cursor marks the newest request seen, so
+    polling with ?since=<X-Poll-Cursor> returns only requests that arrived after it.
     """
+    limit = max(1, min(limit, 500))
     try:
-        # Get quotation request IDs that this pharmacy has already responded to
-        responded_request_ids = [r.quotation_request_id for r in db.query(QuotationResponse.quotation_request_id).filter(
+        # Anti-join: the (pharmacy_id, quotation_request_id) index answers this per row,
+        # instead of sending every request id this pharmacy ever answered
+        already_answered = select(QuotationResponse.id).where(
+            QuotationResponse.quotation_request_id == QuotationRequest.id,
             QuotationResponse.pharmacy_id == current_pharmacy.id
-        ).all()]
+        ).exists()
         
-        # Get pending requests not yet responded to and targeted to this pharmacy
-        filters = [
-            QuotationRequest.status.in_([QuotationStatus.PENDING, QuotationStatus.QUOTED]),
-            QuotationRequestPharmacy.pharmacy_id == current_pharmacy.id
-        ]
-
-        if responded_request_ids:
-            filters.append(~QuotationRequest.id.in_(responded_request_ids))
-
         query = db.query(QuotationRequest).join(
             QuotationRequestPharmacy,
             QuotationRequestPharmacy.quotation_request_id == QuotationRequest.id
         ).filter(
-            *filters
+            QuotationRequestPharmacy.pharmacy_id == current_pharmacy.id,
+            QuotationRequest.status.in_([QuotationStatus.PENDING, QuotationStatus.QUOTED]),
+            ~already_answered
         ).options(
             selectinload(QuotationRequest.prescription),
             selectinload(QuotationRequest.patient),
             selectinload(QuotationRequest.target_pharmacies).selectinload(QuotationRequestPharmacy.pharmacy)
-        ).order_by(QuotationRequest.created_at.desc())
+        )
+        
+        try:
+            if since:
+                query = newer_than_cursor(query, QuotationRequest, since)
+            requests, next_cursor = fetch_page(query, QuotationRequest, limit, cursor=cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
-        requests = query.all()
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        if requests and not cursor:
+            response.headers["X-Poll-Cursor"] = encode_cursor(requests[0].created_at, requests[0].id)
+        elif since:
+            response.headers["X-Poll-Cursor"] = since
         
         # Format response
         formatted_requests = []
@@ -359,6 +464,8 @@ def get_pending_quotation_requests(
         
         return formatted_requests
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -405,6 +512,12 @@ def submit_quotation_response(
             )
         ).first()
         
+        if existing_response and existing_response.status == QuotationStatus.DRAFT:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"An automatic draft quotation ({existing_response.id}) exists for this request; edit and publish it instead"
+            )
+        
         if existing_response:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -429,6 +542,10 @@ def submit_quotation_response(
         )
         
         db.add(quotation_response)
+        db.flush()
+        
+        # Normalized line items and the medicine price index, in the same transaction
+        record_quote(db, quotation_response)
         
         # Update request status to 'quoted'
         request.status = QuotationStatus.QUOTED
@@ -437,6 +554,18 @@ def submit_quotation_response(
         db.commit()
         db.refresh(quotation_response)
         
+        notification_service.publish([notification(
+            request.patient_id,
+            "New quotation received",
+            f"{current_pharmacy.pharmacy_name} quoted {float(quotation_response.total_amount):.2f} for your prescription",
+            category="quotation",
+            data={
+                "quotation_request_id": request.id,
+                "response_id": quotation_response.id,
+                "pharmacy_id": current_pharmacy.id
+            }
+        )])
+        
         return {
             "message": "Quotation submitted successfully",
             "response_id": quotation_response.id,
@@ -513,83 +642,120 @@ def get_my_quotations(
         )
 
 
-@router.put("/{quotation_id}/accept", response_model=dict)
-def accept_quotation(
+@router.put("/{quotation_id}/publish", response_model=dict)
+def publish_draft_quotation(
     quotation_id: int,
-    current_user: User = Depends(get_current_user),
+    edits: Optional[QuotationDraftPublish] = None,
+    current_pharmacy: Pharmacy = Depends(get_current_pharmacy),
     db: Session = Depends(get_db)
 ):
     """
-    Patient accepts a quotation response.
-    Updates quotation response and request status to 'accepted'.
+    Pharmacy sends an automatic draft quotation to the patient.
+    Items, delivery charge, notes and delivery time can be edited on the way;
+    totals are recomputed from the items.
     """
+    quotation = db.query(QuotationResponse).filter(
+        QuotationResponse.id == quotation_id,
+        QuotationResponse.pharmacy_id == current_pharmacy.id
+    ).first()
+    
+    if not quotation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quotation not found"
+        )
+    
+    # Same lock as acceptance, so a draft cannot be published into an accepted request
+    request = db.query(QuotationRequest).filter(
+        QuotationRequest.id == quotation.quotation_request_id
+    ).with_for_update().first()
+    db.refresh(quotation)
+    
+    if quotation.status != QuotationStatus.DRAFT:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only draft quotations can be published (status: {quotation.status.value})"
+        )
+    
+    if request.status not in (QuotationStatus.PENDING, QuotationStatus.QUOTED):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"The quotation request is already {request.status.value}"
+        )
+    
     try:
-        # Get quotation response with relationships
-        quotation = db.query(QuotationResponse).filter(
-            QuotationResponse.id == quotation_id
-        ).options(
-            selectinload(QuotationResponse.quotation_request),
-            selectinload(QuotationResponse.pharmacy)
-        ).first()
-        
-        if not quotation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Quotation not found"
-            )
-        
-        # Verify the quotation belongs to the current user's request
-        if quotation.quotation_request.patient_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only accept quotations for your own requests"
-            )
-        
-        # Check if quotation is in a valid state to be accepted
-        if quotation.status != QuotationStatus.QUOTED:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cannot accept quotation with status: {quotation.status.value}"
-            )
-        
-        # Update quotation response status
-        quotation.status = QuotationStatus.ACCEPTED
+        if edits is not None:
+            if edits.quoted_items is not None:
+                quotation.quoted_items = [item.dict() for item in edits.quoted_items]
+                quotation.subtotal = Decimal(str(sum(item.total_price for item in edits.quoted_items)))
+            if edits.delivery_charge is not None:
+                quotation.delivery_charge = Decimal(str(edits.delivery_charge))
+            if edits.notes is not None:
+                quotation.notes = edits.notes
+            if edits.estimated_delivery_time is not None:
+                quotation.estimated_delivery_time = edits.estimated_delivery_time
+            quotation.total_amount = Decimal(quotation.subtotal) + Decimal(quotation.delivery_charge)
+        
+        quotation.status = QuotationStatus.QUOTED
         quotation.updated_at = datetime.utcnow()
+        request.status = QuotationStatus.QUOTED
+        request.updated_at = datetime.utcnow()
         
-        # Update quotation request status
-        quotation.quotation_request.status = QuotationStatus.ACCEPTED
-        quotation.quotation_request.updated_at = datetime.utcnow()
-        
-        # Reject other quotations for the same request
-        other_quotations = db.query(QuotationResponse).filter(
-            and_(
-                QuotationResponse.quotation_request_id == quotation.quotation_request_id,
-                QuotationResponse.id != quotation_id,
-                QuotationResponse.status == QuotationStatus.QUOTED
-            )
-        ).all()
-        
-        for other_quot in other_quotations:
-            other_quot.status = QuotationStatus.REJECTED
-            other_quot.updated_at = datetime.utcnow()
-        
+        record_quote(db, quotation)
         db.commit()
-        
-        return {
-            "message": "Quotation accepted successfully",
-            "quotation_id": quotation.id,
-            "pharmacy_name": quotation.pharmacy.pharmacy_name if quotation.pharmacy else "Unknown",
-            "total_amount": float(quotation.total_amount)
-        }
-        
-    except HTTPException:
-        raise
+        db.refresh(quotation)
     except Exception as e:
         db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to publish quotation: {str(e)}"
+        )
+    
+    notification_service.publish([notification(
+        request.patient_id,
+        "New quotation received",
+        f"{current_pharmacy.pharmacy_name} quoted {float(quotation.total_amount):.2f} for your prescription",
+        category="quotation",
+        data={
+            "quotation_request_id": request.id,
+            "response_id": quotation.id,
+            "pharmacy_id": current_pharmacy.id
+        }
+    )])
+    
+    return {
+        "message": "Quotation published successfully",
+        "response_id": quotation.id,
+        "total_amount": float(quotation.total_amount),
+        "status": quotation.status.value
+    }
+
+
+@router.put("/{quotation_id}/accept", response_model=dict)
+def accept_quotation(
+    quotation_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Patient accepts a quotation response.
+    Updates quotation response and request status to 'accepted' and rejects
+    the request's other open quotations, in one locked transaction; a
+    concurrent acceptance of another quotation gets 409.
+    """
+    try:
+        result = accept_pharmacy_quotation(db, quotation_id, current_user.id)
+    except QuotationAcceptanceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to accept quotation: {str(e)}"
         )
+    
+    return {"message": "Quotation accepted successfully", **result}
 
 
 # Public Endpoint (for patients to see verified pharmacies)
@@ -0,0 +1,137 @@
+"""
+Uploaded File Router
+Authorizes /uploads requests (signed, expiring URLs) and hands the byte
+transfer to nginx via X-Accel-Redirect; serves the file itself (with Range
+support) when no nginx is in front, e.g. in local development
+"""
+
+import mimetypes
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from config import settings
+from services.signed_urls import verify_upload_signature
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+UPLOAD_ROOT = Path("uploads").resolve()
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 256 * 1024
+
+
+def _resolve(path: str) -> Path:
+    """Map a URL path to a file inside uploads/, refusing traversal"""
+    file_path = (UPLOAD_ROOT / path).resolve()
+    if UPLOAD_ROOT not in file_path.parents or not file_path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return file_path
+
+
+def _cache_headers(expires: Optional[int]) -> dict:
+    # Content is addressed by hash, so it never changes under a URL; the
+    # cache lifetime is bounded by the link's own expiry
+    max_age = max(0, expires - int(time.time())) if expires else 3600
+    return {
+        "Cache-Control": f"private, max-age={max_age}, immutable",
+        "Accept-Ranges": "bytes"
+    }
+
+
+def _parse_range(header: str, file_size: int):
+    """
+    Single byte range -> (start, end) inclusive; None if not satisfiable
+
+    Returns False for headers this endpoint does not honour (several
+    ranges, malformed syntax): RFC 9110 lets a server ignore Range, so
+    the caller sends the whole file with 200 instead.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return False
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, file_size - length), file_size - 1
+    start = int(first)
+    end = min(int(last), file_size - 1) if last else file_size - 1
+    if start >= file_size or start > end:
+        return None
+    return start, end
+
+
+def _range_response(file_path: Path, byte_range, file_size: int, headers: dict) -> StreamingResponse:
+    start, end = byte_range
+
+    def read_range():
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    media_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+    return StreamingResponse(
+        read_range(),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{file_size}",
+            "Content-Length": str(end - start + 1)
+        }
+    )
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_upload(
+    path: str,
+    request: Request,
+    expires: Optional[int] = None,
+    sig: Optional[str] = None
+):
+    """Serve an uploaded file after checking its signature"""
+    if settings.UPLOADS_REQUIRE_SIGNATURE and not verify_upload_signature(path, expires, sig):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired file link"
+        )
+
+    file_path = _resolve(path)
+    headers = _cache_headers(expires)
+
+    if settings.UPLOADS_X_ACCEL_PREFIX:
+        # nginx streams the file (and handles Range/ETag) from its internal location
+        relative = file_path.relative_to(UPLOAD_ROOT).as_posix()
+        return Response(
+            headers={
+                **headers,
+                "X-Accel-Redirect": f"{settings.UPLOADS_X_ACCEL_PREFIX.rstrip('/')}/{relative}"
+            },
+            media_type=mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+        )
+
+    file_size = os.path.getsize(file_path)
+    range_header = request.headers.get("range")
+    byte_range = _parse_range(range_header, file_size) if range_header else False
+    if byte_range is None:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    if byte_range:
+        return _range_response(file_path, byte_range, file_size, headers)
+
+    return FileResponse(file_path, headers=headers)
@@ -138,7 +138,8 @@ async def upload_profile_picture(
     db: Session = Depends(get_db)
 ):
     """Upload and update user profile picture"""
-    from services.blob_service import blob_service
+    from services.blob_service import blob_service, FileTooLargeError
+    from services.image_service import image_service
     
     # Validate file type
     allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
@@ -148,34 +149,45 @@ async def upload_profile_picture(
             detail="Invalid file type. Only JPEG, PNG, GIF, and WebP images are allowed."
         )
     
-    # Validate file size (max 5MB)
-    contents = await file.read()
-    if len(contents) > 5 * 1024 * 1024:  # 5MB in bytes
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File size too large. Maximum size is 5MB."
-        )
-    
+    stored = None
     try:
-        # Upload to Vercel Blob Storage
-        profile_picture_url = await blob_service.upload_file(
-            file_content=contents,
-            filename=file.filename,
+        # Stream to Vercel Blob Storage, enforcing the 5MB limit as chunks arrive
+        stored = await blob_service.store_upload(
+            db,
+            file,
             folder="profile_pictures",
-            content_type=file.content_type
+            max_size=5 * 1024 * 1024
         )
+        profile_picture_url = stored["url"]
+        
+        # Thumbnail/medium WebP variants for list pages
+        variants = await image_service.create_variants(db, file, stored)
+        
+        # Drop the replaced picture's reference (same URL too: store_upload counted this upload)
+        await blob_service.release_file(db, current_user.profile_picture_url)
         
         # Update user profile picture URL
         current_user.profile_picture_url = profile_picture_url
+        current_user.profile_picture_variants = variants
         
         db.commit()
         db.refresh(current_user)
         
         return {
             "message": "Profile picture uploaded successfully",
-            "profile_picture_url": profile_picture_url
+            "profile_picture_url": profile_picture_url,
+            "profile_picture_variants": variants
         }
+    except FileTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File size too large. Maximum size is 5MB."
+        )
     except Exception as e:
+        # Don't leak the file stored for an upload that was never saved
+        db.rollback()
+        if stored is not None:
+            await blob_service.discard_uploads(db, [stored])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload file: {str(e)}"
@@ -26,6 +26,7 @@ class UserResponse(UserBase):
     state: Optional[str] = None
     city: Optional[str] = None
     profile_picture_url: Optional[str] = None
+    profile_picture_variants: Optional[dict] = None
     created_at: datetime
     
     class Config:
@@ -84,6 +85,7 @@ class DoctorResponse(DoctorBase):
     fcps_certificate_url: Optional[str] = None
     degrees: Optional[list] = None
     profile_picture_url: Optional[str] = None
+    profile_picture_variants: Optional[dict] = None
     average_rating: Optional[float] = 0.0
     total_ratings: Optional[int] = 0
     
@@ -309,6 +311,14 @@ class DoctorVerificationUpdate(BaseModel):
     is_verified: Optional[bool] = None
     is_active: Optional[bool] = None
 
+class BulkVerificationUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+    is_verified: Optional[bool] = None
+    is_active: Optional[bool] = None
+
+class BulkIdsRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
 # Pharmacy Schemas
 class PharmacyBase(BaseModel):
     phone: str = Field(..., min_length=10, max_length=20)
@@ -435,6 +445,19 @@ class QuotationResponseCreate(BaseModel):
             raise ValueError('At least one item must be quoted')
         return v
 
+class QuotationDraftPublish(BaseModel):
+    """Optional edits applied to an automatic draft quotation before it is sent"""
+    quoted_items: Optional[list[QuotedItem]] = Field(None, min_items=1)
+    delivery_charge: Optional[float] = Field(None, ge=0)
+    notes: Optional[str] = Field(None, max_length=1000)
+    estimated_delivery_time: Optional[str] = Field(None, max_length=100)
+
+class PriceListSettingsUpdate(BaseModel):
+    auto_quote: Optional[bool] = None
+    auto_publish: Optional[bool] = None
+    delivery_charge: Optional[float] = Field(None, ge=0)
+    estimated_delivery_time: Optional[str] = Field(None, max_length=100)
+
 class QuotationResponseUpdate(BaseModel):
     status: Optional[str] = None
     
@@ -484,6 +507,13 @@ class NotificationMarkRead(BaseModel):
     is_read: bool = True
 
 
+class NotificationFeed(BaseModel):
+    notifications: List[NotificationResponse]
+    cursor: Optional[int] = None  # Pass back as ?since= to get only newer notifications
+    has_more: bool = False
+    unread_count: int
+
+
 # Clinic Schemas
 class ClinicSignup(BaseModel):
     clinic_name: str = Field(..., min_length=3, max_length=200)
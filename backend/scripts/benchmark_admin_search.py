@@ -0,0 +1,97 @@
+"""
+Benchmark: admin substring search over 1M users, with and without pg_trgm
+Builds a throwaway copy of the searched users columns in a scratch schema
+(ROWS rows, default 1,000,000), times the ILIKE '%term%' search the admin
+endpoints run, then adds the trigram GIN indexes from
+migrations/migrate_trigram_indexes.py and times it again. The scratch
+schema is dropped afterwards.
+Needs PostgreSQL with the pg_trgm extension available (DATABASE_URL).
+Run this from the backend directory:
+    python scripts/benchmark_admin_search.py [rows]
+"""
+import sys
+import os
+import statistics
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from database import engine
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+REPEATS = 5
+SCHEMA = "bench_admin_search"
+TERMS = ["rahman 4242", "01712", "akter", "zzzz"]
+
+SEARCH_SQL = f"""
+    SELECT id, name, phone, greatest(similarity(name, :q), similarity(phone, :q)) AS score
+    FROM {SCHEMA}.users
+    WHERE name ILIKE :pattern OR phone ILIKE :pattern
+    ORDER BY score DESC, id DESC
+    LIMIT 20
+"""
+
+FIRST_NAMES = ["Karim", "Rahim", "Nusrat", "Farhana", "Tanvir", "Sadia", "Arif", "Mitu", "Rafi", "Jannat"]
+LAST_NAMES = ["Rahman", "Hossain", "Akter", "Islam", "Chowdhury", "Ahmed", "Begum", "Uddin", "Khan", "Sarkar"]
+
+
+def setup(conn):
+    print(f"Creating {ROWS:,} rows in {SCHEMA}.users ...")
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.users (id serial PRIMARY KEY, name text, phone text)"))
+    first = "ARRAY[" + ",".join(f"'{n}'" for n in FIRST_NAMES) + "]"
+    last = "ARRAY[" + ",".join(f"'{n}'" for n in LAST_NAMES) + "]"
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.users (name, phone)
+        SELECT ({first})[1 + i % 10] || ' ' || ({last})[1 + (i / 10) % 10] || ' ' || i,
+               '017' || lpad(i::text, 8, '0')
+        FROM generate_series(1, :rows) AS i
+    """), {"rows": ROWS})
+    conn.execute(text(f"ANALYZE {SCHEMA}.users"))
+
+
+def time_search(conn, label):
+    print(f"\n{label}")
+    for term in TERMS:
+        params = {"q": term, "pattern": f"%{term}%"}
+        plan = conn.execute(text("EXPLAIN " + SEARCH_SQL), params).scalars().all()
+        uses_index = any("Bitmap Index Scan" in line for line in plan)
+        timings = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            hits = conn.execute(text(SEARCH_SQL), params).all()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(
+            f"  {term!r:15} {len(hits):3} hits   median {statistics.median(timings):9.2f} ms   "
+            f"{'trigram index' if uses_index else 'sequential scan'}"
+        )
+
+
+def main():
+    if engine.dialect.name != "postgresql":
+        print("This benchmark needs a PostgreSQL DATABASE_URL.")
+        sys.exit(1)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            setup(conn)
+            time_search(conn, "Without trigram indexes:")
+
+            start = time.perf_counter()
+            for column in ("name", "phone"):
+                conn.execute(text(
+                    f"CREATE INDEX ix_bench_users_{column}_trgm ON {SCHEMA}.users USING gin ({column} gin_trgm_ops)"
+                ))
+            conn.execute(text(f"ANALYZE {SCHEMA}.users"))
+            print(f"\nBuilt trigram indexes in {time.perf_counter() - start:.1f} s")
+
+            time_search(conn, "With trigram indexes:")
+        finally:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: per-call session vs shared pooled HTTP client
+Starts a local HTTPS stand-in (self-signed certificate) and compares the
+latency of N sequential calls made the old way (new aiohttp.ClientSession
+per call, full TCP+TLS handshake each time) against the shared client.
+Run this from the backend directory: python scripts/benchmark_http_client.py
+"""
+import sys
+import os
+import ssl
+import asyncio
+import datetime
+import statistics
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp import web
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from services.http_client import SharedHTTPClient
+
+CALLS = 200
+
+
+def make_self_signed_cert(directory):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+async def handler(request):
+    await request.read()
+    return web.json_response({"url": "https://localhost/blob", "rooms": []})
+
+
+def summarize(label, samples):
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    print(f"{label:28} mean {statistics.mean(samples_ms):7.2f} ms   "
+          f"p50 {statistics.median(samples_ms):7.2f} ms   p95 {p95:7.2f} ms")
+    return statistics.mean(samples_ms)
+
+
+async def run():
+    with tempfile.TemporaryDirectory() as tmp:
+        cert_path, key_path = make_self_signed_cert(tmp)
+        server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_ctx.load_cert_chain(cert_path, key_path)
+        client_ctx = ssl.create_default_context(cafile=cert_path)
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "localhost", 0, ssl_context=server_ctx)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f"https://localhost:{port}/twirp/livekit.RoomService/ListRooms"
+
+        try:
+            # Old behaviour: one session (and TLS handshake) per call
+            per_call = []
+            for _ in range(CALLS):
+                start = time.perf_counter()
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(url, json={}, ssl=client_ctx) as response:
+                        await response.json()
+                per_call.append(time.perf_counter() - start)
+
+            # New behaviour: shared pooled session
+            client = SharedHTTPClient()
+            await client.start()
+            shared = []
+            for _ in range(CALLS):
+                start = time.perf_counter()
+                async with client.session.post(url, json={}, ssl=client_ctx) as response:
+                    await response.json()
+                shared.append(time.perf_counter() - start)
+            await client.close()
+        finally:
+            await runner.cleanup()
+
+    print(f"\n{CALLS} sequential HTTPS calls to a local stand-in\n")
+    before = summarize("new session per call", per_call)
+    after = summarize("shared pooled client", shared)
+    print(f"\nPer-call latency reduced by {(1 - after / before) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,145 @@
+"""
+Benchmark: pharmacy pending-quotation feed with 100k historic responses
+Seeds a throwaway SQLite database where one pharmacy has already answered
+RESPONSES requests (default 100,000) and has a few still open, then times
+the old NOT IN (<every answered id>) query against the NOT EXISTS
+anti-join behind GET /api/quotations/pending, and checks paging and ?since=.
+Run this from the backend directory:
+    python scripts/benchmark_pending_quotations.py [responses]
+"""
+import sys
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from database import Base, engine, SessionLocal
+from models import (
+    User, Doctor, Appointment, Prescription, Pharmacy,
+    QuotationRequest, QuotationRequestPharmacy, QuotationResponse, QuotationStatus
+)
+from auth import create_access_token
+from routers.quotations import router as quotations_router
+
+RESPONSES = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+OPEN_REQUESTS = 120
+REPEATS = 5
+PHARMACY_PHONE = "01900000000"
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patient = User(phone="01700000000", hashed_password="x", name="Bench Patient")
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Bench Doctor",
+                    specialization="general", license_number="BENCH-1")
+    pharmacy = Pharmacy(phone=PHARMACY_PHONE, hashed_password="x", pharmacy_name="Bench Pharmacy",
+                        license_number="PH-BENCH", street_address="Road 1", city="Dhaka",
+                        state="Dhaka", postal_code="1200", country="Bangladesh", is_verified=True)
+    db.add_all([patient, doctor, pharmacy])
+    db.flush()
+    appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=date.today(),
+                              time_slot="09:00 AM - 10:00 AM")
+    db.add(appointment)
+    db.flush()
+    prescription = Prescription(appointment_id=appointment.id, patient_id=patient.id, doctor_id=doctor.id,
+                                prescription_id="CC-1", diagnosis="checkup", medications=[])
+    db.add(prescription)
+    db.commit()
+    pharmacy_id, patient_id, prescription_id = pharmacy.id, patient.id, prescription.id
+
+    total = RESPONSES + OPEN_REQUESTS
+    start = datetime(2025, 1, 1)
+    print(f"Seeding {RESPONSES:,} answered and {OPEN_REQUESTS} open requests ...")
+    db.execute(insert(QuotationRequest), [
+        {"id": i, "patient_id": patient_id, "prescription_id": prescription_id,
+         "status": QuotationStatus.QUOTED if i <= RESPONSES else QuotationStatus.PENDING,
+         "created_at": start + timedelta(minutes=i)}
+        for i in range(1, total + 1)
+    ])
+    db.execute(insert(QuotationRequestPharmacy), [
+        {"quotation_request_id": i, "pharmacy_id": pharmacy_id} for i in range(1, total + 1)
+    ])
+    db.execute(insert(QuotationResponse), [
+        {"quotation_request_id": i, "pharmacy_id": pharmacy_id, "quoted_items": [],
+         "subtotal": 100, "delivery_charge": 0, "total_amount": 100}
+        for i in range(1, RESPONSES + 1)
+    ])
+    db.commit()
+    db.close()
+    return pharmacy_id
+
+
+def old_query(db, pharmacy_id):
+    """The previous implementation: load every answered id, then NOT IN"""
+    responded = [r.quotation_request_id for r in db.query(QuotationResponse.quotation_request_id).filter(
+        QuotationResponse.pharmacy_id == pharmacy_id
+    ).all()]
+    return db.query(QuotationRequest).join(
+        QuotationRequestPharmacy, QuotationRequestPharmacy.quotation_request_id == QuotationRequest.id
+    ).filter(
+        QuotationRequest.status.in_([QuotationStatus.PENDING, QuotationStatus.QUOTED]),
+        QuotationRequestPharmacy.pharmacy_id == pharmacy_id,
+        ~QuotationRequest.id.in_(responded)
+    ).order_by(QuotationRequest.created_at.desc()).all()
+
+
+def timed(func):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def run():
+    pharmacy_id = seed()
+    app = FastAPI()
+    app.include_router(quotations_router)
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": PHARMACY_PHONE, "user_type": "pharmacy"})}
+
+    db = SessionLocal()
+    old_ms, old_rows = timed(lambda: old_query(db, pharmacy_id))
+    db.close()
+    new_ms, response = timed(lambda: client.get("/api/quotations/pending", params={"limit": 200}, headers=headers))
+    new_rows = response.json()
+    assert len(old_rows) == len(new_rows) == OPEN_REQUESTS, (len(old_rows), len(new_rows))
+    assert [r.id for r in old_rows] == [r["id"] for r in new_rows]
+
+    print(f"\nNOT IN ({RESPONSES:,} literals), query only : {old_ms:8.1f} ms")
+    print(f"NOT EXISTS anti-join, full HTTP request  : {new_ms:8.1f} ms")
+
+    # Paging and polling
+    first = client.get("/api/quotations/pending", params={"limit": 50}, headers=headers)
+    second = client.get("/api/quotations/pending", params={"limit": 50, "cursor": first.headers["X-Next-Cursor"]},
+                        headers=headers)
+    assert {r["id"] for r in first.json()}.isdisjoint(r["id"] for r in second.json())
+    poll = first.headers["X-Poll-Cursor"]
+    assert client.get("/api/quotations/pending", params={"since": poll}, headers=headers).json() == []
+
+    db = SessionLocal()
+    db.add(QuotationRequest(id=RESPONSES + OPEN_REQUESTS + 1, patient_id=1, prescription_id=1,
+                            created_at=datetime(2030, 1, 1)))
+    db.add(QuotationRequestPharmacy(quotation_request_id=RESPONSES + OPEN_REQUESTS + 1, pharmacy_id=pharmacy_id))
+    db.commit()
+    db.close()
+    newer = client.get("/api/quotations/pending", params={"since": poll}, headers=headers).json()
+    assert [r["id"] for r in newer] == [RESPONSES + OPEN_REQUESTS + 1], newer
+    print("Paging with ?cursor= and polling with ?since= return the expected requests")
+
+
+if __name__ == "__main__":
+    run()
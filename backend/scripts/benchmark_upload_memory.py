@@ -0,0 +1,79 @@
+"""
+Benchmark: peak memory of concurrent uploads, buffered vs streamed
+Simulates N concurrent uploads of SIZE_MB each (default 50 x 10MB) into
+local storage and reports the Python heap peak (tracemalloc) for the old
+read-everything path and the chunked upload_stream path.
+Run this from the backend directory:
+    python scripts/benchmark_upload_memory.py [uploads] [size_mb]
+"""
+import sys
+import os
+import asyncio
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.datastructures import UploadFile
+
+from services.blob_service import VercelBlobService
+
+UPLOADS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+SIZE_MB = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+MAX_SIZE = 10 * 1024 * 1024
+
+
+def make_upload(source_path):
+    # Starlette hands routes a file-backed UploadFile; reopen the same source per upload
+    return UploadFile(open(source_path, "rb"), filename="scan.pdf", size=None)
+
+
+async def buffered(service, source_path):
+    upload = make_upload(source_path)
+    content = await upload.read()
+    if len(content) > MAX_SIZE:
+        raise ValueError("too large")
+    await service.upload_file(content, upload.filename, folder="bench_buffered")
+    await upload.close()
+
+
+async def streamed(service, source_path):
+    upload = make_upload(source_path)
+    await service.upload_stream(upload, folder="bench_streamed", max_size=MAX_SIZE)
+    await upload.close()
+
+
+async def measure(label, func, service, source_path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*[func(service, source_path) for _ in range(UPLOADS)])
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:10} peak heap {peak / (1024 * 1024):8.1f} MB   wall {elapsed:6.2f} s")
+    return peak
+
+
+async def run():
+    tmp = Path(tempfile.mkdtemp())
+    try:
+        source_path = tmp / "source.bin"
+        with open(source_path, "wb") as f:
+            f.write(os.urandom(SIZE_MB * 1024 * 1024))
+
+        service = VercelBlobService()
+        service.use_blob_storage = False
+        service.local_upload_dir = tmp / "uploads"
+
+        print(f"\n{UPLOADS} concurrent uploads of {SIZE_MB}MB to local storage\n")
+        before = await measure("buffered", buffered, service, source_path)
+        after = await measure("streamed", streamed, service, source_path)
+        print(f"\nPeak memory reduced {before / max(after, 1):.0f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
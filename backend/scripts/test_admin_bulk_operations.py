@@ -0,0 +1,113 @@
+"""
+Test script for the bulk admin verification endpoints
+Seeds a throwaway SQLite database and checks that bulk verify/toggle
+requests run a single UPDATE, report an outcome per requested id, and
+invalidate the dashboard snapshot and cached list totals.
+Run this from the backend directory: python scripts/test_admin_bulk_operations.py
+"""
+import sys
+import os
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bulk.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import Base, engine, SessionLocal
+from models import Admin, Doctor, Pharmacy, Clinic
+from auth import create_access_token
+from routers.admin import router as admin_router
+from services.dashboard_stats import dashboard_stats
+
+HEADERS = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "user_type": "admin"})}
+PROVIDERS = 200
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Admin(username="admin", hashed_password="x", full_name="Admin", email="admin@example.com"))
+    for i in range(PROVIDERS):
+        db.add(Doctor(phone=f"0180{i:07d}", hashed_password="x", full_name=f"Doctor {i}",
+                      specialization="general", license_number=f"DOC-{i}"))
+        db.add(Pharmacy(phone=f"0190{i:07d}", hashed_password="x", pharmacy_name=f"Pharmacy {i}",
+                        owner_name="Owner", license_number=f"PH-{i}", street_address="Road 1",
+                        city="Dhaka", state="Dhaka", postal_code="1200", country="Bangladesh"))
+        db.add(Clinic(phone=f"0150{i:07d}", hashed_password="x", clinic_name=f"Clinic {i}",
+                      license_number=f"CL-{i}", address="Road 2", is_active=i % 2 == 0))
+    db.commit()
+    db.close()
+
+
+class UpdateCounter:
+    def __init__(self):
+        self.updates = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            self.updates += 1
+
+
+def run():
+    seed()
+    app = FastAPI()
+    app.include_router(admin_router)
+    client = TestClient(app)
+    counter = UpdateCounter()
+
+    # 1. Bulk verify: one UPDATE for 150 doctors, duplicates collapsed, unknown ids reported
+    ids = list(range(1, 151)) + [5, 9999]
+    counter.updates = 0
+    response = client.post("/api/admin/doctors/bulk-verify", json={"ids": ids, "is_verified": True}, headers=HEADERS)
+    body = response.json()
+    assert response.status_code == 200, response.text
+    assert counter.updates == 1, counter.updates
+    assert body["updated"] == 150 and body["not_found"] == 1, {k: body[k] for k in ("updated", "not_found")}
+    assert [r["id"] for r in body["results"]][:3] == [1, 2, 3] and body["results"][-1] == {"id": 9999, "outcome": "not_found"}
+    assert all(r["is_verified"] for r in body["results"] if r["outcome"] == "updated")
+    print("✅ 150 doctors verified with a single UPDATE and per-id outcomes")
+
+    # 2. Pharmacies and clinics record who verified them and when
+    admin_id = SessionLocal().query(Admin.id).scalar()
+    for path in ("/api/admin/pharmacies/bulk-verify", "/api/admin/clinics/bulk-verify"):
+        counter.updates = 0
+        body = client.post(path, json={"ids": [1, 2, 3], "is_verified": True}, headers=HEADERS).json()
+        assert counter.updates == 1 and body["updated"] == 3
+        assert all(r["verified_at"] for r in body["results"]), body
+    db = SessionLocal()
+    assert {p.verified_by for p in db.query(Pharmacy).filter(Pharmacy.id <= 3)} == {admin_id}
+    db.close()
+    print("✅ Pharmacies and clinics get verified_by/verified_at")
+
+    # 3. Toggle flips each clinic from its own value
+    counter.updates = 0
+    body = client.post("/api/admin/clinics/bulk-toggle-active", json={"ids": [1, 2]}, headers=HEADERS).json()
+    assert counter.updates == 1
+    assert [r["is_active"] for r in body["results"]] == [False, True], body  # clinic 1 was active, 2 inactive
+    print("✅ Bulk toggle flips each clinic independently")
+
+    # 4. Dependent caches are invalidated
+    stats = client.get("/api/admin/dashboard/stats", headers=HEADERS).json()
+    unverified_before = stats["pending"]["unverified_doctors"]
+    client.post("/api/admin/doctors/bulk-verify", json={"ids": list(range(151, 161)), "is_verified": True}, headers=HEADERS)
+    stats = client.get("/api/admin/dashboard/stats", headers=HEADERS).json()
+    assert stats["pending"]["unverified_doctors"] == unverified_before - 10, stats["pending"]
+    print("✅ Dashboard snapshot reflects the bulk update immediately")
+
+    # 5. Validation
+    assert client.post("/api/admin/doctors/bulk-verify", json={"ids": [1]}, headers=HEADERS).status_code == 400
+    assert client.post("/api/admin/doctors/bulk-verify", json={"ids": [], "is_verified": True}, headers=HEADERS).status_code == 422
+    print("✅ Empty id lists and no-op requests are rejected")
+
+    print("\n🎉 All bulk admin checks passed!")
+
+
+if __name__ == "__main__":
+    run()
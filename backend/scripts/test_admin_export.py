@@ -0,0 +1,130 @@
+"""
+Test script for the streaming admin export
+Seeds a throwaway SQLite database and checks the CSV/NDJSON export content,
+the optional Parquet output, the date-range and status filters, and that peak memory stays flat as the
+exported table grows.
+Run this from the backend directory: python scripts/test_admin_export.py
+"""
+import sys
+import os
+import csv
+import io
+import json
+import tempfile
+import tracemalloc
+from datetime import date, datetime
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'export.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, update
+
+from database import Base, engine, SessionLocal
+from models import Admin, User, Doctor, Appointment, AppointmentStatus
+from auth import create_access_token
+from routers.admin import router as admin_router
+from services.export import PARQUET_AVAILABLE, stream_export
+
+HEADERS = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "user_type": "admin"})}
+
+
+def add_patients(db, first, count):
+    db.execute(insert(User), [
+        {"phone": f"017{i:08d}", "hashed_password": "x", "name": f"Patient {i}", "city": "Dhaka", "is_active": i % 4 != 0}
+        for i in range(first, first + count)
+    ])
+    db.commit()
+
+
+def peak_export_memory(name):
+    tracemalloc.start()
+    size = sum(len(chunk) for chunk in stream_export(name, "csv"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, size
+
+
+def run():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Admin(username="admin", hashed_password="x", full_name="Admin", email="admin@example.com"))
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Dr Export",
+                    specialization="general", license_number="LIC-1")
+    db.add(doctor)
+    db.commit()
+    add_patients(db, 0, 10_000)
+
+    statuses = [AppointmentStatus.PENDING, AppointmentStatus.COMPLETED, AppointmentStatus.CANCELLED]
+    db.execute(insert(Appointment), [
+        {"patient_id": 1 + i, "doctor_id": doctor.id, "appointment_date": date(2026, 1, 1),
+         "time_slot": "09:00 AM - 10:00 AM", "status": statuses[i % 3]}
+        for i in range(30)
+    ])
+    db.execute(update(Appointment).where(Appointment.id <= 10).values(created_at=datetime(2025, 6, 15, 10)))
+    db.commit()
+
+    client = TestClient(FastAPI())
+    client.app.include_router(admin_router)
+
+    # 1. CSV: header plus every row, streamed as an attachment
+    response = client.get("/api/admin/export/patients", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 10_000 and rows[0]["name"] == "Patient 0", rows[:1]
+    print("✅ CSV export returns every patient")
+
+    # 2. NDJSON with a status filter
+    response = client.get("/api/admin/export/patients", params={"format": "ndjson", "status": "inactive"}, headers=HEADERS)
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 2_500 and not any(r["is_active"] for r in records)
+    print("✅ NDJSON export honours the status filter")
+
+    # 3. Date range and enum status filters
+    response = client.get("/api/admin/export/appointments",
+                          params={"format": "ndjson", "start": "2025-06-01", "end": "2025-06-30", "status": "pending,completed"},
+                          headers=HEADERS)
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records and all(r["id"] <= 10 and r["status"] in ("pending", "completed") for r in records), records
+    print(f"✅ Date range + status filters return {len(records)} appointments")
+
+    # 4. Parquet (only where pyarrow is installed)
+    if PARQUET_AVAILABLE:
+        import pyarrow.parquet as pq
+        response = client.get("/api/admin/export/appointments", params={"format": "parquet"}, headers=HEADERS)
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.num_rows == 30 and table.schema.field("id").type == "int64", table.schema
+        assert table.column("status").to_pylist()[:3] == ["pending", "completed", "cancelled"]
+        print("✅ Parquet export is readable and typed")
+    else:
+        assert client.get("/api/admin/export/patients", params={"format": "parquet"}, headers=HEADERS).status_code == 501
+        print("⚠️  pyarrow not installed - Parquet export correctly reports 501")
+
+    # 5. Bad input is rejected before streaming starts
+    assert client.get("/api/admin/export/nothing", headers=HEADERS).status_code == 404
+    assert client.get("/api/admin/export/patients", params={"format": "xml"}, headers=HEADERS).status_code == 400
+    assert client.get("/api/admin/export/patients", params={"status": "pending"}, headers=HEADERS).status_code == 400
+    assert client.get("/api/admin/export/patients", params={"start": "yesterday"}, headers=HEADERS).status_code == 400
+    print("✅ Unknown dataset, format, status and dates are rejected")
+
+    # 6. Memory stays flat while the table grows 5x
+    small_peak, small_size = peak_export_memory("patients")
+    add_patients(db, 10_000, 40_000)
+    large_peak, large_size = peak_export_memory("patients")
+    print(f"   10k rows: {small_size / 1e6:.1f} MB out, peak {small_peak / 1e6:.1f} MB")
+    print(f"   50k rows: {large_size / 1e6:.1f} MB out, peak {large_peak / 1e6:.1f} MB")
+    assert large_size > 4 * small_size and large_peak < 2 * small_peak, (small_peak, large_peak)
+    print("✅ Peak memory does not grow with the table")
+
+    db.close()
+    print("\n🎉 All export checks passed!")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,123 @@
+"""
+Test script for the admin listing query counts
+Seeds a throwaway SQLite database and checks that the admin list and detail
+endpoints run a fixed number of SQL statements however many rows they
+return (no per-row COUNT or Doctor lookups).
+Run this from the backend directory: python scripts/test_admin_query_counts.py
+"""
+import sys
+import os
+import tempfile
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'query_counts.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import Base, engine, SessionLocal
+from models import Admin, User, Doctor, Appointment, Prescription, AppointmentStatus
+from auth import create_access_token
+from routers.admin import router as admin_router
+
+PATIENTS = 60
+DOCTORS = 60
+
+# Statements per request, including the admin lookup done by get_current_admin
+BUDGETS = {
+    "/api/admin/patients": 4,        # admin, total, page, grouped counts
+    "/api/admin/doctors": 4,         # admin, total, page, grouped counts
+    "/api/admin/patients/1": 4,      # admin, patient, appointments+doctors, prescription count
+    "/api/admin/patients/1/prescriptions": 3,  # admin, patient, prescriptions+doctors
+    "/api/admin/doctors/1": 3,       # admin, doctor, appointment+prescription stats
+}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def measure(self, client, path, **params):
+        self.count = 0
+        response = client.get(path, params=params, headers=HEADERS)
+        assert response.status_code == 200, (path, response.status_code, response.text)
+        return self.count, response.json()
+
+
+HEADERS = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "user_type": "admin"})}
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Admin(username="admin", hashed_password="x", full_name="Admin", email="admin@example.com"))
+    doctors = [
+        Doctor(phone=f"0180000{i:04d}", hashed_password="x", full_name=f"Doctor {i}",
+               specialization="general", license_number=f"LIC-{i}")
+        for i in range(DOCTORS)
+    ]
+    patients = [User(phone=f"0170000{i:04d}", hashed_password="x", name=f"Patient {i}") for i in range(PATIENTS)]
+    db.add_all(doctors + patients)
+    db.flush()
+
+    for i, patient in enumerate(patients):
+        for j in range(3):
+            doctor = doctors[(i + j) % DOCTORS]
+            appointment = Appointment(
+                patient_id=patient.id, doctor_id=doctor.id, appointment_date=date.today(),
+                time_slot="09:00 AM - 10:00 AM", status=AppointmentStatus.COMPLETED
+            )
+            db.add(appointment)
+            db.flush()
+            db.add(Prescription(
+                appointment_id=appointment.id, patient_id=patient.id, doctor_id=doctor.id,
+                prescription_id=f"CC-{appointment.id}", diagnosis="checkup", medications=[]
+            ))
+    db.commit()
+    db.close()
+
+
+def run():
+    seed()
+    app = FastAPI()
+    app.include_router(admin_router)
+    client = TestClient(app)
+    counter = StatementCounter()
+
+    # 1. List pages: same statement count for 5 rows and 50 rows
+    for path, key in (("/api/admin/patients", "patients"), ("/api/admin/doctors", "doctors")):
+        small, body_small = counter.measure(client, path, limit=5)
+        large, body_large = counter.measure(client, path, limit=50)
+        assert len(body_small[key]) == 5 and len(body_large[key]) == 50
+        assert all(row["appointment_count"] == 3 for row in body_large[key]), body_large[key][:3]
+        assert small == large <= BUDGETS[path], (path, small, large)
+        print(f"✅ {path}: {large} statements for 5 or 50 rows")
+
+    # 2. Detail pages: doctors come from a join, not one lookup per row
+    for path in ("/api/admin/patients/1", "/api/admin/patients/1/prescriptions", "/api/admin/doctors/1"):
+        statements, body = counter.measure(client, path)
+        assert statements <= BUDGETS[path], (path, statements)
+        print(f"✅ {path}: {statements} statements")
+
+    _, details = counter.measure(client, "/api/admin/patients/1")
+    assert len(details["appointments"]) == 3 and all(a["doctor"]["id"] for a in details["appointments"])
+    _, prescriptions = counter.measure(client, "/api/admin/patients/1/prescriptions")
+    assert len(prescriptions) == 3 and all(p["doctor"]["id"] for p in prescriptions)
+    _, doctor = counter.measure(client, "/api/admin/doctors/1")
+    assert doctor["stats"] == {"total_appointments": 3, "completed_appointments": 3, "total_prescriptions": 3}, doctor["stats"]
+    print("✅ Detail payloads unchanged")
+
+    print("\n🎉 All admin query count checks passed!")
+
+
+if __name__ == "__main__":
+    run()
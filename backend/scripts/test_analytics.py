@@ -0,0 +1,117 @@
+"""
+Test script for the admin analytics time series
+Seeds a throwaway SQLite database with signups at chosen UTC instants and
+checks the bucket keys, counts and zero-filled gaps of time_series in
+non-UTC timezones: hourly buckets across both New York DST changes
+(skipped hour dropped, repeated hour merged), daily buckets across the
+autumn change, and week/month buckets whose local boundaries differ from
+the UTC ones (Asia/Dhaka, UTC+6).
+Run this from the backend directory: python scripts/test_analytics.py
+"""
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'analytics.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base, engine, SessionLocal
+from models import User
+from services.analytics import time_series
+
+NEW_YORK = "America/New_York"  # DST from 2026-03-08 07:00 UTC to 2026-11-01 06:00 UTC
+DHAKA = "Asia/Dhaka"
+
+# Signup instants in UTC (naive, as SQLite stores them)
+SIGNUPS = [
+    "2026-01-31 19:00",  # Dhaka 2026-02-01 01:00: February locally, January in UTC
+    "2026-02-28 20:00",  # Dhaka Sunday 2026-03-01 02:00: March, week of Monday 02-23
+    "2026-03-01 18:30",  # Dhaka Monday 2026-03-02 00:30: week of 03-02
+    "2026-03-08 06:30",  # New York 01:30 EST
+    "2026-03-08 07:30",  # New York 03:30 EDT (02:00-03:00 never happened)
+    "2026-03-08 08:10",  # New York 04:10 EDT
+    "2026-10-31 03:30",  # New York 2026-10-30 23:30 EDT: before the daily range
+    "2026-10-31 12:00",  # New York 2026-10-31 08:00 EDT
+    "2026-11-01 05:30",  # New York 01:30 EDT
+    "2026-11-01 06:30",  # New York 01:30 EST (the repeated hour)
+    "2026-11-02 04:30",  # New York 2026-11-01 23:30 EST: still November 1st locally
+]
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all([
+        User(phone=f"0170{i:07d}", hashed_password="x", name=f"Patient {i}", created_at=datetime.fromisoformat(moment))
+        for i, moment in enumerate(SIGNUPS)
+    ])
+    db.commit()
+    db.close()
+
+
+def series(db, start: str, end: str, granularity: str, tz: str):
+    result = time_series(db, ["signups"], datetime.fromisoformat(start), datetime.fromisoformat(end), granularity, tz)
+    assert result["totals"]["signups"] == sum(result["series"]["signups"]), result
+    return list(zip(result["buckets"], result["series"]["signups"]))
+
+
+def run():
+    seed()
+    db = SessionLocal()
+    try:
+        # 1. Spring forward: 02:00 does not exist locally, later rows use the EDT offset
+        spring = series(db, "2026-03-08 00:00", "2026-03-08 06:00", "hour", NEW_YORK)
+        assert spring == [
+            ("2026-03-08T00:00:00-05:00", 0),
+            ("2026-03-08T01:00:00-05:00", 1),
+            ("2026-03-08T03:00:00-04:00", 1),
+            ("2026-03-08T04:00:00-04:00", 1),
+            ("2026-03-08T05:00:00-04:00", 0),
+        ], spring
+        print(f"✅ Spring-forward day: {len(spring)} hourly buckets (02:00 skipped), zero-filled ends")
+
+        # 2. Fall back: both 01:xx hours share the 01:00 bucket, as date_trunc on local time does
+        autumn = series(db, "2026-11-01 00:00", "2026-11-01 04:00", "hour", NEW_YORK)
+        assert autumn == [
+            ("2026-11-01T00:00:00-04:00", 0),
+            ("2026-11-01T01:00:00-04:00", 2),
+            ("2026-11-01T02:00:00-05:00", 0),
+            ("2026-11-01T03:00:00-05:00", 0),
+        ], autumn
+        print("✅ Fall-back day: the repeated 01:00 hour counted once per row in one bucket")
+
+        # 3. Days across the change: local midnights, late-evening EST row on its local day
+        days = series(db, "2026-10-31", "2026-11-03", "day", NEW_YORK)
+        assert days == [
+            ("2026-10-31T00:00:00-04:00", 1),
+            ("2026-11-01T00:00:00-04:00", 3),
+            ("2026-11-02T00:00:00-05:00", 0),
+        ], days
+        print("✅ Daily buckets across the DST change use local midnights; the empty day is zero-filled")
+
+        # 4. Weeks (ISO, Monday) and months on local boundaries
+        weeks = series(db, "2026-02-16", "2026-03-16", "week", DHAKA)
+        assert weeks == [
+            ("2026-02-16T00:00:00+06:00", 0),
+            ("2026-02-23T00:00:00+06:00", 1),
+            ("2026-03-02T00:00:00+06:00", 4),  # Also the three 2026-03-08 rows
+            ("2026-03-09T00:00:00+06:00", 0),
+        ], weeks
+        months = series(db, "2026-01-01", "2026-04-01", "month", DHAKA)
+        assert months == [
+            ("2026-01-01T00:00:00+06:00", 0),
+            ("2026-02-01T00:00:00+06:00", 1),
+            ("2026-03-01T00:00:00+06:00", 5),
+        ], months
+        print("✅ Week and month buckets follow local (UTC+6) boundaries, not UTC ones")
+    finally:
+        db.close()
+
+    print("\n🎉 All analytics checks passed")
+
+
+if __name__ == "__main__":
+    run()
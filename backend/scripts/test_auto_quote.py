@@ -0,0 +1,231 @@
+"""
+Test script for pharmacy price lists and automatic quotes
+Seeds a throwaway SQLite database with PHARMACIES pharmacies (default 50)
+whose price lists hold CATALOG medicines each (default 5,000), then checks
+the CSV upload, that creating a quotation request prices the prescription
+for every targeted pharmacy in one pass (drafts vs auto-published quotes,
+quantities, totals, missing medicines), that the patient is notified of
+the published ones, that drafts stay hidden from the patient until the
+pharmacy publishes them, that a failing engine does not block the
+request, and how long the engine takes.
+Run this from the backend directory:
+    python scripts/test_auto_quote.py [pharmacies] [catalog]
+"""
+import sys
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'auto_quote.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from database import Base, engine, SessionLocal
+from models import (
+    User, Doctor, Appointment, Prescription, Pharmacy, PharmacyPriceList, PharmacyPriceListItem,
+    QuotationRequest, QuotationResponse, QuotationStatus, Notification
+)
+from auth import create_access_token
+from routers.pharmacy import router as pharmacy_router
+from routers import quotations as quotations_module
+from routers.quotations import router as quotations_router
+from services.auto_quote import create_auto_quotes
+from services.price_index import medicine_key
+
+PHARMACIES = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+CATALOG = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+REPEATS = 20
+PATIENT_PHONE = "01700000000"
+
+MEDICATIONS = [
+    {"name": "Napa", "dosage": "500mg", "frequency": "1+1+1", "duration": "5 days"},      # 15 units
+    {"name": "Seclo 20mg", "dosage": "20mg", "frequency": "1+0+1", "duration": "2 weeks"},  # 28 units
+    {"name": "Alatrol", "dosage": "10mg", "frequency": "once daily", "duration": "7 days"},  # 7 units
+    {"name": "Rare Syrup", "dosage": "100ml", "frequency": "twice daily", "duration": "3 days"},
+]
+# Catalog names matching the medications above (Rare Syrup is only stocked by pharmacy 0)
+CATALOG_MATCHES = ["Napa 500mg", "Seclo 20mg", "Alatrol"]
+
+
+def pharmacy_phone(i):
+    return f"019{i:08d}"
+
+
+def headers(phone, user_type):
+    return {"Authorization": "Bearer " + create_access_token({"sub": phone, "user_type": user_type})}
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patient = User(phone=PATIENT_PHONE, hashed_password="x", name="Patient")
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Doctor",
+                    specialization="general", license_number="DOC-1")
+    db.add_all([patient, doctor])
+    db.flush()
+    db.execute(insert(Pharmacy), [
+        {"phone": pharmacy_phone(i), "hashed_password": "x", "pharmacy_name": f"Pharmacy {i}",
+         "license_number": f"PH-{i}", "street_address": "Road 1", "city": "Dhaka", "state": "Dhaka",
+         "postal_code": "1200", "country": "Bangladesh", "is_verified": True, "is_active": True}
+        for i in range(PHARMACIES)
+    ])
+    pharmacy_ids = [pharmacy.id for pharmacy in db.query(Pharmacy).order_by(Pharmacy.id)]
+
+    # Pharmacy 0 gets its catalog through the upload endpoint; the rest are seeded directly
+    rng = random.Random(3)
+    prices = {}
+    db.execute(insert(PharmacyPriceList), [
+        {"pharmacy_id": pharmacy_id, "auto_quote": True, "auto_publish": i % 2 == 1,
+         "delivery_charge": 30, "estimated_delivery_time": "2 hours", "item_count": CATALOG}
+        for i, pharmacy_id in enumerate(pharmacy_ids[1:], start=1)
+    ])
+    for i, pharmacy_id in enumerate(pharmacy_ids[1:], start=1):
+        rows = []
+        for n in range(CATALOG - len(CATALOG_MATCHES)):
+            rows.append({"pharmacy_id": pharmacy_id, "medicine_name": f"Medicine {n}",
+                         "medicine_key": f"medicine {n}", "unit_price": Decimal("9.99")})
+        for name in CATALOG_MATCHES:
+            price = Decimal(str(round(rng.uniform(1, 20), 2)))
+            prices[(pharmacy_id, name)] = price
+            rows.append({"pharmacy_id": pharmacy_id, "medicine_name": name,
+                         "medicine_key": medicine_key(name), "unit_price": price})
+        db.execute(insert(PharmacyPriceListItem), rows)
+
+    prescriptions = []
+    for n in range(REPEATS + 2):  # Prescriptions are one per appointment
+        appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=date.today(),
+                                  time_slot="09:00 AM - 10:00 AM")
+        db.add(appointment)
+        db.flush()
+        prescription = Prescription(appointment_id=appointment.id, patient_id=patient.id, doctor_id=doctor.id,
+                                    prescription_id=f"CC-{n}", diagnosis="checkup", medications=MEDICATIONS)
+        db.add(prescription)
+        db.flush()
+        prescriptions.append(prescription.id)
+    db.commit()
+    db.close()
+    return pharmacy_ids, prescriptions, prices
+
+
+def run():
+    pharmacy_ids, prescriptions, prices = seed()
+    app = FastAPI()
+    app.include_router(pharmacy_router)
+    app.include_router(quotations_router)
+    client = TestClient(app)
+    patient = headers(PATIENT_PHONE, "user")
+    first_pharmacy = headers(pharmacy_phone(0), "pharmacy")
+
+    # 1. CSV upload: bad rows reject the whole file, a good file replaces the catalog
+    bad = "medicine,unit_price\nNapa 500mg,abc\n,5\n"
+    response = client.put("/api/pharmacy/price-list", headers=first_pharmacy,
+                          files={"file": ("prices.csv", bad, "text/csv")})
+    assert response.status_code == 400 and len(response.json()["detail"]["errors"]) == 2, response.text
+    good = "medicine,unit_price,in_stock\nNapa 500mg,2.50,true\nSeclo 20mg,7,yes\nAlatrol,3,no\nRare Syrup 100ml,45,true\n"
+    response = client.put("/api/pharmacy/price-list", headers=first_pharmacy,
+                          files={"file": ("prices.csv", good, "text/csv")},
+                          data={"delivery_charge": "20", "estimated_delivery_time": "1 hour"})
+    assert response.status_code == 200 and response.json()["item_count"] == 4, response.text
+    listed = client.get("/api/pharmacy/price-list", headers=first_pharmacy, params={"search": "napa"}).json()
+    assert [item["medicine_name"] for item in listed["items"]] == ["Napa 500mg"], listed
+    print("✅ Price list upload: invalid rows rejected with line numbers, valid CSV stored")
+
+    # 2. A new request is priced for every targeted pharmacy
+    started = time.perf_counter()
+    response = client.post("/api/quotations/request", headers=patient, json={
+        "prescription_id": prescriptions[0], "pharmacy_ids": pharmacy_ids
+    })
+    request_ms = (time.perf_counter() - started) * 1000
+    assert response.status_code == 201, response.text
+    created = response.json()
+    request_id = created["request_id"]
+    published = created["auto_quotes"]
+    assert created["status"] == "quoted" and len(published) == PHARMACIES // 2, created
+
+    db = SessionLocal()
+    responses = {r.pharmacy_id: r for r in db.query(QuotationResponse).filter_by(quotation_request_id=request_id)}
+    assert len(responses) == PHARMACIES, len(responses)
+    sample = responses[pharmacy_ids[1]]
+    expected = sum(prices[(pharmacy_ids[1], name)] * quantity for name, quantity in zip(CATALOG_MATCHES, [15, 28, 7]))
+    assert sample.subtotal == expected and sample.total_amount == expected + 30, (sample.subtotal, expected)
+    assert "Not available: Rare Syrup" in sample.notes, sample.notes
+    own = responses[pharmacy_ids[0]]
+    # Alatrol is out of stock there; the syrup matches "name + dosage"
+    assert own.status == QuotationStatus.DRAFT and [item["medicine"] for item in own.quoted_items] == \
+        ["Napa 500mg", "Seclo 20mg", "Rare Syrup 100ml"], own.quoted_items
+    assert own.subtotal == Decimal("2.50") * 15 + 7 * 28 + 45 * 6, own.subtotal
+    notified = db.query(Notification).filter_by(user_id=1, category="quotation").all()
+    assert sorted(n.data["response_id"] for n in notified) == sorted(q["response_id"] for q in published), notified
+    db.close()
+    print(f"✅ Request for {PHARMACIES} pharmacies ({CATALOG:,} medicines each) created with quotes in {request_ms:.0f}ms: "
+          f"{len(published)} published, {PHARMACIES - len(published)} drafts")
+
+    # 3. Drafts are hidden from the patient until published
+    visible = client.get(f"/api/quotations/request/{request_id}/responses", headers=patient).json()
+    assert len(visible) == PHARMACIES // 2 and all(r["status"] == "quoted" for r in visible), len(visible)
+    response = client.post("/api/quotations/respond", headers=first_pharmacy, json={
+        "quotation_request_id": request_id,
+        "quoted_items": [{"medicine": "Napa", "quantity": 1, "unit_price": 2, "total_price": 2}]
+    })
+    assert response.status_code == 400 and "draft" in response.json()["detail"], response.text
+    response = client.put(f"/api/quotations/{own.id}/publish", headers=first_pharmacy, json={"delivery_charge": 0})
+    assert response.status_code == 200 and response.json()["total_amount"] == float(own.subtotal), response.text
+    visible = client.get(f"/api/quotations/request/{request_id}/responses", headers=patient).json()
+    assert len(visible) == PHARMACIES // 2 + 1, len(visible)
+    print("✅ Drafts hidden from the patient; /respond points to the draft; publishing makes it visible")
+
+    # 4. Accepting one quote closes the remaining drafts
+    accepted = client.put(f"/api/quotations/{own.id}/accept", headers=patient).json()
+    assert len(accepted["rejected_quotation_ids"]) == PHARMACIES - 1, accepted
+    print(f"✅ Acceptance rejected the other {PHARMACIES - 1} quotes and drafts")
+
+    # 5. A failing engine still leaves the patient with a plain request
+    def broken(db, request, pharmacy_ids):
+        create_auto_quotes(db, request, pharmacy_ids)
+        raise RuntimeError("price list lookup failed")
+
+    quotations_module.create_auto_quotes = broken
+    try:
+        response = client.post("/api/quotations/request", headers=patient, json={
+            "prescription_id": prescriptions[REPEATS + 1], "pharmacy_ids": pharmacy_ids
+        })
+    finally:
+        quotations_module.create_auto_quotes = create_auto_quotes
+    assert response.status_code == 201 and response.json()["status"] == "pending", response.text
+    assert response.json()["auto_quotes"] == [], response.text
+    db = SessionLocal()
+    assert db.query(QuotationResponse).filter_by(quotation_request_id=response.json()["request_id"]).count() == 0
+    db.close()
+    print("✅ Auto-quote failure rolled back to its savepoint; the request was still created")
+
+    # 6. Engine timing on its own (matching, totals and draft inserts, rolled back)
+    timings = []
+    for prescription_id in prescriptions[1:REPEATS + 1]:
+        db = SessionLocal()
+        request = QuotationRequest(patient_id=1, prescription_id=prescription_id, status=QuotationStatus.PENDING)
+        db.add(request)
+        db.flush()
+        started = time.perf_counter()
+        quotes = create_auto_quotes(db, request, pharmacy_ids)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert len(quotes) == PHARMACIES
+        db.rollback()
+        db.close()
+    print(f"✅ Auto-quote engine for {PHARMACIES} pharmacies: median {statistics.median(timings):.1f}ms, "
+          f"max {max(timings):.1f}ms over {REPEATS} runs")
+
+    print("\n🎉 All auto-quote checks passed")
+
+
+if __name__ == "__main__":
+    run()
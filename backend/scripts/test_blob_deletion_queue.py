@@ -0,0 +1,199 @@
+"""
+Test script for the blob deletion outbox and reconciliation
+Uses a throwaway SQLite database and local storage. Checks that releasing
+a file only queues it, that the worker deletes in batches, backs off on
+failure, skips re-uploaded content, that reconciliation finds orphans
+(the periodic sweep only reports them), that delete_file() keeps shared
+content, that replacing a profile picture releases the old file, and
+that a failed picture upload discards the file it stored.
+Run this from the backend directory: python scripts/test_blob_deletion_queue.py
+"""
+import sys
+import os
+import io
+import asyncio
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'cleanup.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+import models  # noqa: F401 - registers tables
+from database import Base, engine, SessionLocal
+from models import BlobDeletion, StoredBlob, User
+from auth import create_access_token
+from routers.users import router as users_router
+from services.blob_service import blob_service
+from services.blob_cleanup import BlobDeletionWorker
+from services.image_service import image_service
+
+
+def make_upload(name, content):
+    return UploadFile(io.BytesIO(content), filename=name)
+
+
+def local_path(url):
+    return blob_service.local_upload_dir / url[len("/uploads/"):]
+
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def run():
+    Base.metadata.create_all(bind=engine)
+    blob_service.use_blob_storage = False
+    blob_service.local_upload_dir = Path(_tmp_dir) / "uploads"
+    worker = BlobDeletionWorker(blob_service, interval=0.5, batch_size=10, max_backoff=60)
+
+    db = SessionLocal()
+    try:
+        stored = [
+            await blob_service.store_upload(db, make_upload(f"r{i}.pdf", f"report {i}".encode()), "lab_reports")
+            for i in range(3)
+        ]
+        db.commit()
+
+        # 1. Release only queues; files survive until the worker runs
+        for item in stored:
+            assert await blob_service.release_file(db, item["url"])
+        db.commit()
+        assert db.query(BlobDeletion).count() == 3
+        assert all(local_path(item["url"]).exists() for item in stored)
+        print("✅ release_file queued 3 deletions without touching storage")
+
+        # 2. Failing storage: rows stay with backoff
+        original_delete_files = blob_service.delete_files
+
+        async def failing_delete_files(urls):
+            raise Exception("storage unavailable")
+
+        blob_service.delete_files = failing_delete_files
+        assert await worker.process_batch() == 3
+        db.expire_all()
+        rows = db.query(BlobDeletion).all()
+        assert all(row.attempts == 1 and "unavailable" in row.last_error for row in rows)
+        assert await worker.process_batch() == 0, "retried before backoff expired"
+        print("✅ Failed batch rescheduled with backoff")
+
+        # 3. Content uploaded again before the retry: its delete is skipped
+        await blob_service.store_upload(db, make_upload("again.pdf", b"report 0"), "lab_reports")
+        db.commit()
+        blob_service.delete_files = original_delete_files
+        time.sleep(1.1)
+        assert await worker.drain() == 3
+        assert db.query(BlobDeletion).count() == 0
+        assert local_path(stored[0]["url"]).exists(), "re-uploaded content was deleted"
+        assert not local_path(stored[1]["url"]).exists() and not local_path(stored[2]["url"]).exists()
+        print("✅ Worker deleted 2 files and skipped the re-uploaded one")
+
+        # 4. Reconciliation: an untracked old file is an orphan, a fresh one is not
+        stray = blob_service.local_upload_dir / "profile_pictures" / "stray.jpg"
+        stray.parent.mkdir(parents=True, exist_ok=True)
+        stray.write_bytes(b"orphan")
+        old = time.time() - 2 * 86400
+        os.utime(stray, (old, old))
+        (blob_service.local_upload_dir / "profile_pictures" / "fresh.jpg").write_bytes(b"in flight")
+
+        report = await worker.reconcile(dry_run=True)
+        assert report["orphans"] == 1 and report["queued"] == 0, report
+        report = await worker.reconcile()
+        assert report["queued"] == 1
+        await worker.drain()
+        assert not stray.exists() and local_path(stored[0]["url"]).exists()
+        print(f"✅ Reconciliation scanned {report['scanned']} files and removed 1 orphan")
+
+        # 5. delete_file() only lets go of content once its last reference is gone
+        db.expunge_all()  # SQLite reuses the drained outbox ids
+        shared = [
+            await blob_service.store_upload(db, make_upload(name, b"shared scan"), "lab_reports")
+            for name in ("a.pdf", "b.pdf")
+        ]
+        db.commit()
+        assert shared[1]["deduplicated"] and shared[0]["url"] == shared[1]["url"]
+        assert not await blob_service.delete_file(db, shared[0]["url"])
+        db.commit()
+        assert db.query(BlobDeletion).count() == 0
+        assert await blob_service.delete_file(db, shared[1]["url"])
+        db.commit()
+        assert db.query(BlobDeletion).filter(BlobDeletion.url == shared[0]["url"]).count() == 1
+        await worker.drain()
+        print("✅ delete_file kept shared content until its last reference was deleted")
+
+        # 6. Replacing a profile picture releases the old one (and its variants)
+        db.add(User(phone="01700000000", hashed_password="x", name="Patient"))
+        db.commit()
+        app = FastAPI()
+        app.include_router(users_router)
+        client = TestClient(app)
+        auth = {"Authorization": "Bearer " + create_access_token({"sub": "01700000000", "user_type": "user"})}
+
+        def upload_picture(content):
+            response = client.post("/api/users/profile-picture", headers=auth,
+                                   files={"file": ("me.png", content, "image/png")})
+            assert response.status_code == 200, response.text
+            return response.json()
+
+        first = upload_picture(png("red"))
+        upload_picture(png("red"))  # Same picture again: still one reference
+        db.expire_all()
+        assert db.query(StoredBlob).filter(StoredBlob.url == first["profile_picture_url"]).one().ref_count == 1
+        upload_picture(png("blue"))
+        db.expire_all()
+        assert db.query(StoredBlob).filter(StoredBlob.url == first["profile_picture_url"]).first() is None
+        queued = {row.url for row in db.query(BlobDeletion)}
+        assert queued == {first["profile_picture_url"], *first["profile_picture_variants"].values()}, queued
+        await worker.drain()
+        assert not local_path(first["profile_picture_url"]).exists()
+        print(f"✅ Replaced profile picture released: {len(queued)} files (original + variants) deleted")
+
+        # 7. The periodic sweep only reports orphans; deleting them is an admin action
+        leftover = blob_service.local_upload_dir / "profile_pictures" / "legacy.jpg"
+        leftover.write_bytes(b"unregistered legacy upload")
+        os.utime(leftover, (old, old))
+        sweeper = BlobDeletionWorker(blob_service, interval=0.1, reconcile_interval=0.1)
+        sweeper._last_reconcile -= 1
+        sweeper.start()
+        await asyncio.sleep(0.5)
+        await sweeper.stop()
+        assert leftover.exists() and db.query(BlobDeletion).count() == 0
+        print("✅ Periodic reconciliation reported the orphan without queueing it")
+
+        # 8. A picture upload that fails after storing the file removes it again
+        async def broken_variants(db, upload, stored):
+            raise RuntimeError("resize failed")
+
+        def stored_files():
+            return {path for path in blob_service.local_upload_dir.rglob("*") if path.is_file()}
+
+        before = stored_files()
+        blobs = db.query(StoredBlob).count()
+        image_service.create_variants = broken_variants
+        try:
+            response = client.post("/api/users/profile-picture", headers=auth,
+                                   files={"file": ("me.png", png("green"), "image/png")})
+        finally:
+            del image_service.create_variants
+        assert response.status_code == 500, response.text
+        db.expire_all()
+        assert stored_files() == before and db.query(StoredBlob).count() == blobs
+        print("✅ Failed profile picture upload rolled back and discarded its file")
+    finally:
+        db.close()
+        shutil.rmtree(_tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
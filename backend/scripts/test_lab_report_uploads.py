@@ -0,0 +1,105 @@
+"""
+Test script for concurrent lab report uploads
+Uses a throwaway SQLite database and local storage with a simulated
+per-upload latency. Checks that uploads run in parallel, that results keep
+the submitted order, and that a failed batch leaves no files behind.
+Run this from the backend directory: python scripts/test_lab_report_uploads.py
+"""
+import sys
+import os
+import io
+import asyncio
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'uploads.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+import models  # noqa: F401 - registers tables
+from config import settings
+from database import Base, engine, SessionLocal
+from models import StoredBlob
+from routers.lab_reports import save_upload_files, MAX_FILE_SIZE
+from services.blob_service import blob_service
+
+LATENCY = 0.2  # seconds per simulated blob PUT
+IMAGES = 10
+
+
+def make_upload(name, content):
+    return UploadFile(io.BytesIO(content), filename=name)
+
+
+def stored_files(root):
+    return sorted(p for p in root.rglob("*") if p.is_file())
+
+
+async def run():
+    Base.metadata.create_all(bind=engine)
+    upload_root = Path(_tmp_dir) / "uploads"
+    blob_service.use_blob_storage = False
+    blob_service.local_upload_dir = upload_root
+
+    # Slow storage; later files finish first so completion order != submit order
+    original_stream_local = blob_service._stream_local
+
+    async def slow_stream_local(chunks, path):
+        url = await original_stream_local(chunks, path)
+        await asyncio.sleep(LATENCY * (1 + IMAGES - len(stored_files(upload_root))) / IMAGES)
+        return url
+
+    blob_service._stream_local = slow_stream_local
+
+    db = SessionLocal()
+    try:
+        # 1. Parallel, order-preserving upload
+        contents = [f"scan {i}".encode() * 100 for i in range(IMAGES)]
+        uploads = [make_upload(f"scan_{i}.png", c) for i, c in enumerate(contents)]
+        start = time.perf_counter()
+        results = await save_upload_files(uploads, db)
+        elapsed = time.perf_counter() - start
+        db.commit()
+
+        for content, stored in zip(contents, results):
+            path = upload_root / stored["url"].replace("/uploads/", "", 1)
+            assert path.read_bytes() == content, "results are out of order"
+        sequential = LATENCY * IMAGES
+        print(f"✅ {IMAGES} uploads in {elapsed:.2f}s "
+              f"(sequential would be ~{sequential:.1f}s, concurrency {settings.UPLOAD_CONCURRENCY})")
+        assert elapsed < sequential
+
+        # 2. One file over the limit: nothing from the batch survives
+        before = stored_files(upload_root)
+        batch = [make_upload(f"new_{i}.png", f"new {i}".encode()) for i in range(3)]
+        batch.append(make_upload("huge.pdf", b"x" * (MAX_FILE_SIZE + 1)))
+        try:
+            await save_upload_files(batch, db)
+            raise AssertionError("oversized batch was accepted")
+        except HTTPException as e:
+            assert e.status_code == 400
+        assert stored_files(upload_root) == before, "failed batch leaked files"
+        print("✅ Failed batch removed its uploaded files")
+
+        # 3. DB failure after upload: discard_uploads cleans up
+        batch = [make_upload("late.png", b"late upload")]
+        results = await save_upload_files(batch, db)
+        db.rollback()
+        deleted = await blob_service.discard_uploads(db, results)
+        assert deleted == 1 and stored_files(upload_root) == before
+        assert db.query(StoredBlob).count() == IMAGES
+        print("✅ Rolled-back report removed its uploaded files")
+    finally:
+        db.close()
+        shutil.rmtree(_tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
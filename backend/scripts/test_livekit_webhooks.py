@@ -0,0 +1,170 @@
+"""
+Test script for LiveKit webhooks and the room events stream
+Serves the LiveKit router on a local uvicorn server next to a fake LiveKit
+twirp server and checks that unsigned, wrongly signed and tampered webhooks
+are rejected, that /livekit/events/{appointment_id} streams the initial
+room status and then each pushed event, that only the appointment's
+patient and doctor may watch it, and that the room status cache takes the
+participant count from the webhook payload (not from this process's view).
+Run this from the backend directory: python scripts/test_livekit_webhooks.py
+"""
+import sys
+import os
+import asyncio
+import base64
+import hashlib
+import json
+import tempfile
+import time
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'livekit.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+os.environ["LIVEKIT_API_KEY"] = "test-key"
+os.environ["LIVEKIT_API_SECRET"] = "test-secret-that-is-long-enough-for-hs256"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+import uvicorn
+from aiohttp import web
+from fastapi import FastAPI
+from livekit.api import AccessToken
+
+from database import Base, engine, SessionLocal
+from models import User, Doctor, Appointment
+from auth import create_access_token
+from routers.livekit import router as livekit_router
+from services.livekit_service import livekit_service, room_status_cache
+
+ROOM = "appointment_1_consultation"
+
+
+def headers(phone, user_type):
+    return {"Authorization": "Bearer " + create_access_token({"sub": phone, "user_type": user_type})}
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patient = User(phone="01700000000", hashed_password="x", name="Patient")
+    other = User(phone="01700000001", hashed_password="x", name="Someone else")
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Doctor",
+                    specialization="general", license_number="DOC-1")
+    db.add_all([patient, other, doctor])
+    db.flush()
+    db.add(Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=date.today(),
+                       time_slot="09:00 AM - 10:00 AM"))
+    db.commit()
+    db.close()
+
+
+def webhook(event, num_participants, identity=None, secret=None):
+    """Webhook body and Authorization header signed the way the LiveKit server does it"""
+    payload = {"event": event, "room": {"name": ROOM, "num_participants": num_participants},
+               "created_at": int(time.time())}
+    if identity:
+        payload["participant"] = {"identity": identity}
+    body = json.dumps(payload)
+    digest = base64.b64encode(hashlib.sha256(body.encode()).digest()).decode()
+    token = AccessToken("test-key", secret or os.environ["LIVEKIT_API_SECRET"]).with_sha256(digest).to_jwt()
+    return body, {"Authorization": token, "Content-Type": "application/webhook+json"}
+
+
+async def next_event(response, timeout=5.0):
+    """Read one SSE event (skipping keep-alive comments) as (name, data)"""
+    name, data = None, None
+    while True:
+        line = (await asyncio.wait_for(response.content.readline(), timeout)).decode().rstrip("\n")
+        if line.startswith("event: "):
+            name = line[7:]
+        elif line.startswith("data: "):
+            data = json.loads(line[6:])
+        elif line == "" and name:
+            return name, data
+
+
+async def list_rooms(request):
+    return web.json_response({"rooms": []})
+
+
+async def run():
+    seed()
+    fake = web.Application()
+    fake.router.add_post("/twirp/livekit.RoomService/ListRooms", list_rooms)
+    fake_runner = web.AppRunner(fake)
+    await fake_runner.setup()
+    fake_site = web.TCPSite(fake_runner, "127.0.0.1", 0)
+    await fake_site.start()
+    livekit_service.livekit_url = f"ws://127.0.0.1:{fake_site._server.sockets[0].getsockname()[1]}"
+
+    app = FastAPI()
+    app.include_router(livekit_router)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning",
+                                           timeout_graceful_shutdown=1))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    base = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+
+    try:
+        async with aiohttp.ClientSession() as http:
+            async def post_webhook(body, request_headers):
+                async with http.post(f"{base}/livekit/webhook", data=body, headers=request_headers) as response:
+                    return response.status
+
+            # 1. Only correctly signed webhooks are accepted
+            body, signed = webhook("participant_joined", 1, "patient_1")
+            assert await post_webhook(body, {"Content-Type": "application/webhook+json"}) == 401
+            wrong_body, wrong_secret = webhook("participant_joined", 1, "patient_1", secret="a-different-secret-of-the-same-length")
+            assert await post_webhook(wrong_body, wrong_secret) == 401
+            tampered = body.replace('"num_participants": 1', '"num_participants": 9')
+            assert await post_webhook(tampered, signed) == 401
+            print("✅ Unsigned, wrongly signed and tampered webhooks rejected with 401")
+
+            # 2. Only the appointment's patient and doctor may watch the room
+            async with http.get(f"{base}/livekit/events/1", headers=headers("01700000001", "user")) as response:
+                assert response.status == 403, response.status
+            print("✅ /events refused for a user outside the appointment")
+
+            # 3. The stream sends the room status, then every pushed event
+            async with http.get(f"{base}/livekit/events/1", headers=headers("01700000000", "user")) as stream:
+                assert stream.status == 200 and stream.headers["Content-Type"].startswith("text/event-stream")
+                name, data = await next_event(stream)
+                assert name == "room_status" and data["is_active"] is False, (name, data)
+
+                # The server already counts 2 (one join went to another instance): its count wins
+                assert await post_webhook(*webhook("participant_joined", 2, "doctor_1")) == 200
+                name, data = await next_event(stream)
+                assert name == "participant_joined" and data["role"] == "doctor", (name, data)
+                assert data["num_participants"] == 2 and data["participants"] == ["doctor_1"], data
+                cached = await room_status_cache.get(ROOM)
+                assert cached["num_participants"] == 2 and cached["is_active"], cached
+                print("✅ Stream delivered room_status then participant_joined; cache holds the webhook's count (2)")
+
+                # room_started carries no participants and must not clear the count
+                assert await post_webhook(*webhook("room_started", 0)) == 200
+                name, _ = await next_event(stream)
+                assert name == "room_started" and room_status_cache._rooms[ROOM]["num_participants"] == 2
+
+                assert await post_webhook(*webhook("participant_left", 1, "doctor_1")) == 200
+                name, data = await next_event(stream)
+                assert name == "participant_left" and data["num_participants"] == 1, data
+                assert room_status_cache._rooms[ROOM]["num_participants"] == 1
+
+                assert await post_webhook(*webhook("room_finished", 1)) == 200
+                name, data = await next_event(stream)
+                assert name == "room_finished" and data["num_participants"] == 0, data
+                assert ROOM not in room_status_cache._rooms
+                print("✅ room_started kept the count; participant_left and room_finished updated it")
+    finally:
+        server.should_exit = True
+        await serving
+        await fake_runner.cleanup()
+
+    print("\n🎉 All LiveKit webhook checks passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,206 @@
+"""
+Test script for patient notifications
+Seeds a throwaway SQLite database and checks that a pharmacy quotation
+creates a notification for the patient, that a burst of events is written
+with a handful of multi-row INSERTs by the background writer, that the
+?since= feed returns only deltas, that the unread counter stays in step
+with mark-read calls, that SSE subscribers receive pushed rows, and that
+a row the database rejects is dropped without holding up the rest.
+Run this from the backend directory: python scripts/test_notifications.py
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'notifications.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import Base, engine, SessionLocal
+from models import (
+    User, Doctor, Appointment, Prescription, Pharmacy,
+    QuotationRequest, QuotationRequestPharmacy, QuotationStatus
+)
+from auth import create_access_token
+from routers.notifications import router as notifications_router
+from routers.quotations import router as quotations_router
+from services.notifications import notification, notification_service
+
+PATIENTS = 50
+BURST = 2000  # Notifications published at once, spread over the patients
+PATIENT_PHONE = "01700000000"
+PHARMACY_PHONE = "01900000000"
+
+
+def headers(phone, user_type):
+    return {"Authorization": "Bearer " + create_access_token({"sub": phone, "user_type": user_type})}
+
+
+def seed() -> dict:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patients = [User(phone=f"0170{i:07d}", hashed_password="x", name=f"Patient {i}") for i in range(PATIENTS)]
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Test Doctor",
+                    specialization="general", license_number="DOC-1")
+    pharmacy = Pharmacy(phone=PHARMACY_PHONE, hashed_password="x", pharmacy_name="Test Pharmacy",
+                        license_number="PH-1", street_address="Road 1", city="Dhaka",
+                        state="Dhaka", postal_code="1200", country="Bangladesh", is_verified=True)
+    db.add_all(patients + [doctor, pharmacy])
+    db.flush()
+    appointment = Appointment(patient_id=patients[0].id, doctor_id=doctor.id, appointment_date=date.today(),
+                              time_slot="09:00 AM - 10:00 AM")
+    db.add(appointment)
+    db.flush()
+    prescription = Prescription(appointment_id=appointment.id, patient_id=patients[0].id, doctor_id=doctor.id,
+                                prescription_id="CC-1", diagnosis="checkup", medications=[])
+    db.add(prescription)
+    db.flush()
+    request = QuotationRequest(patient_id=patients[0].id, prescription_id=prescription.id,
+                               status=QuotationStatus.PENDING)
+    db.add(request)
+    db.flush()
+    db.add(QuotationRequestPharmacy(quotation_request_id=request.id, pharmacy_id=pharmacy.id))
+    db.commit()
+    ids = {"patients": [patient.id for patient in patients], "request": request.id}
+    db.close()
+    return ids
+
+
+class InsertCounter:
+    def __init__(self):
+        self.inserts = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("INSERT INTO NOTIFICATIONS"):
+            self.inserts += 1
+
+
+async def check_push(patient_id: int):
+    """A row published from a worker thread reaches the subscriber's queue on the loop"""
+    notification_service.start()
+    queue = notification_service.subscribe(patient_id)
+    try:
+        await asyncio.to_thread(
+            notification_service.publish,
+            [notification(patient_id, "Pushed", "Delivered over SSE", category="test")]
+        )
+        events = [await asyncio.wait_for(queue.get(), timeout=5) for _ in range(2)]
+    finally:
+        notification_service.unsubscribe(patient_id, queue)
+        await notification_service.stop()
+    return events
+
+
+def run():
+    ids = seed()
+    patient_ids = ids["patients"]
+    patient = headers(PATIENT_PHONE, "user")
+
+    app = FastAPI()
+    app.include_router(notifications_router)
+    app.include_router(quotations_router)
+    client = TestClient(app)
+
+    # 1. A submitted quotation notifies the patient
+    response = client.post("/api/quotations/respond", headers=headers(PHARMACY_PHONE, "pharmacy"), json={
+        "quotation_request_id": ids["request"],
+        "quoted_items": [{"medicine": "Napa", "quantity": 2, "unit_price": 5, "total_price": 10}],
+        "delivery_charge": 20
+    })
+    assert response.status_code == 201, response.text
+    feed = client.get("/api/notifications", headers=patient).json()
+    assert feed["unread_count"] == 1, feed
+    first = feed["notifications"][0]
+    assert first["category"] == "quotation" and first["data"]["quotation_request_id"] == ids["request"], first
+    print(f"✅ Quotation notification: {first['title']!r} - {first['message']!r}")
+
+    # 2. A burst of events is written with a few multi-row INSERTs
+    counter = InsertCounter()
+
+    async def burst():
+        notification_service.start()
+        started = time.perf_counter()
+        rows = [notification(patient_ids[i % PATIENTS], "Reminder", f"Event {i}", category="test") for i in range(BURST)]
+        for start in range(0, BURST, 100):
+            notification_service.publish(rows[start:start + 100])
+        await notification_service.stop()  # Flushes whatever is still buffered
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(burst())
+    assert counter.inserts <= 10, f"{counter.inserts} INSERT statements for {BURST} notifications"
+    print(f"✅ {BURST} notifications written with {counter.inserts} INSERT statements in {elapsed * 1000:.0f}ms")
+
+    # 3. ?since= returns only what is new, oldest first
+    feed = client.get("/api/notifications", headers=patient, params={"limit": 5}).json()
+    assert feed["unread_count"] == 1 + BURST // PATIENTS, feed["unread_count"]
+    assert feed["has_more"] and len(feed["notifications"]) == 5
+    cursor = feed["cursor"]
+    delta = client.get("/api/notifications", headers=patient, params={"since": cursor}).json()
+    assert delta["notifications"] == [] and delta["cursor"] == cursor, delta
+    older = client.get("/api/notifications", headers=patient,
+                       params={"before": feed["notifications"][-1]["id"], "limit": 200}).json()
+    assert len(older["notifications"]) == 1 + BURST // PATIENTS - 5, len(older["notifications"])
+    print(f"✅ Delta feed: nothing new after cursor {cursor}, older pages reach the first notification")
+
+    # 4. Mark-read keeps the cached counter exact
+    target = feed["notifications"][0]["id"]
+    response = client.patch(f"/api/notifications/{target}", headers=patient, json={"is_read": True})
+    assert response.status_code == 200 and response.json()["is_read"] is True, response.text
+    assert client.get("/api/notifications/unread-count", headers=patient).json()["unread_count"] == BURST // PATIENTS
+    response = client.patch(f"/api/notifications/{target}", headers=patient, json={"is_read": True})
+    assert client.get("/api/notifications/unread-count", headers=patient).json()["unread_count"] == BURST // PATIENTS
+    other = client.get("/api/notifications", headers=headers(f"0170{1:07d}", "user")).json()["notifications"][0]
+    assert client.patch(f"/api/notifications/{other['id']}", headers=patient, json={}).status_code == 404
+    result = client.post("/api/notifications/read-all", headers=patient).json()
+    assert result == {"updated": BURST // PATIENTS, "unread_count": 0}, result
+    print("✅ Unread counter follows single and read-all updates; other patients' rows are 404")
+
+    # 5. Doctors cannot use the patient feed
+    response = client.get("/api/notifications", headers=headers("01800000000", "doctor"))
+    assert response.status_code == 403, response.status_code
+    print("✅ Doctor tokens get 403")
+
+    # 6. SSE subscribers get the row and the new unread count
+    events = asyncio.run(check_push(patient_ids[0]))
+    assert [message["event"] for message in events] == ["notification", "unread_count"], events
+    assert events[0]["data"]["title"] == "Pushed" and events[1]["data"]["unread_count"] == 1, events
+    print("✅ Published notification pushed to the subscriber with the updated unread count")
+
+    # 7. A rejected row is dropped; the rest of its batch and later flushes go through
+    poisoned = [notification(patient_ids[2], "Before", "ok"), notification(patient_ids[2], None, "no title"),
+                notification(patient_ids[2], "After", "ok")]
+    with notification_service._pending_lock:
+        notification_service._pending.extend(poisoned)
+    assert notification_service.flush() == 2 and notification_service._pending == []
+    notification_service.publish([notification(patient_ids[2], "Later", "ok")])
+    titles = [n["title"] for n in client.get("/api/notifications", headers=headers(f"0170{2:07d}", "user"),
+                                             params={"limit": 3}).json()["notifications"]]
+    assert titles == ["Later", "After", "Before"], titles
+    print("✅ Rejected row dropped, the rest of its batch and the next flush written")
+
+    # 8. The buffer is capped, oldest rows dropped first
+    notification_service.max_pending = 3
+    with notification_service._pending_lock:
+        notification_service._pending.extend(notification(patient_ids[3], f"Old {i}", "x") for i in range(4))
+        notification_service._trim_pending()
+        kept = [row["title"] for row in notification_service._pending]
+    notification_service.max_pending = 50000
+    assert kept == ["Old 1", "Old 2", "Old 3"], kept
+    notification_service.flush()
+    print("✅ Buffer capped at max_pending, oldest rows dropped")
+
+    print("\n🎉 All notification checks passed")
+
+
+if __name__ == "__main__":
+    run()
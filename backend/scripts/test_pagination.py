@@ -0,0 +1,128 @@
+"""
+Test script for the admin list pagination helpers
+Seeds a throwaway SQLite database with users whose created_at values
+repeat and include legacy NULLs, then checks that walking fetch_page
+cursors returns every row exactly once in (created_at DESC NULLS LAST,
+id DESC) order, that newer_than_cursor returns exactly the rows before a
+cursor, that malformed or tampered cursors raise InvalidCursorError, and
+the total and is_estimate flag of each count_total mode.
+Run this from the backend directory: python scripts/test_pagination.py
+"""
+import sys
+import os
+import base64
+import json
+import tempfile
+from datetime import datetime, timedelta
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'pagination.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import update
+
+from database import Base, engine, SessionLocal
+from models import User
+from services.pagination import (
+    InvalidCursorError, count_total, decode_cursor, encode_cursor, fetch_page, invalidate_counts,
+    newer_than_cursor
+)
+
+ROWS = 30
+LEGACY = 7  # Rows without created_at
+PAGE_SIZE = 4
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    base = datetime(2026, 1, 1, 12, 0)
+    # Three rows share each timestamp, so pages must break ties on id
+    db.add_all([
+        User(phone=f"0170{i:07d}", hashed_password="x", name=f"Patient {i}",
+             created_at=base + timedelta(minutes=i // 3))
+        for i in range(ROWS)
+    ])
+    db.commit()
+    # created_at has a server default; legacy NULLs have to be written explicitly
+    legacy = [1, 4, 5, 11, 17, 22, 29]
+    db.execute(update(User).where(User.phone.in_([f"0170{i:07d}" for i in legacy])).values(created_at=None))
+    db.commit()
+    db.close()
+
+
+def expected_order(db):
+    users = db.query(User).all()
+    dated = sorted((u for u in users if u.created_at is not None), key=lambda u: (u.created_at, u.id), reverse=True)
+    legacy = sorted((u.id for u in users if u.created_at is None), reverse=True)
+    return [u.id for u in dated] + legacy
+
+
+def walk(db):
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = fetch_page(db.query(User), User, PAGE_SIZE, cursor=cursor)
+        ids.extend(row.id for row in rows)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+def run():
+    seed()
+    db = SessionLocal()
+    try:
+        # 1. Cursor walk over ties and NULLs: every row once, in order
+        expected = expected_order(db)
+        assert db.query(User).filter(User.created_at.is_(None)).count() == LEGACY
+        ids, pages = walk(db)
+        assert ids == expected, (ids, expected)
+        offset_ids = [row.id for row in fetch_page(db.query(User), User, ROWS + 1)[0]]
+        assert offset_ids == expected, offset_ids
+        print(f"✅ {pages} keyset pages of {PAGE_SIZE} returned all {ROWS} rows once "
+              f"({LEGACY} without created_at last), same order as offset paging")
+
+        # 2. ?since= polling: everything newer than a cursor, nothing else
+        for position in (0, 5, ROWS - LEGACY - 1, ROWS - LEGACY, ROWS - 2):
+            row = db.get(User, expected[position])
+            cursor = encode_cursor(row.created_at, row.id)
+            newer = {user.id for user in newer_than_cursor(db.query(User), User, cursor)}
+            assert newer == set(expected[:position]), (position, newer)
+        print("✅ newer_than_cursor returned exactly the rows ahead of dated and NULL cursors")
+
+        # 3. Malformed and tampered cursors
+        good = encode_cursor(datetime(2026, 1, 1), 5)
+        tampered = base64.urlsafe_b64encode(json.dumps(["not a date", 5]).encode()).decode().rstrip("=")
+        for bad in ("not-a-cursor", good[:-3], tampered,
+                    base64.urlsafe_b64encode(b'{"a": 1}').decode(), good.replace(good[2], "!", 1)):
+            try:
+                fetch_page(db.query(User), User, PAGE_SIZE, cursor=bad)
+            except InvalidCursorError:
+                continue
+            raise AssertionError(f"cursor {bad!r} accepted")
+        assert decode_cursor(good) == (datetime(2026, 1, 1), 5)
+        print("✅ Malformed and tampered cursors raise InvalidCursorError")
+
+        # 4. count_total modes and their is_estimate flags
+        query = db.query(User).filter(User.name.like("Patient%"))
+        assert count_total(db, query, "exact") == (ROWS, False)
+        assert count_total(db, query, "none") == (None, False)
+        assert count_total(db, query, "cached") == (ROWS, False)  # Miss: counted now
+        db.add(User(phone="01799999999", hashed_password="x", name="Patient late"))
+        db.commit()
+        assert count_total(db, query, "cached") == (ROWS, False)  # Hit: exact, up to the TTL old
+        assert count_total(db, query, "exact") == (ROWS + 1, False)
+        # No planner estimate on SQLite: estimate falls back to the cached count
+        assert count_total(db, query, "estimate") == (ROWS, False)
+        invalidate_counts()
+        assert count_total(db, query, "cached") == (ROWS + 1, False)
+        print("✅ count_total: exact, cached (miss and hit), estimate fallback and none report the right flags")
+    finally:
+        db.close()
+
+    print("\n🎉 All pagination checks passed")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,175 @@
+"""
+Test script for quotation line items and the medicine price index
+Seeds a throwaway SQLite database, submits quotes from several pharmacies
+through POST /api/quotations/respond and checks that line items are
+written next to the JSON, that the index keeps each pharmacy's latest
+price with the right min/median/max, that the patient comparison and the
+pharmacy benchmark endpoints read it, and that the incrementally
+maintained index matches a full rebuild (which skips drafts).
+Run this from the backend directory: python scripts/test_price_index.py
+"""
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'prices.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from database import Base, engine, SessionLocal
+from models import (
+    User, Doctor, Appointment, Prescription, Pharmacy,
+    QuotationRequest, QuotationRequestPharmacy, QuotationResponse, QuotationStatus,
+    QuotationLineItem, MedicinePriceIndex
+)
+from auth import create_access_token
+from routers.quotations import router as quotations_router
+from services import price_index
+
+PHARMACIES = 5
+REQUESTS = 40
+MEDICINES = ["Napa 500mg", "Seclo 20mg", "Alatrol 10mg", "Fexo 120mg", "Monas 10mg", "Ace Plus"]
+PATIENT_PHONE = "01700000000"
+
+
+def pharmacy_phone(i):
+    return f"0190000000{i}"
+
+
+def headers(phone, user_type):
+    return {"Authorization": "Bearer " + create_access_token({"sub": phone, "user_type": user_type})}
+
+
+def seed() -> list:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patient = User(phone=PATIENT_PHONE, hashed_password="x", name="Patient")
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Doctor",
+                    specialization="general", license_number="DOC-1")
+    pharmacies = [
+        Pharmacy(phone=pharmacy_phone(i), hashed_password="x", pharmacy_name=f"Pharmacy {i}",
+                 license_number=f"PH-{i}", street_address="Road 1", city="Dhaka",
+                 state="Dhaka", postal_code="1200", country="Bangladesh", is_verified=True)
+        for i in range(PHARMACIES)
+    ]
+    db.add_all([patient, doctor] + pharmacies)
+    db.flush()
+    appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=date.today(),
+                              time_slot="09:00 AM - 10:00 AM")
+    db.add(appointment)
+    db.flush()
+    prescription = Prescription(appointment_id=appointment.id, patient_id=patient.id, doctor_id=doctor.id,
+                                prescription_id="CC-1", diagnosis="checkup", medications=[])
+    db.add(prescription)
+    db.flush()
+    request_ids = []
+    for _ in range(REQUESTS):
+        request = QuotationRequest(patient_id=patient.id, prescription_id=prescription.id,
+                                   status=QuotationStatus.PENDING)
+        db.add(request)
+        db.flush()
+        db.add_all([QuotationRequestPharmacy(quotation_request_id=request.id, pharmacy_id=pharmacy.id)
+                    for pharmacy in pharmacies])
+        request_ids.append(request.id)
+    db.commit()
+    db.close()
+    return request_ids
+
+
+def quote(client, request_id, pharmacy, prices):
+    items = [
+        {"medicine": name, "quantity": 2, "unit_price": price, "total_price": round(2 * price, 2)}
+        for name, price in prices.items()
+    ]
+    response = client.post("/api/quotations/respond", headers=headers(pharmacy_phone(pharmacy), "pharmacy"),
+                           json={"quotation_request_id": request_id, "quoted_items": items})
+    assert response.status_code == 201, response.text
+    return response.json()["response_id"]
+
+
+def index_snapshot():
+    db = SessionLocal()
+    try:
+        return {
+            entry.medicine_key: (entry.pharmacy_count, entry.min_price, entry.median_price, entry.max_price)
+            for entry in db.execute(select(MedicinePriceIndex)).scalars()
+        }
+    finally:
+        db.close()
+
+
+def run():
+    request_ids = seed()
+    app = FastAPI()
+    app.include_router(quotations_router)
+    client = TestClient(app)
+
+    # 1. First request: known prices, messy spelling of the same medicine
+    first = request_ids[0]
+    for pharmacy, price in enumerate([10, 12, 8, 15, 11]):
+        name = "Napa 500mg" if pharmacy % 2 == 0 else "  napa   500MG "
+        quote(client, first, pharmacy, {name: price, "Seclo 20mg": 5 + pharmacy})
+    comparison = client.get(f"/api/quotations/request/{first}/price-comparison", headers=headers(PATIENT_PHONE, "user")).json()
+    napa = next(medicine for medicine in comparison if medicine["medicine_key"] == "napa 500mg")
+    assert [q["unit_price"] for q in napa["quotes"]] == [8, 10, 11, 12, 15], napa["quotes"]
+    assert napa["market"] == {"pharmacy_count": 5, "min_price": 8.0, "median_price": 11.0, "max_price": 15.0}, napa["market"]
+    print(f"✅ Comparison: napa cheapest at pharmacy {napa['cheapest_pharmacy_id']}, market {napa['market']}")
+
+    # 2. A newer quote replaces that pharmacy's price in the index
+    quote(client, request_ids[1], 3, {"Napa 500mg": 9})
+    benchmark = client.get("/api/quotations/market-prices", headers=headers(pharmacy_phone(3), "pharmacy"),
+                           params={"medicine": ["NAPA 500mg", "Unknown Syrup"]}).json()
+    assert benchmark[0]["market"] == {"pharmacy_count": 5, "min_price": 8.0, "median_price": 10.0, "max_price": 12.0}, benchmark
+    assert benchmark[0]["your_latest_price"] == 9.0 and benchmark[0]["your_price_vs_median"] == 0.9, benchmark
+    assert benchmark[1]["market"] is None and benchmark[1]["your_latest_price"] is None, benchmark
+    print(f"✅ Benchmark after re-quote: market {benchmark[0]['market']}, own price 9.0 (0.9x median)")
+
+    # 3. Line items mirror the JSON; the responses endpoint reads them
+    responses = client.get(f"/api/quotations/request/{first}/responses", headers=headers(PATIENT_PHONE, "user")).json()
+    assert all(len(resp["quoted_items"]) == 2 for resp in responses), responses
+    assert responses[0]["quoted_items"][0]["medicine_name"].strip(), responses[0]
+    print(f"✅ {len(responses)} responses served from quotation_line_items")
+
+    # 4. Many quotes later, the incremental index equals a full rebuild
+    rng = random.Random(7)
+    started = time.perf_counter()
+    submitted = 0
+    for request_id in request_ids[2:]:
+        for pharmacy in range(PHARMACIES):
+            prices = {name: round(rng.uniform(2, 50), 2) for name in rng.sample(MEDICINES, 3)}
+            quote(client, request_id, pharmacy, prices)
+            submitted += 1
+    elapsed = time.perf_counter() - started
+    incremental = index_snapshot()
+
+    db = SessionLocal()
+    # An unpublished draft (auto quote awaiting review) must stay out of the rebuilt index
+    db.add(QuotationResponse(quotation_request_id=request_ids[0], pharmacy_id=db.query(Pharmacy.id).first()[0],
+                             quoted_items=[{"medicine": "Napa 500mg", "quantity": 1, "unit_price": 0.01,
+                                            "total_price": 0.01}],
+                             subtotal=0.01, delivery_charge=0, total_amount=0.01, status=QuotationStatus.DRAFT))
+    db.flush()
+    counts = price_index.rebuild(db)
+    db.commit()
+    line_items = db.query(QuotationLineItem).count()
+    db.close()
+    rebuilt = index_snapshot()
+    assert incremental == rebuilt, {key: (incremental.get(key), rebuilt.get(key)) for key in rebuilt}
+    assert counts["line_items"] == line_items, counts
+    print(f"✅ {submitted} quotes in {elapsed:.2f}s ({elapsed / submitted * 1000:.1f}ms each); "
+          f"index over {len(rebuilt)} medicines matches a full rebuild of {line_items} line items (draft skipped)")
+
+    print("\n🎉 All price index checks passed")
+
+
+if __name__ == "__main__":
+    run()
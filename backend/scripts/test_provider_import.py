@@ -0,0 +1,127 @@
+"""
+Test script for the CSV provider importer
+Seeds a throwaway SQLite database and checks row-level error reporting,
+dry runs, password hashing in the worker pool, and the time to load
+20,000 doctors (pre-hashed, so the staging and insert path is measured).
+Run this from the backend directory: python scripts/test_provider_import.py
+"""
+import sys
+import os
+import csv
+import io
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'import.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from database import Base, engine, SessionLocal
+from models import Admin, Doctor, Pharmacy
+from auth import create_access_token, get_password_hash, verify_password
+from routers.admin import router as admin_router
+from services.provider_import import provider_importer
+
+HEADERS = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "user_type": "admin"})}
+BULK_ROWS = 20_000
+
+
+def to_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def upload(client, kind, content, **params):
+    return client.post(f"/api/admin/import/{kind}", params=params, headers=HEADERS,
+                       files={"file": ("providers.csv", content, "text/csv")})
+
+
+def run():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Admin(username="admin", hashed_password="x", full_name="Admin", email="admin@example.com"))
+    db.add(Doctor(phone="01899999999", hashed_password="x", full_name="Existing Doctor",
+                  specialization="general", license_number="EXISTING-1"))
+    db.commit()
+
+    client = TestClient(FastAPI())
+    client.app.include_router(admin_router)
+    header = ["phone", "full_name", "specialization", "license_number", "password"]
+
+    # 1. Row-level errors: schema, duplicate in file, collision with an existing doctor
+    content = to_csv(header, [
+        ["01800000001", "Dr One", "cardiology", "LIC-1", "secret1"],
+        ["01800000002", "Dr Two", "neurology", "LIC-2", "secret2"],
+        ["0180", "Dr Short", "general", "LIC-3", "secret3"],            # phone too short
+        ["01800000001", "Dr Again", "general", "LIC-4", "secret4"],      # duplicate phone in file
+        ["01800000005", "Dr Taken", "general", "EXISTING-1", "secret5"],  # license already registered
+        ["01800000006", "", "general", "LIC-6", "secret6"],              # missing name
+    ])
+    dry = upload(client, "doctors", content, dry_run="true").json()
+    assert dry["imported"] == 0 and dry["valid_rows"] == 2, dry
+    assert SessionLocal().query(func.count(Doctor.id)).scalar() == 1
+    print("✅ Dry run validates without inserting")
+
+    body = upload(client, "doctors", content).json()
+    assert body["total_rows"] == 6 and body["imported"] == 2 and body["failed"] == 4, body
+    errors = {error["row"]: error for error in body["errors"]}
+    assert errors[4]["field"] == "phone"
+    assert "first seen on row 2" in errors[5]["message"]
+    assert errors[6] == {"row": 6, "field": "license_number", "message": "license_number already registered"}
+    assert errors[7]["field"] == "full_name"
+    print("✅ Row errors reported by CSV line:", sorted(errors))
+
+    doctor = SessionLocal().query(Doctor).filter(Doctor.phone == "01800000001").one()
+    assert verify_password("secret1", doctor.hashed_password) and doctor.is_verified is False
+    print(f"✅ Passwords hashed in the pool ({body['timings_seconds']['hash']}s for 2 rows)")
+
+    # 2. Re-importing the same file creates nothing new
+    again = upload(client, "doctors", content).json()
+    assert again["imported"] == 0 and again["failed"] == 6
+    print("✅ Re-import rejects every existing provider")
+
+    # 3. Pharmacies: schema defaults apply and verified=true stamps the admin
+    pharmacy_header = ["phone", "pharmacy_name", "license_number", "street_address", "city", "state",
+                       "postal_code", "email", "password"]
+    body = upload(client, "pharmacies", to_csv(pharmacy_header, [
+        ["01900000001", "Green Pharmacy", "PH-001", "House 1, Road 2", "Dhaka", "Dhaka", "1207", "green@example.com", "secret1"],
+        ["01900000002", "Blue Pharmacy", "PH-002", "House 3, Road 4", "Dhaka", "Dhaka", "1207", "green@example.com", "secret2"],
+    ]), verified="true").json()
+    assert body["imported"] == 1 and body["errors"][0]["field"] == "email", body
+    pharmacy = SessionLocal().query(Pharmacy).one()
+    assert pharmacy.country == "Bangladesh" and pharmacy.is_verified and pharmacy.verified_by == 1
+    print("✅ Pharmacy import applies defaults and records the verifying admin")
+
+    # 4. Bad files
+    assert upload(client, "nurses", content).status_code == 404
+    assert upload(client, "doctors", b"name,city\nx,y\n").status_code == 400
+    assert upload(client, "doctors", b"\xff\xfe\x00bad").status_code == 400
+    print("✅ Unknown kinds, missing columns and non-UTF-8 files are rejected")
+
+    # 5. Tens of thousands of rows
+    hashed = get_password_hash("bulk-secret")
+    bulk = to_csv(
+        ["phone", "full_name", "specialization", "license_number", "hashed_password"],
+        [[f"017{i:08d}", f"Doctor {i}", "general", f"BULK-{i}", hashed] for i in range(BULK_ROWS)]
+    )
+    start = time.perf_counter()
+    body = upload(client, "doctors", bulk).json()
+    elapsed = time.perf_counter() - start
+    assert body["imported"] == BULK_ROWS and body["failed"] == 0, {k: body[k] for k in ("imported", "failed")}
+    print(f"✅ {BULK_ROWS:,} doctors imported in {elapsed:.2f}s (steps: {body['timings_seconds']})")
+
+    provider_importer.shutdown()
+    print("\n🎉 All provider import checks passed!")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,198 @@
+"""
+Concurrency test for quotation acceptance
+Seeds a throwaway SQLite database with pharmacy and lab quotation requests
+that each have several quotes, then has two devices of the same patient
+accept different quotes of one request at the same moment. Exactly one
+acceptance must win (200) and the other must get 409, leaving one accepted
+quote per request and every other pharmacy quote rejected.
+
+Both requests are held just before their first UPDATE so they always
+overlap. On SQLite the status-guarded UPDATEs decide the winner; on
+Postgres the SELECT ... FOR UPDATE makes the loser wait and then see the
+accepted request. Point DATABASE_URL at a scratch Postgres database to
+exercise the row lock as well.
+Run this from the backend directory: python scripts/test_quotation_acceptance.py
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp_dir, 'acceptance.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import Base, engine, SessionLocal
+from models import (
+    User, Doctor, Appointment, Prescription, Pharmacy, Clinic,
+    QuotationRequest, QuotationResponse, QuotationStatus,
+    LabTestQuotationRequest, LabTestQuotationResponse
+)
+from auth import create_access_token
+from routers.quotations import router as quotations_router
+from routers.lab_quotations import router as lab_quotations_router
+
+ROUNDS = 20
+QUOTES = 3
+PATIENT_PHONE = "01700000000"
+HOLD_SECONDS = 0.05  # Delay before the first UPDATE so the two acceptances overlap
+
+
+def headers(phone):
+    return {"Authorization": "Bearer " + create_access_token({"sub": phone, "user_type": "user"})}
+
+
+def seed() -> dict:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patient = User(phone=PATIENT_PHONE, hashed_password="x", name="Patient")
+    other = User(phone="01711111111", hashed_password="x", name="Other Patient")
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Doctor",
+                    specialization="general", license_number="DOC-1")
+    pharmacies = [
+        Pharmacy(phone=f"0190000000{i}", hashed_password="x", pharmacy_name=f"Pharmacy {i}",
+                 license_number=f"PH-{i}", street_address="Road 1", city="Dhaka",
+                 state="Dhaka", postal_code="1200", country="Bangladesh", is_verified=True)
+        for i in range(QUOTES)
+    ]
+    clinics = [
+        Clinic(phone=f"0150000000{i}", hashed_password="x", clinic_name=f"Clinic {i}",
+               license_number=f"CL-{i}", address="Road 2, Dhaka")
+        for i in range(QUOTES)
+    ]
+    db.add_all([patient, other, doctor] + pharmacies + clinics)
+    db.flush()
+    appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=date.today(),
+                              time_slot="09:00 AM - 10:00 AM")
+    db.add(appointment)
+    db.flush()
+    prescription = Prescription(appointment_id=appointment.id, patient_id=patient.id, doctor_id=doctor.id,
+                                prescription_id="CC-1", diagnosis="checkup", medications=[], lab_tests=["CBC"])
+    db.add(prescription)
+    db.flush()
+
+    pharmacy_rounds, lab_rounds = [], []
+    for _ in range(ROUNDS):
+        request = QuotationRequest(patient_id=patient.id, prescription_id=prescription.id,
+                                   status=QuotationStatus.QUOTED)
+        lab_request = LabTestQuotationRequest(patient_id=patient.id, prescription_id=prescription.id,
+                                              lab_tests=["CBC"], status="pending")
+        db.add_all([request, lab_request])
+        db.flush()
+        quotes = [
+            QuotationResponse(quotation_request_id=request.id, pharmacy_id=pharmacy.id, quoted_items=[],
+                              subtotal=100 + i, delivery_charge=0, total_amount=100 + i,
+                              status=QuotationStatus.QUOTED)
+            for i, pharmacy in enumerate(pharmacies)
+        ]
+        lab_quotes = [
+            LabTestQuotationResponse(quotation_request_id=lab_request.id, clinic_id=clinic.id,
+                                     test_items=[{"test_name": "CBC", "price": 500 + i}], total_amount=500 + i)
+            for i, clinic in enumerate(clinics)
+        ]
+        db.add_all(quotes + lab_quotes)
+        db.flush()
+        pharmacy_rounds.append((request.id, [quote.id for quote in quotes]))
+        lab_rounds.append((lab_request.id, [quote.id for quote in lab_quotes]))
+    db.commit()
+    db.close()
+    return {"pharmacy": pharmacy_rounds, "lab": lab_rounds}
+
+
+def hold_before_first_update():
+    """Sleep before each request-row UPDATE so both devices have passed their checks"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _hold(conn, cursor, statement, *args):
+        head = statement.lstrip().upper()
+        if head.startswith("UPDATE QUOTATION_REQUESTS") or head.startswith("UPDATE LAB_TEST_QUOTATION_REQUESTS"):
+            time.sleep(HOLD_SECONDS)
+
+
+def race(client, urls):
+    """PUT every url at the same moment from its own thread; returns the responses"""
+    barrier = threading.Barrier(len(urls))
+
+    def accept(url):
+        barrier.wait()
+        return client.put(url, headers=headers(PATIENT_PHONE))
+
+    with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+        return list(pool.map(accept, urls))
+
+
+def check_pharmacy_state(request_id, quote_ids):
+    db = SessionLocal()
+    try:
+        request = db.get(QuotationRequest, request_id)
+        statuses = [db.get(QuotationResponse, quote_id).status for quote_id in quote_ids]
+        assert request.status == QuotationStatus.ACCEPTED, request.status
+        assert statuses.count(QuotationStatus.ACCEPTED) == 1, statuses
+        assert statuses.count(QuotationStatus.REJECTED) == len(quote_ids) - 1, statuses
+    finally:
+        db.close()
+
+
+def check_lab_state(request_id, quote_ids):
+    db = SessionLocal()
+    try:
+        request = db.get(LabTestQuotationRequest, request_id)
+        accepted = [db.get(LabTestQuotationResponse, quote_id).is_accepted for quote_id in quote_ids]
+        assert request.status == "accepted", request.status
+        assert accepted.count(True) == 1, accepted
+    finally:
+        db.close()
+
+
+def run():
+    rounds = seed()
+    app = FastAPI()
+    app.include_router(quotations_router)
+    app.include_router(lab_quotations_router)
+    client = TestClient(app)
+
+    # 1. Plain checks: ownership, unknown ids, final state in the response body
+    request_id, quote_ids = rounds["pharmacy"][0]
+    assert client.put(f"/api/quotations/{quote_ids[0]}/accept", headers=headers("01711111111")).status_code == 403
+    assert client.put("/api/quotations/999999/accept", headers=headers(PATIENT_PHONE)).status_code == 404
+    body = client.put(f"/api/quotations/{quote_ids[0]}/accept", headers=headers(PATIENT_PHONE)).json()
+    assert body["status"] == "accepted" and body["request_status"] == "accepted", body
+    assert body["rejected_quotation_ids"] == quote_ids[1:], body
+    assert client.put(f"/api/quotations/{quote_ids[1]}/accept", headers=headers(PATIENT_PHONE)).status_code == 409
+    check_pharmacy_state(request_id, quote_ids)
+    print(f"✅ Accept returns final state: {body['quotation_id']} accepted, {body['rejected_quotation_ids']} rejected")
+
+    # 2. Two devices accept different pharmacy quotes of the same request at once
+    hold_before_first_update()
+    outcomes = {}
+    for request_id, quote_ids in rounds["pharmacy"][1:]:
+        responses = race(client, [f"/api/quotations/{quote_ids[0]}/accept", f"/api/quotations/{quote_ids[1]}/accept"])
+        codes = sorted(response.status_code for response in responses)
+        outcomes[tuple(codes)] = outcomes.get(tuple(codes), 0) + 1
+        assert codes == [200, 409], [response.text for response in responses]
+        check_pharmacy_state(request_id, quote_ids)
+    print(f"✅ Pharmacy quotes: {ROUNDS - 1} concurrent rounds, outcomes {outcomes}, one accepted quote each")
+
+    # 3. Same race for lab quotations
+    outcomes = {}
+    for request_id, quote_ids in rounds["lab"]:
+        responses = race(client, [f"/api/lab-quotations/accept/{quote_ids[0]}", f"/api/lab-quotations/accept/{quote_ids[1]}"])
+        codes = sorted(response.status_code for response in responses)
+        outcomes[tuple(codes)] = outcomes.get(tuple(codes), 0) + 1
+        assert codes == [200, 409], [response.text for response in responses]
+        check_lab_state(request_id, quote_ids)
+    print(f"✅ Lab quotes: {ROUNDS} concurrent rounds, outcomes {outcomes}, one accepted quote each")
+
+    print("\n🎉 All quotation acceptance checks passed")
+
+
+if __name__ == "__main__":
+    run()
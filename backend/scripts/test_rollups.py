@@ -0,0 +1,173 @@
+"""
+Test script for the daily analytics rollups
+Seeds a throwaway SQLite database with rows on a few days in a non-UTC
+timezone and checks that the first run rolls up every day with data (on
+local day boundaries), that later runs rebuild only the days touched
+since the watermark, including a row whose status changed, that a run
+started while another is in progress exits without work, that
+read_rollups zero-fills days without rows, and that the weekly dashboard
+counts today live rather than from the lagging rollups.
+Run this from the backend directory: python scripts/test_rollups.py
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'rollups.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+os.environ["ANALYTICS_DEFAULT_TIMEZONE"] = "Asia/Dhaka"  # UTC+6: local days differ from UTC days
+os.environ["ROLLUP_SAFETY_LAG_SECONDS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import Base, engine, SessionLocal
+from models import Admin, User, Doctor, Appointment, AppointmentStatus, AIConsultation
+from auth import create_access_token
+from routers.admin import router as admin_router
+from services.rollups import read_rollups, rollup_job
+
+HEADERS = {"Authorization": "Bearer " + create_access_token({"sub": "admin", "user_type": "admin"})}
+TODAY = datetime.now(rollup_job.zone).date()
+
+
+def local_time(days_ago: int, hour: int) -> datetime:
+    """Naive UTC timestamp for `hour` o'clock local time, `days_ago` local days back"""
+    local = datetime.combine(TODAY - timedelta(days=days_ago), dt_time(hour)).replace(tzinfo=rollup_job.zone)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def seed() -> dict:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    patient = User(phone="01700000000", hashed_password="x", name="Patient")
+    doctor = Doctor(phone="01800000000", hashed_password="x", full_name="Doctor",
+                    specialization="general", license_number="DOC-1")
+    db.add_all([patient, doctor, Admin(username="admin", hashed_password="x", full_name="Admin",
+                                       email="admin@example.com")])
+    db.flush()
+    ids = {"patient": patient.id, "doctor": doctor.id}
+
+    def appointment(created_at=None):
+        row = Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=TODAY,
+                          time_slot="09:00 AM - 10:00 AM", created_at=created_at)
+        db.add(row)
+        return row
+
+    appointment(local_time(5, 10))
+    # 02:00 local is still the previous day in UTC: it belongs to local day -3
+    late = appointment(local_time(3, 2))
+    appointment(local_time(1, 12))
+    db.add(AIConsultation(user_id=patient.id, message="headache", created_at=local_time(3, 9)))
+    db.commit()
+    ids["late"] = late.id
+    db.close()
+    return ids
+
+
+def new_appointment(ids):
+    """Appointment created now (server default timestamp, like the app's inserts)"""
+    db = SessionLocal()
+    db.add(Appointment(patient_id=ids["patient"], doctor_id=ids["doctor"], appointment_date=TODAY,
+                       time_slot="10:00 AM - 11:00 AM"))
+    db.commit()
+    db.close()
+
+
+def rollups(start_days_ago: int, status: str = "status") -> dict:
+    db = SessionLocal()
+    try:
+        return read_rollups(db, TODAY - timedelta(days=start_days_ago), TODAY, status)
+    finally:
+        db.close()
+
+
+def wait_past_watermark():
+    # SQLite's CURRENT_TIMESTAMP has second resolution
+    time.sleep(1.1)
+
+
+def run():
+    ids = seed()
+
+    # 1. The first run rolls up every day with data; missing days read as zeros
+    result = rollup_job.run_once()
+    assert result["days_rebuilt"] == {"appointments": 3, "consultations": 1,
+                                      "quotations_pharmacy": 0, "quotations_lab": 0}, result
+    week = rollups(6)
+    assert week["days"][0] == (TODAY - timedelta(days=6)).isoformat() and len(week["days"]) == 7, week["days"]
+    assert week["appointments"]["total"] == [0, 1, 0, 1, 0, 1, 0], week["appointments"]
+    assert week["consultations"] == [0, 0, 0, 1, 0, 0, 0], week["consultations"]
+    assert week["quotations"] == {}, week["quotations"]
+    print(f"✅ First run rebuilt {result['days_rebuilt']['appointments']} appointment days on local boundaries; "
+          "read_rollups zero-filled the other 4 days")
+
+    # 2. Only days touched since the watermark are rebuilt
+    wait_past_watermark()
+    new_appointment(ids)
+    result = rollup_job.run_once()
+    assert result["days_rebuilt"]["appointments"] == 1 and result["days_rebuilt"]["consultations"] == 0, result
+    assert rollups(6)["appointments"]["total"] == [0, 1, 0, 1, 0, 1, 1]
+    assert rollup_job.run_once()["days_rebuilt"]["appointments"] == 0
+    print("✅ Second run rebuilt only today; a run with no changes rebuilt nothing")
+
+    # 3. A row updated after a run is picked up by the next one
+    wait_past_watermark()
+    db = SessionLocal()
+    db.get(Appointment, ids["late"]).status = AppointmentStatus.CONFIRMED  # onupdate stamps updated_at
+    db.commit()
+    db.close()
+    result = rollup_job.run_once()
+    assert result["days_rebuilt"]["appointments"] == 1, result
+    series = rollups(6)["appointments"]["series"]
+    assert series["confirmed"] == [0, 0, 0, 1, 0, 0, 0] and series["pending"] == [0, 1, 0, 0, 0, 1, 1], series
+    print("✅ Status change after a run moved the row from pending to confirmed on its day")
+
+    # 4. A run started while another is in progress exits without work
+    entered, release = threading.Event(), threading.Event()
+    original = rollup_job.run_rollup
+
+    def slow_rollup(db, rollup, started_at):
+        entered.set()
+        release.wait(5)
+        return original(db, rollup, started_at)
+
+    results = []
+    rollup_job.run_rollup = slow_rollup
+    first = threading.Thread(target=lambda: results.append(rollup_job.run_once()))
+    first.start()
+    assert entered.wait(5)
+    del rollup_job.run_rollup
+    second = rollup_job.run_once()
+    release.set()
+    first.join()
+    assert "skipped" in second and "days_rebuilt" not in second, second
+    assert "days_rebuilt" in results[0], results
+    print(f"✅ Concurrent run skipped ({second['skipped']}); the first run finished normally")
+
+    # 5. The weekly dashboard reads today live; closed days come from the rollups
+    new_appointment(ids)
+    app = FastAPI()
+    app.include_router(admin_router)
+    client = TestClient(app)
+    response = client.get("/api/admin/dashboard/daily-stats", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    by_date = {day["date"]: day for day in response.json()["daily_data"]}
+    assert by_date[TODAY.isoformat()]["appointments"] == 2, by_date[TODAY.isoformat()]
+    assert rollups(0)["appointments"]["total"] == [1]  # Not rolled up yet
+    yesterday = (TODAY - timedelta(days=1)).isoformat()
+    if yesterday in by_date:
+        assert by_date[yesterday]["appointments"] == 1, by_date[yesterday]
+    print("✅ Daily stats count today's 2 appointments live while the rollup still has 1")
+
+    print("\n🎉 All rollup checks passed")
+
+
+if __name__ == "__main__":
+    run()
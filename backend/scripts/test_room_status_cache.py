@@ -0,0 +1,87 @@
+"""
+Test script for the shared LiveKit room-status cache
+Runs a local fake LiveKit twirp server and checks that many concurrent
+room-status reads cost a single ListRooms call.
+Run this from the backend directory: python scripts/test_room_status_cache.py
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from services.livekit_service import LiveKitService, RoomStatusCache
+
+
+class FakeLiveKit:
+    """Minimal stand-in for livekit.RoomService/ListRooms"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rooms = [
+            {"name": "appointment_1_consultation", "num_participants": 1, "num_publishers": 1},
+            {"name": "appointment_2_consultation", "num_participants": 2, "num_publishers": 2},
+        ]
+
+    async def list_rooms(self, request):
+        self.calls += 1
+        assert request.headers.get("Authorization", "").startswith("Bearer ")
+        await asyncio.sleep(0.05)  # simulate network latency
+        return web.json_response({"rooms": self.rooms})
+
+
+async def run():
+    fake = FakeLiveKit()
+    app = web.Application()
+    app.router.add_post("/twirp/livekit.RoomService/ListRooms", fake.list_rooms)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    service = LiveKitService()
+    service.livekit_url = f"ws://127.0.0.1:{port}"
+    cache = RoomStatusCache(service, interval=0.2, max_age=1.0)
+
+    try:
+        # 1. 50 concurrent waiters -> one ListRooms call
+        results = await asyncio.gather(*[
+            cache.get("appointment_1_consultation") for _ in range(50)
+        ])
+        assert all(r["num_participants"] == 1 for r in results), results[0]
+        assert fake.calls == 1, f"expected 1 ListRooms call, got {fake.calls}"
+        print(f"✅ 50 concurrent reads -> {fake.calls} ListRooms call")
+
+        # 2. Unknown room is reported inactive from the same snapshot
+        missing = await cache.get("appointment_999_consultation")
+        assert missing["is_active"] is False
+        assert fake.calls == 1
+        print("✅ Unknown room served from snapshot as inactive")
+
+        # 3. Background poller picks up changes within the freshness bound
+        cache.start()
+        fake.rooms[0]["num_participants"] = 2
+        await asyncio.sleep(0.5)
+        updated = await cache.get("appointment_1_consultation")
+        assert updated["num_participants"] == 2, updated
+        assert updated["age_seconds"] <= cache.max_age
+        print(f"✅ Poller refreshed snapshot (age {updated['age_seconds']}s, {fake.calls} calls total)")
+
+        # 4. Stale snapshot is refreshed inline when the poller is stopped
+        await cache.stop()
+        calls_before = fake.calls
+        cache._refreshed_at -= cache.max_age + 1
+        await cache.get("appointment_1_consultation")
+        assert fake.calls == calls_before + 1
+        print("✅ Stale snapshot refreshed on read")
+    finally:
+        await cache.stop()
+        await runner.cleanup()
+
+    print("\nAll room-status cache checks passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
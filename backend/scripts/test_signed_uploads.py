@@ -0,0 +1,70 @@
+"""
+Test script for signed /uploads links
+Serves a temporary uploads directory through the uploads router and checks
+signature enforcement, Range responses and the X-Accel-Redirect hand-off.
+Run this from the backend directory: python scripts/test_signed_uploads.py
+"""
+import sys
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GEMINI_API_KEY", "test")  # routers package imports the AI router
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routers.uploads as uploads
+from config import settings
+from services.signed_urls import SignedUploadsJSONResponse, sign_upload_url
+
+
+def run():
+    tmp = tempfile.mkdtemp()
+    try:
+        uploads.UPLOAD_ROOT = uploads.Path(tmp).resolve()
+        os.makedirs(os.path.join(tmp, "cas", "ab"))
+        content = os.urandom(100_000)
+        with open(os.path.join(tmp, "cas", "ab", "report.pdf"), "wb") as f:
+            f.write(content)
+
+        app = FastAPI(default_response_class=SignedUploadsJSONResponse)
+        app.include_router(uploads.router)
+
+        @app.get("/report")
+        def report():
+            return {"report_file_url": "/uploads/cas/ab/report.pdf", "report_images": []}
+
+        client = TestClient(app)
+        url = client.get("/report").json()["report_file_url"]
+        assert "sig=" in url and url == sign_upload_url("/uploads/cas/ab/report.pdf")
+        print(f"✅ JSON responses carry signed links: {url}")
+
+        assert client.get("/uploads/cas/ab/report.pdf").status_code == 403
+        assert client.get(url.replace("sig=", "sig=x")).status_code == 403
+        print("✅ Unsigned and tampered links are refused")
+
+        response = client.get(url)
+        assert response.status_code == 200 and response.content == content
+        assert "immutable" in response.headers["cache-control"]
+        response = client.get(url, headers={"Range": "bytes=100-199"})
+        assert response.status_code == 206 and response.content == content[100:200]
+        assert response.headers["content-range"] == "bytes 100-199/100000"
+        assert client.get(url, headers={"Range": "bytes=200000-"}).status_code == 416
+        response = client.get(url, headers={"Range": "bytes=0-1,5-6"})
+        assert response.status_code == 200 and response.content == content  # Multi-range: whole file
+        print("✅ Full, ranged, multi-range and unsatisfiable requests served from Python")
+
+        settings.UPLOADS_X_ACCEL_PREFIX = "/protected-uploads"
+        response = client.get(url)
+        assert response.headers["x-accel-redirect"] == "/protected-uploads/cas/ab/report.pdf"
+        assert response.content == b""
+        print("✅ Behind nginx the transfer is handed off via X-Accel-Redirect")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,124 @@
+"""
+Unified admin search
+Looks up patients, doctors, pharmacies and clinics at once. Each entity type
+is queried concurrently on its own session; on PostgreSQL the ILIKE filters
+are served by pg_trgm GIN indexes (see migrations/migrate_trigram_indexes.py)
+and hits are ranked by trigram similarity.
+"""
+import asyncio
+from typing import Dict, List
+
+from sqlalchemy import func, or_
+
+from database import SessionLocal
+
+# Entity type -> model name, searched columns, title/subtitle attributes
+SEARCH_TARGETS = {
+    "patient": {
+        "model": "User",
+        "columns": ["name", "phone"],
+        "title": "name",
+        "subtitle": "phone",
+    },
+    "doctor": {
+        "model": "Doctor",
+        "columns": ["full_name", "name", "phone", "specialization"],
+        "title": "full_name",
+        "subtitle": "specialization",
+    },
+    "pharmacy": {
+        "model": "Pharmacy",
+        "columns": ["pharmacy_name", "license_number", "phone", "city"],
+        "title": "pharmacy_name",
+        "subtitle": "city",
+    },
+    "clinic": {
+        "model": "Clinic",
+        "columns": ["clinic_name", "license_number", "phone", "city"],
+        "title": "clinic_name",
+        "subtitle": "city",
+    },
+}
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input matches literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _text_score(query: str, value: str) -> float:
+    """Similarity stand-in for databases without pg_trgm (exact > prefix > substring)"""
+    value = (value or "").lower()
+    if not value or query not in value:
+        return 0.0
+    if value == query:
+        return 1.0
+    if value.startswith(query):
+        return 0.8
+    return 0.5 * len(query) / len(value) + 0.2
+
+
+def search_entity(entity_type: str, q: str, limit: int) -> List[Dict]:
+    """Top hits of one entity type, each with a score in [0, 1]"""
+    import models
+
+    target = SEARCH_TARGETS[entity_type]
+    model = getattr(models, target["model"])
+    columns = [getattr(model, name) for name in target["columns"]]
+    pattern = f"%{escape_like(q)}%"
+
+    db = SessionLocal()
+    try:
+        query = db.query(model).filter(or_(*[column.ilike(pattern, escape="\\") for column in columns]))
+
+        if db.bind.dialect.name == "postgresql":
+            score = func.greatest(*[func.similarity(func.coalesce(column, ""), q) for column in columns])
+            rows = query.add_columns(score.label("score")).order_by(score.desc(), model.id.desc()).limit(limit).all()
+        else:
+            candidates = query.order_by(model.id.desc()).limit(limit * 5).all()
+            needle = q.lower()
+            scored = [
+                (row, max(_text_score(needle, getattr(row, name)) for name in target["columns"]))
+                for row in candidates
+            ]
+            rows = sorted(scored, key=lambda pair: pair[1], reverse=True)[:limit]
+
+        hits = []
+        for row, row_score in rows:
+            matched = [
+                name for name in target["columns"]
+                if q.lower() in str(getattr(row, name) or "").lower()
+            ]
+            hits.append({
+                "type": entity_type,
+                "id": row.id,
+                "title": getattr(row, target["title"]) or getattr(row, "name", None),
+                "subtitle": getattr(row, target["subtitle"]),
+                "phone": row.phone,
+                "matched_fields": matched,
+                "is_active": getattr(row, "is_active", None),
+                "is_verified": getattr(row, "is_verified", None),
+                "score": round(float(row_score or 0), 4),
+            })
+        return hits
+    finally:
+        db.close()
+
+
+async def search_all(q: str, types: List[str], limit: int) -> Dict:
+    """Query every requested entity type in parallel and merge hits by score"""
+    results = await asyncio.gather(
+        *[asyncio.to_thread(search_entity, entity_type, q, limit) for entity_type in types]
+    )
+
+    counts = {entity_type: len(hits) for entity_type, hits in zip(types, results)}
+    merged = sorted(
+        (hit for hits in results for hit in hits),
+        key=lambda hit: hit["score"],
+        reverse=True
+    )
+    return {
+        "query": q,
+        "hits": merged[:limit],
+        "counts": counts
+    }
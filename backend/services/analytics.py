@@ -0,0 +1,204 @@
+"""
+Admin analytics time series
+Counts rows per time bucket with one range-filtered GROUP BY per metric.
+The WHERE clause compares the raw created_at column against UTC bounds (so
+the created_at indexes are used); bucketing happens in the SELECT list and
+missing buckets are zero-filled in Python.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Date, case, cast, func
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Metric name -> model (in models.py) whose created_at is counted
+METRICS = {
+    "appointments": "Appointment",
+    "consultations": "AIConsultation",
+    "signups": "User",
+    "doctor_signups": "Doctor",
+    "prescriptions": "Prescription",
+    "quotations": "QuotationRequest",
+    "lab_quotations": "LabTestQuotationRequest",
+}
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """Start of the bucket containing a local (naive) datetime"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        # ISO weeks start on Monday, matching PostgreSQL date_trunc('week')
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_bucket(moment: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return moment + timedelta(hours=1)
+    if granularity == "day":
+        return moment + timedelta(days=1)
+    if granularity == "week":
+        return moment + timedelta(weeks=1)
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+def bucket_starts(start: datetime, end: datetime, granularity: str) -> List[datetime]:
+    """Every local bucket start from the bucket containing start up to end (exclusive)"""
+    buckets = []
+    current = truncate(start, granularity)
+    while current < end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def _exists_locally(moment: datetime, zone: ZoneInfo) -> bool:
+    """False for wall-clock times skipped by a DST change (e.g. 02:30 on spring-forward day)"""
+    return moment.replace(tzinfo=zone).astimezone(timezone.utc).astimezone(zone).replace(tzinfo=None) == moment
+
+
+def _utc_offset_minutes(moment: datetime, zone: ZoneInfo) -> int:
+    return int(moment.astimezone(zone).utcoffset().total_seconds() // 60)
+
+
+def _offset_changes(zone: ZoneInfo, start_utc: datetime, end_utc: datetime) -> List[Tuple[datetime, int]]:
+    """[(UTC moment, offset in minutes from then on)] covering [start_utc, end_utc)"""
+    changes = [(start_utc, _utc_offset_minutes(start_utc, zone))]
+    day = start_utc
+    while day < end_utc:
+        following = min(day + timedelta(days=1), end_utc)
+        if _utc_offset_minutes(following, zone) != changes[-1][1]:
+            # Transitions fall on quarter hours; bucket bounds are aligned to them
+            moment = day
+            while _utc_offset_minutes(moment, zone) == changes[-1][1]:
+                moment += timedelta(minutes=15)
+            changes.append((moment, _utc_offset_minutes(moment, zone)))
+        day = following
+    return changes
+
+
+def _sqlite_shift(db, column, zone: ZoneInfo, start_utc: datetime, end_utc: datetime):
+    """strftime modifier moving UTC text to local time, following DST changes inside the range"""
+    changes = _offset_changes(zone, start_utc, end_utc)
+    if len(changes) == 1:
+        return f"{changes[0][1]:+d} minutes"
+    return case(
+        *[
+            (column < db_timestamp(db, changes[i + 1][0]), f"{changes[i][1]:+d} minutes")
+            for i in range(len(changes) - 1)
+        ],
+        else_=f"{changes[-1][1]:+d} minutes"
+    )
+
+
+def _bucket_expression(db, column, granularity: str, zone: ZoneInfo, start_utc: datetime, end_utc: datetime):
+    """SQL expression giving the local bucket start of a timestamptz column"""
+    if db.bind.dialect.name == "postgresql":
+        return func.date_trunc(granularity, func.timezone(zone.key, column))
+
+    # SQLite (development): shift by the zone's UTC offset in effect at each row
+    shifted = _sqlite_shift(db, column, zone, start_utc, end_utc)
+    if granularity == "hour":
+        return func.strftime("%Y-%m-%d %H:00:00", column, shifted)
+    if granularity == "day":
+        return func.strftime("%Y-%m-%d 00:00:00", column, shifted)
+    if granularity == "week":
+        return func.strftime("%Y-%m-%d 00:00:00", column, shifted, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01 00:00:00", column, shifted)
+
+
+def local_date_expression(db, column, zone: ZoneInfo, reference: datetime):
+    """SQL expression giving the local calendar date of a timestamptz column"""
+    if db.bind.dialect.name == "postgresql":
+        return cast(func.timezone(zone.key, column), Date)
+    offset = int(reference.astimezone(zone).utcoffset().total_seconds() // 60)
+    return func.date(column, f"{offset:+d} minutes")
+
+
+def db_timestamp(db, value: datetime) -> datetime:
+    """Aware UTC datetime as a bind value (SQLite stores naive UTC text)"""
+    if db.bind.dialect.name == "sqlite":
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _as_local_naive(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=None)
+
+
+def count_by_bucket(db, model, start_utc: datetime, end_utc: datetime, granularity: str, zone: ZoneInfo) -> Dict[datetime, int]:
+    """{local bucket start: row count} for rows created in [start_utc, end_utc)"""
+    bucket = _bucket_expression(db, model.created_at, granularity, zone, start_utc, end_utc).label("bucket")
+    rows = (
+        db.query(bucket, func.count())
+        .filter(model.created_at >= db_timestamp(db, start_utc), model.created_at < db_timestamp(db, end_utc))
+        .group_by(bucket)
+        .all()
+    )
+    return {_as_local_naive(bucket_start): count for bucket_start, count in rows if bucket_start is not None}
+
+
+def time_series(
+    db,
+    metrics: List[str],
+    start: datetime,
+    end: datetime,
+    granularity: str,
+    tz: str
+) -> dict:
+    """
+    Zero-filled counts per bucket for each metric
+
+    Args:
+        start, end: Local wall-clock datetimes (naive) in tz; end is exclusive
+        granularity: hour, day, week or month
+        tz: IANA time zone name used for bucket boundaries
+    """
+    import models
+
+    zone = ZoneInfo(tz)
+    buckets = bucket_starts(start, end, granularity)
+    if granularity == "hour":
+        # No row can fall in the hour skipped by a spring-forward change
+        buckets = [bucket for bucket in buckets if _exists_locally(bucket, zone)]
+    range_start = buckets[0] if buckets else start
+    start_utc = range_start.replace(tzinfo=zone).astimezone(timezone.utc)
+    end_utc = end.replace(tzinfo=zone).astimezone(timezone.utc)
+
+    series = {}
+    totals = {}
+    for metric in metrics:
+        model = getattr(models, METRICS[metric])
+        counts = count_by_bucket(db, model, start_utc, end_utc, granularity, zone)
+        series[metric] = [counts.get(bucket, 0) for bucket in buckets]
+        totals[metric] = sum(series[metric])
+
+    return {
+        "granularity": granularity,
+        "timezone": tz,
+        "start": range_start.replace(tzinfo=zone).isoformat(),
+        "end": end.replace(tzinfo=zone).isoformat(),
+        "buckets": [bucket.replace(tzinfo=zone).isoformat() for bucket in buckets],
+        "series": series,
+        "totals": totals
+    }
+
+
+def parse_local_datetime(value: Optional[str], zone: ZoneInfo) -> Optional[datetime]:
+    """ISO date/datetime -> naive local wall-clock time in zone"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(zone).replace(tzinfo=None)
+    return parsed
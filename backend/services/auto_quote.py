@@ -0,0 +1,218 @@
+"""
+Automatic quotes from pharmacy price lists
+Prices a prescription for every targeted pharmacy at once: the medications
+become a derived table of (position, candidate key, priority, quantity)
+joined to the price list items of all targets in one query. ROW_NUMBER
+keeps the best catalog match per pharmacy and medication, and window SUM /
+COUNT give each pharmacy's subtotal and coverage in the same pass. The
+resulting QuotationResponse rows are flushed together (one multi-row
+INSERT ... RETURNING).
+"""
+import logging
+import re
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, String, func, literal, select, union_all
+
+from services.price_index import CENTS, medicine_key, record_quote
+
+logger = logging.getLogger(__name__)
+
+# Course length assumed when a medication's duration cannot be read
+DEFAULT_COURSE_DAYS = 7
+
+FREQUENCY_WORDS = {"once": 1, "twice": 2, "thrice": 3, "one": 1, "two": 2, "three": 3, "four": 4}
+DURATION_UNITS = {"day": 1, "week": 7, "month": 30}
+
+AUTO_QUOTE_NOTE = "Automatic quote from the pharmacy's price list."
+
+
+def doses_per_day(frequency: str) -> int:
+    """'1+0+1' -> 2, 'twice daily' -> 2, '3 times a day' -> 3, 'every 8 hours' -> 3; otherwise 1"""
+    text = (frequency or "").lower()
+    pattern = re.fullmatch(r"\s*(\d+(?:\s*[+\-]\s*\d+)+)\s*", text)
+    if pattern:
+        return max(sum(int(part) for part in re.findall(r"\d+", pattern.group(1))), 1)
+    hours = re.search(r"every\s+(\d+)\s*(?:h|hr|hour)", text)
+    if hours and int(hours.group(1)) > 0:
+        return max(24 // int(hours.group(1)), 1)
+    times = re.search(r"\b(\d+|once|twice|thrice|one|two|three|four)\b", text)
+    if times:
+        value = times.group(1)
+        return int(value) if value.isdigit() and int(value) > 0 else FREQUENCY_WORDS.get(value, 1)
+    return 1
+
+
+def course_days(duration: str) -> Optional[int]:
+    """'7 days' -> 7, '2 weeks' -> 14, '1 month' -> 30; None when it cannot be read"""
+    match = re.search(r"(\d+)\s*(day|week|month)", (duration or "").lower())
+    if not match:
+        return None
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def estimate_quantity(medication: dict) -> int:
+    """Units needed for the course (an explicit `quantity` wins)"""
+    quantity = medication.get("quantity")
+    if isinstance(quantity, (int, float)) and quantity > 0:
+        return int(quantity)
+    days = course_days(medication.get("duration")) or DEFAULT_COURSE_DAYS
+    return max(doses_per_day(medication.get("frequency")) * days, 1)
+
+
+def wanted_medications(medications) -> List[dict]:
+    """Prescription medications with their catalog keys (name + strength first, then name alone)"""
+    wanted = []
+    for position, medication in enumerate(medications or []):
+        if isinstance(medication, str):
+            medication = {"name": medication}
+        name = (medication.get("name") or medication.get("medicine") or "").strip()
+        if not name:
+            continue
+        keys = []
+        dosage = (medication.get("dosage") or "").strip()
+        if dosage and dosage.lower() not in name.lower():
+            keys.append(medicine_key(f"{name} {dosage}"))
+        keys.append(medicine_key(name))
+        wanted.append({
+            "position": position,
+            "name": name,
+            "keys": list(dict.fromkeys(keys)),
+            "quantity": estimate_quantity(medication),
+        })
+    return wanted
+
+
+def match_price_lists(db, pharmacy_ids: List[int], wanted: List[dict]):
+    """
+    Best catalog line per (pharmacy, medication) for every pharmacy with
+    auto-quoting enabled, with the pharmacy's subtotal and number of
+    matched medications as window aggregates
+    """
+    from models import PharmacyPriceList, PharmacyPriceListItem as Item
+
+    wanted_table = union_all(*[
+        select(
+            literal(medication["position"], Integer).label("position"),
+            literal(key, String).label("medicine_key"),
+            literal(priority, Integer).label("priority"),
+            literal(medication["quantity"], Integer).label("quantity")
+        )
+        for medication in wanted
+        for priority, key in enumerate(medication["keys"])
+    ]).subquery("wanted")
+
+    ranked = (
+        select(
+            Item.pharmacy_id,
+            wanted_table.c.position,
+            wanted_table.c.quantity,
+            Item.medicine_name,
+            Item.unit_price,
+            (Item.unit_price * wanted_table.c.quantity).label("line_total"),
+            PharmacyPriceList.auto_publish,
+            PharmacyPriceList.delivery_charge,
+            PharmacyPriceList.estimated_delivery_time,
+            func.row_number().over(
+                partition_by=(Item.pharmacy_id, wanted_table.c.position),
+                order_by=wanted_table.c.priority
+            ).label("match_rank")
+        )
+        .join(wanted_table, wanted_table.c.medicine_key == Item.medicine_key)
+        .join(PharmacyPriceList, PharmacyPriceList.pharmacy_id == Item.pharmacy_id)
+        .where(
+            Item.pharmacy_id.in_(pharmacy_ids),
+            Item.in_stock == True,
+            PharmacyPriceList.auto_quote == True
+        )
+        .subquery("ranked")
+    )
+
+    return db.execute(
+        select(
+            ranked,
+            func.sum(ranked.c.line_total).over(partition_by=ranked.c.pharmacy_id).label("subtotal"),
+            func.count().over(partition_by=ranked.c.pharmacy_id).label("matched")
+        )
+        .where(ranked.c.match_rank == 1)
+        .order_by(ranked.c.pharmacy_id, ranked.c.position)
+    ).all()
+
+
+def create_auto_quotes(db, quotation_request, pharmacy_ids: List[int]) -> List[dict]:
+    """
+    Quote a new request from the targeted pharmacies' price lists
+
+    Adds one QuotationResponse per pharmacy whose catalog covers at least
+    one medication: DRAFT for the pharmacy to review, or QUOTED straight
+    away when its price list has auto_publish. Missing medications are
+    listed in the notes. Runs in the caller's transaction (not committed);
+    the caller notifies the patient of the QUOTED ones after its commit.
+    """
+    from models import QuotationResponse, QuotationStatus
+
+    wanted = wanted_medications(quotation_request.prescription.medications if quotation_request.prescription else [])
+    if not wanted or not pharmacy_ids:
+        return []
+    names = {medication["position"]: medication["name"] for medication in wanted}
+
+    by_pharmacy: Dict[int, list] = {}
+    for row in match_price_lists(db, pharmacy_ids, wanted):
+        by_pharmacy.setdefault(row.pharmacy_id, []).append(row)
+
+    responses = []
+    for pharmacy_id, rows in by_pharmacy.items():
+        first = rows[0]
+        subtotal = Decimal(str(first.subtotal)).quantize(CENTS)
+        delivery_charge = Decimal(str(first.delivery_charge or 0)).quantize(CENTS)
+        notes = AUTO_QUOTE_NOTE
+        if first.matched < len(wanted):
+            missing = [names[position] for position in sorted(set(names) - {row.position for row in rows})]
+            notes += f" Not available: {', '.join(missing)}."
+        responses.append(QuotationResponse(
+            quotation_request_id=quotation_request.id,
+            pharmacy_id=pharmacy_id,
+            quoted_items=[
+                {
+                    "medicine": row.medicine_name,
+                    "quantity": row.quantity,
+                    "unit_price": float(row.unit_price),
+                    "total_price": float(Decimal(str(row.line_total)).quantize(CENTS))
+                }
+                for row in rows
+            ],
+            subtotal=subtotal,
+            delivery_charge=delivery_charge,
+            total_amount=subtotal + delivery_charge,
+            notes=notes,
+            estimated_delivery_time=first.estimated_delivery_time,
+            status=QuotationStatus.QUOTED if first.auto_publish else QuotationStatus.DRAFT
+        ))
+    if not responses:
+        return []
+
+    db.add_all(responses)
+    db.flush()
+
+    published = [response for response in responses if response.status == QuotationStatus.QUOTED]
+    for response in published:
+        record_quote(db, response)
+    if published:
+        quotation_request.status = QuotationStatus.QUOTED
+
+    logger.info(
+        f"Auto-quoted request {quotation_request.id}: {len(responses)} of {len(pharmacy_ids)} pharmacies, "
+        f"{len(published)} published"
+    )
+    return [
+        {
+            "response_id": response.id,
+            "pharmacy_id": response.pharmacy_id,
+            "status": response.status.value,
+            "total_amount": float(response.total_amount),
+            "matched_items": len(response.quoted_items),
+            "requested_items": len(wanted)
+        }
+        for response in responses
+    ]
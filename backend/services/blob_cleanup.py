@@ -0,0 +1,269 @@
+"""
+Blob cleanup worker
+Drains the blob_deletions outbox in batches with exponential backoff and
+periodically reconciles storage against the database to report orphans
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Set
+
+from config import settings
+from database import SessionLocal
+from services.blob_service import VercelBlobService, blob_service
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("blob_deletions_total", "Outbox entries processed by outcome (deleted, skipped, failed)")
+metrics.describe("blob_orphans_found_total", "Unreferenced stored files queued by reconciliation")
+
+
+def referenced_urls(db) -> Set[str]:
+    """Every stored-file URL the database still points at"""
+    from models import StoredBlob, User, Doctor, LabReport, BlobDeletion
+
+    urls = set()
+
+    def add_variants(variants):
+        # {"thumb": url} or, for certificates, {"mbbs": {"thumb": url}}
+        for value in (variants or {}).values():
+            if isinstance(value, dict):
+                add_variants(value)
+            elif value:
+                urls.add(value)
+
+    for url, variants in db.query(StoredBlob.url, StoredBlob.variants):
+        urls.add(url)
+        add_variants(variants)
+    for url, variants in db.query(User.profile_picture_url, User.profile_picture_variants):
+        urls.add(url)
+        add_variants(variants)
+    for row in db.query(
+        Doctor.profile_picture_url, Doctor.mbbs_certificate_url, Doctor.fcps_certificate_url,
+        Doctor.profile_picture_variants, Doctor.certificate_variants
+    ):
+        urls.update(row[:3])
+        add_variants(row[3])
+        add_variants(row[4])
+    for report_file_url, report_images in db.query(LabReport.report_file_url, LabReport.report_images):
+        urls.add(report_file_url)
+        urls.update(report_images or [])
+    # Already queued - the outbox will take care of them
+    urls.update(url for (url,) in db.query(BlobDeletion.url))
+
+    urls.discard(None)
+    return urls
+
+
+class BlobDeletionWorker:
+    """
+    Background consumer of the blob_deletions outbox
+
+    Each pass claims up to batch_size due rows (FOR UPDATE SKIP LOCKED, so
+    several app instances can run workers), drops rows whose content was
+    registered again in stored_blobs, deletes the rest in one storage call
+    and removes their rows. A failed batch is rescheduled with exponential
+    backoff capped at max_backoff.
+    """
+
+    def __init__(
+        self,
+        service: VercelBlobService,
+        session_factory=SessionLocal,
+        interval: float = 5.0,
+        batch_size: int = 100,
+        max_backoff: float = 3600.0,
+        reconcile_interval: float = 0.0,
+        orphan_grace: float = 86400.0
+    ):
+        self.service = service
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.reconcile_interval = reconcile_interval
+        self.orphan_grace = orphan_grace
+        self._wakeup = asyncio.Event()
+        self._last_reconcile = time.monotonic()
+        self._task = None
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.interval * (2 ** attempts), self.max_backoff)
+
+    def _claim_batch(self, db, now: datetime):
+        """Lock up to batch_size due rows; split them into (skipped, pending)"""
+        from models import BlobDeletion, StoredBlob
+
+        rows = (
+            db.query(BlobDeletion)
+            .filter(BlobDeletion.next_attempt_at <= now)
+            .order_by(BlobDeletion.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            db.rollback()
+            return [], []
+
+        # Content addressing reuses paths: the same file may have been uploaded again
+        hashes = {row.sha256 for row in rows if row.sha256}
+        live_hashes = {
+            sha256 for (sha256,) in
+            db.query(StoredBlob.sha256).filter(StoredBlob.sha256.in_(hashes))
+        } if hashes else set()
+        live_urls = {
+            url for (url,) in
+            db.query(StoredBlob.url).filter(StoredBlob.url.in_([row.url for row in rows]))
+        }
+
+        skipped = [row for row in rows if row.sha256 in live_hashes or row.url in live_urls]
+        pending = [row for row in rows if row not in skipped]
+        return skipped, pending
+
+    def _reschedule(self, db, skipped, pending, now: datetime, error: Exception):
+        for row in pending:
+            row.attempts += 1
+            row.last_error = str(error)[:1000]
+            row.next_attempt_at = now + timedelta(seconds=self._backoff(row.attempts))
+        for row in skipped:
+            db.delete(row)
+        db.commit()
+
+    def _remove(self, db, rows):
+        for row in rows:
+            db.delete(row)
+        db.commit()
+
+    async def process_batch(self) -> int:
+        """Handle one batch of due deletions; returns how many rows were processed"""
+        db = self.session_factory()
+        try:
+            # Blocking DB work stays off the event loop; the row locks are held across the storage call
+            now = datetime.utcnow()
+            skipped, pending = await asyncio.to_thread(self._claim_batch, db, now)
+            if not skipped and not pending:
+                return 0
+
+            try:
+                await self.service.delete_files(sorted({row.url for row in pending}))
+            except Exception as e:
+                await asyncio.to_thread(self._reschedule, db, skipped, pending, now, e)
+                logger.warning(f"Blob delete batch of {len(pending)} failed, retrying: {str(e)}")
+                metrics.inc("blob_deletions_total", {"outcome": "failed"}, len(pending))
+                metrics.inc("blob_deletions_total", {"outcome": "skipped"}, len(skipped))
+                return len(skipped) + len(pending)
+
+            await asyncio.to_thread(self._remove, db, skipped + pending)
+            metrics.inc("blob_deletions_total", {"outcome": "deleted"}, len(pending))
+            metrics.inc("blob_deletions_total", {"outcome": "skipped"}, len(skipped))
+            return len(skipped) + len(pending)
+        finally:
+            db.close()
+
+    async def drain(self) -> int:
+        """Process batches until nothing is due"""
+        total = 0
+        while True:
+            processed = await self.process_batch()
+            total += processed
+            if processed < self.batch_size:
+                return total
+
+    async def reconcile(self, dry_run: bool = False) -> dict:
+        """
+        Queue stored files that no database row references
+
+        Files younger than the grace period are ignored so in-flight uploads
+        (stored but not yet committed) are never touched. With dry_run the
+        orphans are only reported.
+        """
+        db = self.session_factory()
+        try:
+            referenced = await asyncio.to_thread(referenced_urls, db)
+            cutoff = datetime.utcnow() - timedelta(seconds=self.orphan_grace)
+
+            scanned = 0
+            orphans = []
+            async for url, uploaded_at in self.service.list_files():
+                scanned += 1
+                if url not in referenced and uploaded_at < cutoff:
+                    orphans.append(url)
+
+            if not dry_run and orphans:
+                await asyncio.to_thread(self._enqueue_orphans, db, orphans)
+                metrics.inc("blob_orphans_found_total", amount=len(orphans))
+                self.notify()
+
+            return {
+                "scanned": scanned,
+                "referenced": len(referenced),
+                "orphans": len(orphans),
+                "queued": 0 if dry_run else len(orphans),
+                "sample": orphans[:20]
+            }
+        finally:
+            db.close()
+
+    def _enqueue_orphans(self, db, orphans):
+        for url in orphans:
+            self.service.enqueue_deletion(db, url)
+        db.commit()
+
+    def notify(self):
+        """Wake the worker early (e.g. right after a request queued deletions)"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.error(f"Blob deletion worker failed: {str(e)}")
+
+            if self.reconcile_interval and time.monotonic() - self._last_reconcile >= self.reconcile_interval:
+                self._last_reconcile = time.monotonic()
+                try:
+                    # Report only; deleting orphans is left to POST /api/admin/storage/reconcile
+                    result = await self.reconcile(dry_run=True)
+                    if result["orphans"]:
+                        logger.warning(
+                            f"Blob reconciliation found {result['orphans']} unreferenced files "
+                            f"(not deleted), e.g. {result['sample'][:5]}"
+                        )
+                except Exception as e:
+                    logger.error(f"Blob reconciliation failed: {str(e)}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        """Start the background worker (call from app startup)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background worker (call from app shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instance
+blob_deletion_worker = BlobDeletionWorker(
+    blob_service,
+    interval=settings.BLOB_DELETE_INTERVAL_SECONDS,
+    batch_size=settings.BLOB_DELETE_BATCH_SIZE,
+    max_backoff=settings.BLOB_DELETE_MAX_BACKOFF_SECONDS,
+    reconcile_interval=settings.BLOB_RECONCILE_INTERVAL_HOURS * 3600,
+    orphan_grace=settings.BLOB_ORPHAN_GRACE_HOURS * 3600
+)
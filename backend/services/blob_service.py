@@ -3,13 +3,33 @@ Vercel Blob Storage Service
 Handles all file uploads to Vercel Blob Storage
 """
 import os
-from typing import Optional
-import aiohttp
+import hashlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
 import uuid
 from pathlib import Path
 
+import aiohttp
+
+from services.http_client import SharedHTTPClient, http_client as shared_http_client
+
+# Read uploads in 256KB chunks so no request ever holds a whole file in memory
+CHUNK_SIZE = 256 * 1024
+
+
+class FileTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds its size limit"""
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File exceeds {max_size // (1024 * 1024)}MB limit")
+
+
 class VercelBlobService:
-    def __init__(self):
+    def __init__(self, http_client: Optional[SharedHTTPClient] = None):
+        # Pooled outbound HTTP client (keep-alive connections to the blob API)
+        self.http = http_client or shared_http_client
+        
         # Vercel Blob token from environment
         self.blob_token = os.getenv('BLOB_READ_WRITE_TOKEN', '')
         self.base_url = "https://blob.vercel-storage.com"
@@ -67,13 +87,268 @@ class VercelBlobService:
             # Fallback to local storage for development
             return self._save_local(file_content, blob_path)
     
+    async def upload_stream(
+        self,
+        upload,
+        folder: str = "",
+        max_size: Optional[int] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> dict:
+        """
+        Stream an UploadFile to Vercel Blob Storage or local storage
+        
+        The file is read in CHUNK_SIZE pieces, the size limit is enforced as
+        bytes arrive and the SHA-256 is computed on the fly, so the full file
+        is never held in memory.
+        
+        Args:
+            upload: Object with an async read(size) method (e.g. UploadFile)
+            folder: Optional folder/prefix (e.g., 'profile_pictures', 'lab_reports')
+            max_size: Maximum size in bytes; FileTooLargeError is raised past it
+            filename: Original filename (defaults to upload.filename)
+            content_type: MIME type (defaults to upload.content_type)
+            
+        Returns:
+            Dictionary with the stored file's url, sha256 and size
+        """
+        filename = filename or getattr(upload, "filename", "") or ""
+        content_type = content_type or getattr(upload, "content_type", None) or "application/octet-stream"
+        
+        # Reject early when the client declared the size
+        declared_size = getattr(upload, "size", None)
+        if max_size and declared_size and declared_size > max_size:
+            raise FileTooLargeError(max_size)
+        
+        unique_filename = f"{uuid.uuid4()}{Path(filename).suffix}"
+        blob_path = f"{folder}/{unique_filename}" if folder else unique_filename
+        
+        return await self._stream_to_path(upload, blob_path, content_type, max_size)
+    
+    async def store_upload(
+        self,
+        db,
+        upload,
+        folder: str = "",
+        max_size: Optional[int] = None
+    ) -> dict:
+        """
+        Store an upload, deduplicating by content when BLOB_CONTENT_ADDRESSED is on
+        
+        The file is hashed in a first streaming pass. If a blob with the same
+        SHA-256 is already registered in stored_blobs, its reference count is
+        incremented and nothing is written; otherwise the file is streamed to
+        cas/<aa>/<sha256><ext> and registered. The stored_blobs change joins
+        the caller's transaction, so it only sticks if the caller commits.
+        
+        Returns:
+            Dictionary with url, sha256, size and deduplicated flag
+        """
+        from config import settings
+        
+        if not settings.BLOB_CONTENT_ADDRESSED:
+            stored = await self.upload_stream(upload, folder=folder, max_size=max_size)
+            return {**stored, "deduplicated": False}
+        
+        filename = getattr(upload, "filename", "") or ""
+        content_type = getattr(upload, "content_type", None) or "application/octet-stream"
+        
+        declared_size = getattr(upload, "size", None)
+        if max_size and declared_size and declared_size > max_size:
+            raise FileTooLargeError(max_size)
+        
+        # Pass 1: hash without storing (UploadFile is spooled, so it can be rewound)
+        hasher = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise FileTooLargeError(max_size)
+            hasher.update(chunk)
+        sha256 = hasher.hexdigest()
+        
+        existing = self._find_blob(db, sha256)
+        if existing is not None:
+            self._add_reference(db, sha256, existing.url, size, content_type)
+            return {"url": existing.url, "sha256": sha256, "size": size, "deduplicated": True}
+        
+        # Pass 2: stream to a path derived from the hash (identical content -> identical key)
+        await upload.seek(0)
+        blob_path = f"cas/{sha256[:2]}/{sha256}{Path(filename).suffix.lower()}"
+        stored = await self._stream_to_path(upload, blob_path, content_type, max_size)
+        self._add_reference(db, sha256, stored["url"], size, content_type)
+        return {**stored, "deduplicated": False}
+    
+    async def discard_uploads(self, db, stored_items) -> int:
+        """
+        Undo store_upload() results after the caller rolled back its transaction
+        
+        Files that were newly written by this request are deleted unless a
+        stored_blobs row still points at them (another request registered the
+        same content meanwhile). Deduplicated hits never wrote anything and
+        their reference bumps went away with the rollback.
+        
+        Returns:
+            Number of files deleted
+        """
+        from models import StoredBlob
+        
+        deleted = 0
+        for stored in stored_items:
+            if stored.get("deduplicated"):
+                continue
+            url = stored["url"]
+            if db.query(StoredBlob.id).filter(StoredBlob.url == url).first() is not None:
+                continue
+            if await self._delete_now(url):
+                deleted += 1
+        return deleted
+    
+    async def put_bytes(self, content: bytes, path: str, content_type: str) -> str:
+        """Store small generated content (e.g. image variants) at an exact path"""
+        if self.use_blob_storage:
+            return await self._upload_to_vercel_blob(content, path, content_type)
+        return self._save_local(content, path)
+    
+    def _find_blob(self, db, sha256: str):
+        from models import StoredBlob
+        return db.query(StoredBlob).filter(StoredBlob.sha256 == sha256).first()
+    
+    def _add_reference(self, db, sha256: str, url: str, size: int, content_type: str):
+        """Insert the blob row or bump its reference count in one statement"""
+        from models import StoredBlob
+        
+        if db.bind.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        
+        stmt = insert(StoredBlob).values(
+            sha256=sha256, url=url, size=size, content_type=content_type, ref_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StoredBlob.sha256],
+            set_={"ref_count": StoredBlob.ref_count + 1}
+        )
+        db.execute(stmt)
+    
+    async def release_file(self, db, url: Optional[str]) -> bool:
+        """
+        Drop one reference to a stored file, queueing it for deletion when none remain
+        
+        Files uploaded before content addressing (not in stored_blobs) are
+        queued directly. Deletion goes through the blob_deletions outbox in
+        the caller's transaction, so nothing is removed unless the caller
+        commits and the request never waits on the storage API.
+        
+        Returns:
+            True if the underlying file was queued for deletion
+        """
+        from models import StoredBlob
+        from sqlalchemy import update, delete
+        
+        if not url:
+            return False
+        
+        row = db.execute(
+            update(StoredBlob)
+            .where(StoredBlob.url == url)
+            .values(ref_count=StoredBlob.ref_count - 1)
+            .returning(StoredBlob.ref_count, StoredBlob.variants, StoredBlob.sha256)
+        ).first()
+        
+        if row is None:
+            self.enqueue_deletion(db, url)
+            return True
+        remaining, variants, sha256 = row
+        if remaining > 0:
+            return False
+        
+        db.execute(delete(StoredBlob).where(StoredBlob.url == url, StoredBlob.ref_count <= 0))
+        # Derived images live and die with their original
+        for variant_url in (variants or {}).values():
+            self.enqueue_deletion(db, variant_url, sha256)
+        self.enqueue_deletion(db, url, sha256)
+        return True
+    
+    def enqueue_deletion(self, db, url: str, sha256: Optional[str] = None):
+        """Add a file to the blob_deletions outbox (joins the caller's transaction)"""
+        from models import BlobDeletion
+        db.add(BlobDeletion(url=url, sha256=sha256))
+    
+    def get_dedup_stats(self, db) -> dict:
+        """Logical vs physical file counts and bytes for content-addressed storage"""
+        from models import StoredBlob
+        from sqlalchemy import func
+        
+        blobs, references, physical_bytes, logical_bytes = db.query(
+            func.count(StoredBlob.id),
+            func.coalesce(func.sum(StoredBlob.ref_count), 0),
+            func.coalesce(func.sum(StoredBlob.size), 0),
+            func.coalesce(func.sum(StoredBlob.size * StoredBlob.ref_count), 0)
+        ).one()
+        
+        return {
+            "stored_blobs": blobs,
+            "references": int(references),
+            "physical_bytes": int(physical_bytes),
+            "logical_bytes": int(logical_bytes),
+            "bytes_saved": int(logical_bytes - physical_bytes),
+            "dedup_ratio": round(int(references) / blobs, 3) if blobs else 1.0,
+            "byte_dedup_ratio": round(int(logical_bytes) / int(physical_bytes), 3) if physical_bytes else 1.0
+        }
+    
+    async def _stream_to_path(
+        self,
+        upload,
+        blob_path: str,
+        content_type: str,
+        max_size: Optional[int] = None
+    ) -> dict:
+        """Stream upload chunks to blob_path, enforcing max_size and hashing on the fly"""
+        hasher = hashlib.sha256()
+        size = 0
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            nonlocal size
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise FileTooLargeError(max_size)
+                hasher.update(chunk)
+                yield chunk
+        
+        try:
+            if self.use_blob_storage:
+                url = await self._upload_to_vercel_blob(chunks(), blob_path, content_type)
+            else:
+                url = await self._stream_local(chunks(), blob_path)
+        except Exception:
+            # aiohttp wraps errors raised inside a streamed body; surface the limit
+            if max_size and size > max_size:
+                raise FileTooLargeError(max_size)
+            raise
+        
+        return {"url": url, "sha256": hasher.hexdigest(), "size": size}
+    
     async def _upload_to_vercel_blob(
         self, 
-        file_content: bytes, 
+        file_content, 
         path: str, 
         content_type: str
     ) -> str:
-        """Upload file to Vercel Blob Storage with public access"""
+        """
+        Upload file to Vercel Blob Storage with public access
+        
+        file_content may be bytes or an async iterator of chunks (sent with
+        chunked transfer encoding).
+        """
         url = f"{self.base_url}/{path}"
         
         headers = {
@@ -86,15 +361,37 @@ class VercelBlobService:
         # Add public access parameter to URL
         public_url = f"{url}?access=public"
         
-        async with aiohttp.ClientSession() as session:
-            async with session.put(public_url, data=file_content, headers=headers) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    # Return the public URL from response
-                    return result.get('url', url)
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"Failed to upload to Vercel Blob: {error_text}")
+        # A streamed body is only as fast as the client sending it; the pool's short total timeout is for API calls
+        from config import settings
+        timeout = aiohttp.ClientTimeout(total=settings.HTTP_UPLOAD_TIMEOUT_SECONDS, connect=self.http.timeout.connect)
+        
+        async with self.http.session.put(public_url, data=file_content, headers=headers, timeout=timeout) as response:
+            if response.status == 200:
+                result = await response.json()
+                # Return the public URL from response
+                return result.get('url', url)
+            else:
+                error_text = await response.text()
+                raise Exception(f"Failed to upload to Vercel Blob: {error_text}")
+    
+    async def _stream_local(self, chunks: AsyncIterator[bytes], path: str) -> str:
+        """Write chunks to local storage, publishing the file only once complete"""
+        file_path = self.local_upload_dir / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name: the same content may be streamed by concurrent uploads
+        partial_path = file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex[:8]}.part")
+        
+        try:
+            with open(partial_path, "wb") as f:
+                async for chunk in chunks:
+                    f.write(chunk)
+            os.replace(partial_path, file_path)
+        except BaseException:
+            if partial_path.exists():
+                partial_path.unlink()
+            raise
+        
+        return f"/uploads/{path}"
     
     def _save_local(self, file_content: bytes, path: str) -> str:
         """Save file locally for development"""
@@ -106,19 +403,34 @@ class VercelBlobService:
         
         return f"/uploads/{path}"
     
-    async def delete_file(self, url: str) -> bool:
+    async def delete_file(self, db, url: Optional[str]) -> bool:
         """
-        Delete a file from Vercel Blob Storage
+        Delete a stored file once nothing references it any more
+        
+        Same as release_file(): shared content stays while another row
+        still points at it, and the storage delete happens after the
+        caller commits.
+        
+        Returns:
+            True if the underlying file was queued for deletion
+        """
+        return await self.release_file(db, url)
+    
+    async def _delete_now(self, url: str) -> bool:
+        """
+        Delete a file from storage immediately, ignoring reference counts
+        
+        Only for files no stored_blobs row points at (see discard_uploads).
         
-        Args:
-            url: The blob URL to delete
-            
         Returns:
             True if successful, False otherwise
         """
         if not self.use_blob_storage:
-            # For local files, just return True
-            # You could implement local file deletion here
+            # Local files are served from /uploads/<path>
+            if url.startswith("/uploads/"):
+                file_path = self.local_upload_dir / url[len("/uploads/"):]
+                if file_path.exists():
+                    file_path.unlink()
             return True
         
         try:
@@ -126,12 +438,71 @@ class VercelBlobService:
                 "Authorization": f"Bearer {self.blob_token}"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=headers) as response:
-                    return response.status == 200
+            async with self.http.session.delete(url, headers=headers) as response:
+                return response.status == 200
         except Exception as e:
             print(f"Error deleting blob: {e}")
             return False
+    
+    async def delete_files(self, urls: List[str]):
+        """
+        Delete several files in one storage call
+        
+        Raises on failure (the cleanup worker records the error and retries),
+        so unlike _delete_now() the caller learns why a batch failed.
+        """
+        if not urls:
+            return
+        
+        if not self.use_blob_storage:
+            for url in urls:
+                if url.startswith("/uploads/"):
+                    file_path = self.local_upload_dir / url[len("/uploads/"):]
+                    file_path.unlink(missing_ok=True)
+            return
+        
+        headers = {
+            "Authorization": f"Bearer {self.blob_token}",
+            "Content-Type": "application/json"
+        }
+        async with self.http.session.post(
+            f"{self.base_url}/delete", json={"urls": urls}, headers=headers
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Blob batch delete failed: {response.status} - {error_text}")
+    
+    async def list_files(self) -> AsyncIterator[Tuple[str, datetime]]:
+        """Yield (url, uploaded_at UTC) for every stored file, for reconciliation"""
+        if not self.use_blob_storage:
+            if not self.local_upload_dir.exists():
+                return
+            for file_path in self.local_upload_dir.rglob("*"):
+                if not file_path.is_file() or file_path.name.endswith(".part"):
+                    continue
+                relative = file_path.relative_to(self.local_upload_dir).as_posix()
+                yield f"/uploads/{relative}", datetime.utcfromtimestamp(file_path.stat().st_mtime)
+            return
+        
+        headers = {"Authorization": f"Bearer {self.blob_token}"}
+        cursor = None
+        while True:
+            params = {"limit": "1000"}
+            if cursor:
+                params["cursor"] = cursor
+            async with self.http.session.get(self.base_url, params=params, headers=headers) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Blob list failed: {response.status} - {error_text}")
+                page = await response.json()
+            
+            for blob in page.get("blobs", []):
+                uploaded_at = datetime.fromisoformat(blob["uploadedAt"].replace("Z", "+00:00"))
+                yield blob["url"], uploaded_at.replace(tzinfo=None)
+            
+            cursor = page.get("cursor")
+            if not page.get("hasMore") or not cursor:
+                return
 
 # Global instance
 blob_service = VercelBlobService()
@@ -0,0 +1,76 @@
+"""
+Bulk admin operations
+Applies one set-based UPDATE ... RETURNING to a list of provider ids and
+reports a per-id outcome, instead of loading and committing each row.
+"""
+import logging
+from typing import Dict, List
+
+from sqlalchemy import func, update
+
+from services.dashboard_stats import dashboard_stats
+from services.pagination import invalidate_counts
+
+logger = logging.getLogger(__name__)
+
+
+def unique_ids(ids: List[int]) -> List[int]:
+    """Requested ids without duplicates, in request order"""
+    return list(dict.fromkeys(ids))
+
+
+def bulk_update(db, model, ids: List[int], values: Dict, returning: List[str]) -> dict:
+    """
+    UPDATE every row of model whose id is in ids, in one statement
+
+    values maps column names to new values or SQL expressions (evaluated
+    per row, e.g. not_(model.is_active)). Returns {"updated": n,
+    "not_found": n, "results": [...]} with one entry per requested id.
+    """
+    ids = unique_ids(ids)
+    statement = (
+        update(model)
+        .where(model.id.in_(ids))
+        .values(**values)
+        .returning(model.id, *[getattr(model, column) for column in returning])
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        rows = {row.id: row._asdict() for row in db.execute(statement)}
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Counters on the dashboard and cached list totals depend on these flags
+    invalidate_counts()
+    dashboard_stats.invalidate()
+
+    results = []
+    for row_id in ids:
+        if row_id in rows:
+            results.append({**rows[row_id], "outcome": "updated"})
+        else:
+            results.append({"id": row_id, "outcome": "not_found"})
+
+    logger.info(f"Bulk update of {model.__tablename__}: {len(rows)} of {len(ids)} ids updated")
+    return {
+        "updated": len(rows),
+        "not_found": len(ids) - len(rows),
+        "results": results
+    }
+
+
+def verification_values(model, is_verified, is_active, admin_id: int) -> Dict:
+    """SET clause for a bulk verify/activate (verified_by/verified_at where the model has them)"""
+    values = {}
+    if is_verified is not None:
+        values["is_verified"] = is_verified
+        if hasattr(model, "verified_at"):
+            values["verified_at"] = func.now() if is_verified else None
+        if hasattr(model, "verified_by"):
+            values["verified_by"] = admin_id
+    if is_active is not None:
+        values["is_active"] = is_active
+    values["updated_at"] = func.now()
+    return values
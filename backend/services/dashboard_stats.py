@@ -0,0 +1,197 @@
+"""
+Admin dashboard statistics
+Computes every dashboard counter in a single round trip (one aggregate
+subquery per table using COUNT(*) FILTER) and keeps a snapshot refreshed
+in the background so dashboard loads do not hit the database at all
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, true
+
+from config import settings
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def compute_dashboard_stats(db) -> dict:
+    """All dashboard counters from one SELECT"""
+    from models import User, Doctor, Appointment, Prescription, Pharmacy, Clinic, AppointmentStatus
+
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    count = func.count()
+
+    users = select(
+        count.label("patients"),
+        count.filter(User.created_at >= week_ago).label("new_patients_7d")
+    ).select_from(User).subquery()
+    doctors = select(
+        count.label("doctors"),
+        count.filter(Doctor.is_verified == False).label("unverified_doctors"),
+        count.filter(Doctor.created_at >= week_ago).label("new_doctors_7d")
+    ).select_from(Doctor).subquery()
+    appointments = select(
+        count.label("appointments"),
+        count.filter(Appointment.status == AppointmentStatus.PENDING).label("pending_appointments"),
+        count.filter(Appointment.status == AppointmentStatus.CONFIRMED).label("confirmed_appointments")
+    ).select_from(Appointment).subquery()
+    prescriptions = select(
+        count.label("prescriptions")
+    ).select_from(Prescription).subquery()
+    pharmacies = select(
+        count.label("pharmacies"),
+        count.filter(Pharmacy.is_verified == False, Pharmacy.is_active == True).label("unverified_pharmacies"),
+        count.filter(Pharmacy.created_at >= week_ago).label("new_pharmacies_7d")
+    ).select_from(Pharmacy).subquery()
+    clinics = select(
+        count.label("clinics"),
+        count.filter(Clinic.is_verified == False, Clinic.is_active == True).label("unverified_clinics"),
+        count.filter(Clinic.created_at >= week_ago).label("new_clinics_7d")
+    ).select_from(Clinic).subquery()
+
+    # Each subquery yields exactly one row, so joining them ON TRUE gives one row
+    row = db.execute(
+        select(users, doctors, appointments, prescriptions, pharmacies, clinics).select_from(
+            users
+            .join(doctors, true())
+            .join(appointments, true())
+            .join(prescriptions, true())
+            .join(pharmacies, true())
+            .join(clinics, true())
+        )
+    ).mappings().one()
+
+    return {
+        "totals": {
+            "patients": row["patients"],
+            "doctors": row["doctors"],
+            "appointments": row["appointments"],
+            "prescriptions": row["prescriptions"],
+            "pharmacies": row["pharmacies"],
+            "clinics": row["clinics"]
+        },
+        "pending": {
+            "unverified_doctors": row["unverified_doctors"],
+            "unverified_pharmacies": row["unverified_pharmacies"],
+            "unverified_clinics": row["unverified_clinics"],
+            "pending_appointments": row["pending_appointments"],
+            "confirmed_appointments": row["confirmed_appointments"]
+        },
+        "recent": {
+            "new_patients_7d": row["new_patients_7d"],
+            "new_doctors_7d": row["new_doctors_7d"],
+            "new_pharmacies_7d": row["new_pharmacies_7d"],
+            "new_clinics_7d": row["new_clinics_7d"]
+        }
+    }
+
+
+class DashboardStatsSnapshot:
+    """
+    Dashboard counters refreshed every `interval` seconds in the background
+
+    Like the room status cache, the loop only runs queries while an admin
+    has looked at the dashboard within `idle_after` seconds. A read that
+    finds no snapshot, or one older than `max_age`, computes it inline.
+    The queries are blocking, so they always run in a worker thread.
+    """
+
+    def __init__(self, interval: float, max_age: float, idle_after: float = 600.0, session_factory=SessionLocal):
+        self.interval = interval
+        self.max_age = max_age
+        self.idle_after = idle_after
+        self.session_factory = session_factory
+        self._stats: Optional[dict] = None
+        self._generated_at: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None  # time.monotonic() of last refresh
+        self._last_demand = 0.0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def _age(self) -> Optional[float]:
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+
+    def _store(self, stats: dict):
+        self._stats = stats
+        self._generated_at = datetime.utcnow()
+        self._refreshed_at = time.monotonic()
+
+    def _response(self) -> dict:
+        return {
+            **self._stats,
+            "generated_at": self._generated_at.isoformat(),
+            "snapshot_age_seconds": round(self._age(), 3)
+        }
+
+    def invalidate(self):
+        """Force the next read to recompute (after admin writes that change the counters)"""
+        self._refreshed_at = None
+
+    def _compute(self) -> dict:
+        """compute_dashboard_stats with a short-lived session (runs in a worker thread)"""
+        db = self.session_factory()
+        try:
+            return compute_dashboard_stats(db)
+        finally:
+            db.close()
+
+    async def refresh(self):
+        """Recompute the snapshot with a short-lived session"""
+        async with self._lock:
+            self._store(await asyncio.to_thread(self._compute))
+
+    async def get(self, db, fresh: bool = False) -> dict:
+        """
+        Snapshot plus its age; fresh=True recomputes with the caller's session
+        """
+        self._last_demand = time.monotonic()
+
+        if fresh:
+            self._store(await asyncio.to_thread(compute_dashboard_stats, db))
+            return self._response()
+
+        age = self._age()
+        if age is None or age > self.max_age:
+            async with self._lock:
+                # Another request may have refreshed while we waited
+                age = self._age()
+                if age is None or age > self.max_age:
+                    self._store(await asyncio.to_thread(compute_dashboard_stats, db))
+        return self._response()
+
+    async def _run(self):
+        while True:
+            if time.monotonic() - self._last_demand <= self.idle_after:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.warning(f"Dashboard stats refresh failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the background refresher (call from app startup)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background refresher (call from app shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instance
+dashboard_stats = DashboardStatsSnapshot(
+    interval=settings.ADMIN_STATS_REFRESH_SECONDS,
+    max_age=settings.ADMIN_STATS_MAX_AGE_SECONDS
+)
@@ -0,0 +1,252 @@
+"""
+Admin bulk export
+Streams whole tables out as CSV, NDJSON or Parquet. Rows are read with a
+server-side cursor (yield_per) and encoded one partition at a time, so
+memory use does not depend on how many rows are exported.
+"""
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import Boolean, Float, Integer, and_, or_, select
+
+from database import SessionLocal
+from services.analytics import db_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Optional Parquet support - pyarrow is large, so it is not a hard requirement
+PARQUET_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pass
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows fetched from the cursor (and encoded) per partition
+BATCH_SIZE = 2000
+
+
+class ExportDataset:
+    """One exportable table: its columns and the status values it can be filtered by"""
+
+    def __init__(self, model_name: str, columns: List[str], statuses: Optional[Dict[str, Dict]] = None):
+        self.model_name = model_name
+        self.columns = columns
+        # status value -> {column: required value}; None means filter on the `status` column
+        self.statuses = statuses
+
+    @property
+    def model(self):
+        import models
+        return getattr(models, self.model_name)
+
+    def status_values(self) -> List[str]:
+        if self.statuses is not None:
+            return list(self.statuses)
+        return [member.value for member in self.model.status.type.enum_class]
+
+    def status_condition(self, value: str):
+        model = self.model
+        if self.statuses is None:
+            return model.status == model.status.type.enum_class(value)
+        return and_(*[getattr(model, column) == required for column, required in self.statuses[value].items()])
+
+
+DATASETS = {
+    "patients": ExportDataset(
+        "User",
+        ["id", "phone", "name", "date_of_birth", "blood_group", "height", "weight",
+         "country", "state", "city", "is_active", "created_at", "updated_at"],
+        statuses={"active": {"is_active": True}, "inactive": {"is_active": False}}
+    ),
+    "doctors": ExportDataset(
+        "Doctor",
+        ["id", "phone", "full_name", "name", "specialization", "license_number", "bmdc_number",
+         "is_verified", "is_active", "average_rating", "total_ratings", "created_at", "updated_at"],
+        statuses={
+            "active": {"is_active": True},
+            "inactive": {"is_active": False},
+            "verified": {"is_verified": True},
+            "unverified": {"is_verified": False},
+        }
+    ),
+    "appointments": ExportDataset(
+        "Appointment",
+        ["id", "patient_id", "doctor_id", "appointment_date", "time_slot", "status",
+         "symptoms", "created_at", "updated_at"]
+    ),
+    "prescriptions": ExportDataset(
+        "Prescription",
+        ["id", "prescription_id", "appointment_id", "patient_id", "doctor_id", "diagnosis",
+         "medications", "lab_tests", "advice", "follow_up", "created_at", "updated_at"],
+        statuses={}
+    ),
+    "quotations": ExportDataset(
+        "QuotationRequest",
+        ["id", "patient_id", "prescription_id", "status", "patient_notes", "created_at", "updated_at"]
+    ),
+    "quotation_responses": ExportDataset(
+        "QuotationResponse",
+        ["id", "quotation_request_id", "pharmacy_id", "status", "subtotal", "delivery_charge",
+         "total_amount", "estimated_delivery_time", "quoted_items", "created_at", "updated_at"]
+    ),
+}
+
+
+def build_export_query(db, dataset: ExportDataset, start: Optional[date], end: Optional[date], statuses: List[str]):
+    """SELECT of the dataset columns in id order, filtered by created_at day range (UTC) and status"""
+    model = dataset.model
+    query = select(*[getattr(model, column) for column in dataset.columns]).order_by(model.id)
+    if start is not None:
+        since = datetime.combine(start, dt_time.min, tzinfo=timezone.utc)
+        query = query.where(model.created_at >= db_timestamp(db, since))
+    if end is not None:
+        until = datetime.combine(end + timedelta(days=1), dt_time.min, tzinfo=timezone.utc)
+        query = query.where(model.created_at < db_timestamp(db, until))
+    if statuses:
+        query = query.where(or_(*[dataset.status_condition(value) for value in statuses]))
+    return query
+
+
+def _plain(value):
+    """Column value -> JSON/CSV friendly scalar"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _csv_cell(value):
+    value = _plain(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _partitions(dataset: ExportDataset, start, end, statuses) -> Iterator[list]:
+    """Row partitions from a server-side cursor; the session lives as long as the stream"""
+    db = SessionLocal()
+    try:
+        query = build_export_query(db, dataset, start, end, statuses)
+        result = db.execute(query.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _encode_csv(columns: List[str], partitions) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in partitions:
+        writer.writerows([_csv_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(columns: List[str], partitions) -> Iterator[bytes]:
+    for rows in partitions:
+        lines = [
+            json.dumps({column: _plain(value) for column, value in zip(columns, row)}, ensure_ascii=False, default=str)
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the generator instead of keeping them"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema(dataset: ExportDataset):
+    """Integers, floats and booleans keep their type; everything else is written as text"""
+    fields = []
+    for column in dataset.columns:
+        column_type = getattr(dataset.model, column).type
+        if isinstance(column_type, Boolean):
+            fields.append((column, pa.bool_()))
+        elif isinstance(column_type, Integer):
+            fields.append((column, pa.int64()))
+        elif isinstance(column_type, Float):
+            fields.append((column, pa.float64()))
+        else:
+            fields.append((column, pa.string()))
+    return pa.schema(fields)
+
+
+def _encode_parquet(dataset: ExportDataset, partitions) -> Iterator[bytes]:
+    """One Parquet row group per partition; nested JSON columns are stored as JSON strings"""
+    schema = _parquet_schema(dataset)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for rows in partitions:
+        data = {}
+        for i, field in enumerate(schema):
+            values = [row[i] for row in rows]
+            if pa.types.is_string(field.type):
+                values = [None if value is None else str(_csv_cell(value)) for value in values]
+            data[field.name] = values
+        writer.write_table(pa.table(data, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(name: str, fmt: str, start: Optional[date] = None, end: Optional[date] = None,
+                  statuses: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Encoded chunks of one dataset (a sync generator: Starlette runs it in a worker thread)"""
+    dataset = DATASETS[name]
+    partitions = _partitions(dataset, start, end, statuses or [])
+    encoder = {"csv": _encode_csv, "ndjson": _encode_ndjson, "parquet": _encode_parquet}[fmt]
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for partition in partitions:
+            rows += len(partition)
+            yield partition
+
+    try:
+        yield from encoder(dataset if fmt == "parquet" else dataset.columns, counted())
+    finally:
+        logger.info(f"Exported {rows} {name} rows as {fmt}")
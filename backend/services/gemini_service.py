@@ -6,12 +6,25 @@ import os
 os.environ['GOOGLE_API_KEY'] = ""  # Will be set from config
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from config import settings
 import json
+import logging
 import re
+import time
 from typing import Dict, List, Optional
 from pathlib import Path
 
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("llm_request_duration_seconds", "Latency of Gemini generate_content calls")
+metrics.describe("llm_requests_total", "Gemini calls by method and outcome (success, error, timeout)")
+metrics.describe("llm_prompt_tokens_total", "Prompt tokens sent to Gemini")
+metrics.describe("llm_response_tokens_total", "Response (candidate) tokens returned by Gemini")
+metrics.describe("llm_fallback_total", "Times a method returned its fallback instead of a model answer")
+
 class GeminiService:
     """Service for interacting with Google Gemini AI"""
     
@@ -50,8 +63,68 @@ class GeminiService:
         
         # Use the stable 'gemini-2.5-flash' model (fast and reliable)
         model_id = 'gemini-2.5-flash'
+        self.model_id = model_id
         self.model = genai.GenerativeModel(model_id)
         print(f"✅ Using Gemini model: {model_id}\n")
+    
+    def _generate(self, method: str, prompt: str) -> str:
+        """
+        Call Gemini and record latency, token usage and errors
+        
+        Args:
+            method: Name of the calling service method (used as metric label)
+            prompt: Prompt text
+            
+        Returns:
+            The response text. Exceptions are re-raised after being counted.
+        """
+        labels = {"method": method}
+        start = time.perf_counter()
+        try:
+            response = self.model.generate_content(
+                prompt,
+                request_options={"timeout": settings.GEMINI_TIMEOUT_SECONDS}
+            )
+            text = response.text
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            outcome = "timeout" if isinstance(e, (google_exceptions.DeadlineExceeded, TimeoutError)) else "error"
+            metrics.observe("llm_request_duration_seconds", elapsed, labels)
+            metrics.inc("llm_requests_total", {"method": method, "outcome": outcome})
+            self._log_call(method, outcome, elapsed, error=f"{type(e).__name__}: {e}")
+            raise
+        
+        elapsed = time.perf_counter() - start
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        response_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        
+        metrics.observe("llm_request_duration_seconds", elapsed, labels)
+        metrics.inc("llm_requests_total", {"method": method, "outcome": "success"})
+        metrics.inc("llm_prompt_tokens_total", labels, prompt_tokens)
+        metrics.inc("llm_response_tokens_total", labels, response_tokens)
+        self._log_call(
+            method, "success", elapsed,
+            prompt_tokens=prompt_tokens,
+            response_tokens=response_tokens
+        )
+        return text
+    
+    def _record_fallback(self, method: str, reason: str):
+        """Count a fallback-path activation"""
+        metrics.inc("llm_fallback_total", {"method": method, "reason": reason})
+        logger.warning(json.dumps({"event": "llm_fallback", "method": method, "reason": reason}))
+    
+    def _log_call(self, method: str, outcome: str, elapsed: float, **fields):
+        """Emit one structured log line per LLM call"""
+        logger.info(json.dumps({
+            "event": "llm_call",
+            "model": self.model_id,
+            "method": method,
+            "outcome": outcome,
+            "latency_ms": round(elapsed * 1000, 1),
+            **fields
+        }))
         
     def _extract_json_from_response(self, text: str) -> dict:
         """Extract JSON from Gemini response, handling markdown code blocks"""
@@ -128,19 +201,12 @@ Rules:
 '''
 
         try:
-            response = self.model.generate_content(prompt)
-            
-            # Debug logging
-            print(f"\n=== GEMINI RAW RESPONSE ===")
-            print(response.text)
-            print(f"=== END RAW RESPONSE ===\n")
-            
-            result = self._extract_json_from_response(response.text)
+            response_text = self._generate("analyze_symptoms", prompt)
+            logger.debug("Gemini raw response: %s", response_text)
             
-            # Debug logging
-            print(f"=== PARSED RESULT ===")
-            print(json.dumps(result, indent=2))
-            print(f"=== END PARSED RESULT ===\n")
+            result = self._extract_json_from_response(response_text)
+            if "error" in result:
+                self._record_fallback("analyze_symptoms", "unparseable_response")
             
             # Validate required fields
             if "symptoms" not in result:
@@ -157,12 +223,8 @@ Rules:
             return result
             
         except Exception as e:
-            print(f"\n!!! GEMINI API ERROR !!!")
-            print(f"Error: {str(e)}")
-            print(f"Error type: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            print(f"!!! END ERROR !!!\n")
+            logger.exception("Gemini API error in analyze_symptoms")
+            self._record_fallback("analyze_symptoms", "exception")
             
             # Return a safe default response
             return {
@@ -229,11 +291,12 @@ Rank ALL available doctors from most to least relevant. Relevance score should b
 '''
 
         try:
-            response = self.model.generate_content(prompt)
-            result = self._extract_json_from_response(response.text)
+            response_text = self._generate("recommend_doctors", prompt)
+            result = self._extract_json_from_response(response_text)
             
             # Validate structure
             if "recommendations" not in result:
+                self._record_fallback("recommend_doctors", "missing_recommendations")
                 # Fallback: rank all doctors equally
                 result["recommendations"] = [
                     {
@@ -254,7 +317,8 @@ Rank ALL available doctors from most to least relevant. Relevance score should b
             return result
             
         except Exception as e:
-            print(f"Gemini API Error in recommendations: {str(e)}")
+            logger.error(f"Gemini API error in recommend_doctors: {str(e)}")
+            self._record_fallback("recommend_doctors", "exception")
             # Return all doctors with basic ranking
             return {
                 "recommendations": [
@@ -300,7 +364,9 @@ Provide a short, empathetic follow-up question or statement (1-2 sentences) to c
 '''
 
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            response_text = self._generate("generate_followup", prompt)
+            return response_text.strip()
         except Exception as e:
+            logger.error(f"Gemini API error in generate_followup: {str(e)}")
+            self._record_fallback("generate_followup", "exception")
             return "Is there anything else you'd like to tell me about your symptoms?"
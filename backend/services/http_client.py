@@ -0,0 +1,79 @@
+"""
+Shared outbound HTTP client
+One pooled aiohttp session for all outbound service calls (Vercel Blob,
+LiveKit) so requests reuse keep-alive TCP+TLS connections instead of
+paying the handshake on every call
+"""
+import logging
+from typing import Optional
+
+import aiohttp
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SharedHTTPClient:
+    """
+    Lifecycle-managed aiohttp.ClientSession
+
+    start() and close() are called from the app's startup and shutdown
+    hooks. The session is also created lazily on first use so scripts and
+    workers that never run the app hooks still work.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        total_timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session (created on first access)"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    async def start(self):
+        """Open the pool (call from app startup)"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            logger.info(
+                f"Shared HTTP client started (limit={self.limit}, per_host={self.limit_per_host})"
+            )
+
+    async def close(self):
+        """Close pooled connections (call from app shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Global instance
+http_client = SharedHTTPClient(
+    limit=settings.HTTP_POOL_LIMIT,
+    limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+    dns_cache_ttl=settings.HTTP_DNS_CACHE_TTL_SECONDS,
+    total_timeout=settings.HTTP_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,125 @@
+"""
+Image derivative service
+Renders thumbnail and medium WebP variants of uploaded images in a
+process pool and stores them next to the original
+"""
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from config import settings
+from services.blob_service import blob_service
+
+logger = logging.getLogger(__name__)
+
+# Optional image processing - Pillow may be missing on slim deployments
+IMAGE_PROCESSING_AVAILABLE = False
+try:
+    from PIL import Image, ImageOps
+    IMAGE_PROCESSING_AVAILABLE = True
+except ImportError:
+    pass
+
+# Variant name -> longest edge in pixels
+VARIANTS = {
+    "thumb": 128,
+    "medium": 512,
+}
+
+IMAGE_CONTENT_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
+
+
+def render_variants(data: bytes, sizes: Dict[str, int], quality: int = 80) -> Dict[str, bytes]:
+    """
+    Decode an image and encode one WebP per requested size
+
+    Runs inside a worker process, so it must stay a module-level function
+    that only takes and returns picklable values.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        rendered = {}
+        for name, edge in sizes.items():
+            variant = image.copy()
+            variant.thumbnail((edge, edge), Image.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, format="WEBP", quality=quality, method=4)
+            rendered[name] = buffer.getvalue()
+        return rendered
+
+
+class ImageDerivativeService:
+    """Generates, stores and looks up image variants for uploaded files"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self):
+        """Stop worker processes (call from app shutdown)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def create_variants(self, db, upload, stored: dict) -> Optional[Dict[str, str]]:
+        """
+        Build thumb/medium WebP variants for a stored upload
+
+        Reuses the variants recorded on the stored_blobs row when the same
+        content was uploaded before. Returns a {variant: url} map, or None
+        when the file is not an image or Pillow is unavailable. Failures are
+        logged and never fail the upload itself.
+
+        Args:
+            db: Session of the request (the stored_blobs update joins its transaction)
+            upload: The UploadFile that was just stored (rewound and re-read here)
+            stored: Result of blob_service.store_upload()
+        """
+        if not IMAGE_PROCESSING_AVAILABLE:
+            return None
+        if (getattr(upload, "content_type", None) or "") not in IMAGE_CONTENT_TYPES:
+            return None
+
+        from models import StoredBlob
+
+        sha256 = stored["sha256"]
+        blob = db.query(StoredBlob).filter(StoredBlob.sha256 == sha256).first()
+        if blob is not None and blob.variants:
+            return blob.variants
+
+        try:
+            # Callers cap uploads (5MB pictures, 10MB certificates); decoding needs the whole image anyway
+            await upload.seek(0)
+            data = await upload.read()
+
+            loop = asyncio.get_running_loop()
+            rendered = await loop.run_in_executor(
+                self.pool, render_variants, data, VARIANTS, settings.IMAGE_WEBP_QUALITY
+            )
+
+            variant_urls = {}
+            for name, content in rendered.items():
+                path = f"variants/{sha256[:2]}/{sha256}_{name}.webp"
+                variant_urls[name] = await blob_service.put_bytes(content, path, "image/webp")
+        except Exception as e:
+            logger.error(f"Failed to generate image variants for {sha256}: {str(e)}")
+            return None
+
+        if blob is not None:
+            blob.variants = variant_urls
+        return variant_urls
+
+
+# Global instance
+image_service = ImageDerivativeService(max_workers=settings.IMAGE_WORKERS)
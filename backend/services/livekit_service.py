@@ -1,22 +1,45 @@
 """
 LiveKit service for generating access tokens and managing video rooms
 """
+import asyncio
 import os
+import threading
+from collections import defaultdict
 from datetime import timedelta
 import logging
 import aiohttp
 import time
+from cachetools import TTLCache
 from jose import jwt
 
 # Import LiveKit Server SDK components
-from livekit.api import AccessToken, VideoGrants
+from livekit.api import AccessToken, VideoGrants, TokenVerifier, WebhookReceiver
+
+from services.http_client import SharedHTTPClient, http_client as shared_http_client
 
 logger = logging.getLogger(__name__)
 
+# Permissions granted to appointment participants
+VIDEO_GRANTS = {
+    'room_join': True,
+    'can_publish': True,
+    'can_subscribe': True,
+    'can_publish_data': True
+}
+
 class LiveKitService:
-    def __init__(self):
+    def __init__(self, http_client: SharedHTTPClient = None):
         # Import here to avoid circular dependencies
         from config import settings
+        self.settings = settings
+        self.http = http_client or shared_http_client
+        
+        # Issued access tokens: (room, identity, name, grants, ttl) -> {'data', 'expires_at'}
+        self._token_cache = TTLCache(
+            maxsize=settings.LIVEKIT_TOKEN_CACHE_SIZE,
+            ttl=settings.LIVEKIT_TOKEN_TTL_SECONDS
+        )
+        self._token_lock = threading.Lock()
         self.api_key = settings.LIVEKIT_API_KEY
         self.api_secret = settings.LIVEKIT_API_SECRET
         self.livekit_url = settings.LIVEKIT_URL
@@ -25,48 +48,73 @@ class LiveKitService:
         logger.info(f"LiveKit Service initialized with URL: {self.livekit_url}")
         self.room_service = None  # Not needed, we'll use HTTP API directly
         
-    def generate_access_token(self, room_name: str, participant_identity: str, participant_name: str = None):
+    def generate_access_token(self, room_name: str, participant_identity: str, participant_name: str = None, ttl_seconds: int = None):
         """
         Generate access token for a participant to join a room
+        
+        Tokens are cached per (room, identity, name, grants, ttl) and reused until
+        LIVEKIT_TOKEN_REFRESH_MARGIN_SECONDS before they expire, so reconnect
+        storms do not re-sign a token on every join.
         """
+        ttl = ttl_seconds or self.settings.LIVEKIT_TOKEN_TTL_SECONDS
+        cache_key = (room_name, participant_identity, participant_name, tuple(sorted(VIDEO_GRANTS.items())), ttl)
+        now = time.time()
+        
+        with self._token_lock:
+            cached = self._token_cache.get(cache_key)
+            if cached and cached['expires_at'] - now > self.settings.LIVEKIT_TOKEN_REFRESH_MARGIN_SECONDS:
+                logger.debug(f"Reusing cached LiveKit token for {participant_identity} in {room_name}")
+                return cached['data']
+        
         try:
-            print(f"\n🎫 GENERATING TOKEN:")
-            print(f"   Room: {room_name}")
-            print(f"   Identity: {participant_identity}")
-            print(f"   Name: {participant_name}")
-            
             # Create access token
             token = AccessToken(self.api_key, self.api_secret)
             
-            # Set token identity and name
-            token = token.with_identity(participant_identity)
+            # Set token identity, name and lifetime
+            token = token.with_identity(participant_identity).with_ttl(timedelta(seconds=ttl))
             if participant_name:
                 token = token.with_name(participant_name)
             
             # Grant permissions
-            token = token.with_grants(VideoGrants(
-                room_join=True,
-                room=room_name,
-                can_publish=True,
-                can_subscribe=True,
-                can_publish_data=True
-            ))
+            token = token.with_grants(VideoGrants(room=room_name, **VIDEO_GRANTS))
             
             # Generate JWT token
             jwt_token = token.to_jwt()
+            logger.debug(f"Generated LiveKit token for {participant_identity} in {room_name} (ttl {ttl}s)")
             
-            print(f"   ✅ Token generated successfully")
-            
-            return {
+            data = {
                 'token': jwt_token,
                 'url': self.livekit_url,
                 'room_name': room_name
             }
+            with self._token_lock:
+                self._token_cache[cache_key] = {'data': data, 'expires_at': now + ttl}
+            return data
             
         except Exception as e:
             logger.error(f"Error generating LiveKit token: {str(e)}")
             raise Exception(f"Failed to generate access token: {str(e)}")
     
+    def revoke_room_tokens(self, room_prefix: str) -> int:
+        """
+        Drop cached tokens for every room whose name starts with room_prefix
+        
+        Call when an appointment is cancelled so no cached token is handed
+        out again. Already-issued JWTs stay valid until they expire, which
+        is why LIVEKIT_TOKEN_TTL_SECONDS is kept short.
+        """
+        with self._token_lock:
+            stale = [key for key in list(self._token_cache.keys()) if key[0].startswith(room_prefix)]
+            for key in stale:
+                self._token_cache.pop(key, None)
+        if stale:
+            logger.info(f"Revoked {len(stale)} cached LiveKit token(s) for {room_prefix}*")
+        return len(stale)
+    
+    def revoke_appointment_tokens(self, appointment_id: int) -> int:
+        """Revocation hook for a cancelled appointment"""
+        return self.revoke_room_tokens(f"appointment_{appointment_id}_")
+    
     async def create_room(self, room_name: str, max_participants: int = 10):
         """
         Create a new LiveKit room
@@ -88,80 +136,86 @@ class LiveKitService:
         logger.info(f"Room end requested for {room_name} - will be auto-cleaned when empty")
         return {'message': f'Room {room_name} will end automatically when all participants leave'}
     
+    def receive_webhook(self, body: str, auth_header: str):
+        """
+        Verify a LiveKit webhook request and parse its event
+        
+        The Authorization header carries a JWT signed with our API secret
+        whose sha256 claim must match the request body. Raises on mismatch.
+        """
+        token = auth_header[7:] if auth_header.lower().startswith('bearer ') else auth_header
+        if not token:
+            raise ValueError("Missing webhook signature")
+        receiver = WebhookReceiver(TokenVerifier(self.api_key, self.api_secret))
+        return receiver.receive(body, token)
+    
+    def _api_url(self) -> str:
+        """HTTP(S) base URL for the LiveKit server API"""
+        return self.livekit_url.replace('wss://', 'https://').replace('ws://', 'http://')
+    
+    def _api_token(self) -> str:
+        """Short-lived server API token with room listing permission"""
+        now = int(time.time())
+        payload = {
+            'iss': self.api_key,
+            'sub': self.api_key,
+            'iat': now,
+            'exp': now + 3600,
+            'video': {'roomList': True}
+        }
+        return jwt.encode(payload, self.api_secret, algorithm='HS256')
+    
+    async def list_rooms(self) -> dict:
+        """
+        Call ListRooms once and return a map of room name -> room summary
+        
+        Raises an exception if the LiveKit API does not answer with 200.
+        """
+        async with self.http.session.post(
+            f'{self._api_url()}/twirp/livekit.RoomService/ListRooms',
+            headers={
+                'Authorization': f'Bearer {self._api_token()}',
+                'Content-Type': 'application/json'
+            },
+            json={},  # Empty body for ListRooms
+            timeout=aiohttp.ClientTimeout(total=5.0)
+        ) as response:
+            if response.status != 200:
+                text = await response.text()
+                raise Exception(f"LiveKit API error: {response.status} - {text}")
+            data = await response.json()
+        
+        rooms = {}
+        for room in data.get('rooms', []):
+            # LiveKit API returns 'num_participants' (snake_case), not 'numParticipants' (camelCase)
+            rooms[room.get('name')] = {
+                'name': room.get('name'),
+                'num_participants': room.get('num_participants', 0),
+                'num_publishers': room.get('num_publishers', 0),
+                'is_active': True
+            }
+        return rooms
+    
     async def get_room_info(self, room_name: str):
         """
         Get information about a LiveKit room using HTTP API
+        
+        Lists all rooms on every call; request handlers should use
+        room_status_cache instead.
         """
-        print(f"\n🔍 GET_ROOM_INFO CALLED for: {room_name}")
         try:
-            # Prepare API request
-            api_url = self.livekit_url.replace('wss://', 'https://').replace('ws://', 'http://')
-            print(f"   API URL: {api_url}")
+            rooms = await self.list_rooms()
+            logger.info(f"🏠 Found {len(rooms)} rooms total")
+            if room_name in rooms:
+                return rooms[room_name]
             
-            # Create JWT token for API authorization
-            now = int(time.time())
-            payload = {
-                'iss': self.api_key,
-                'sub': self.api_key,
-                'iat': now,
-                'exp': now + 3600,
-                'video': {'roomList': True}
+            # Room not found
+            logger.info(f"Room {room_name} not found (inactive)")
+            return {
+                'name': room_name,
+                'num_participants': 0,
+                'is_active': False
             }
-            
-            token = jwt.encode(payload, self.api_secret, algorithm='HS256')
-            print(f"   Token created: {token[:50]}...")
-            
-            # Make HTTP request to list rooms (LiveKit API uses POST, not GET)
-            logger.info(f"🔗 Calling LiveKit API for room: {room_name}")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f'{api_url}/twirp/livekit.RoomService/ListRooms',
-                    headers={
-                        'Authorization': f'Bearer {token}',
-                        'Content-Type': 'application/json'
-                    },
-                    json={},  # Empty body for ListRooms
-                    timeout=aiohttp.ClientTimeout(total=5.0)
-                ) as response:
-                    logger.info(f"📡 LiveKit API response status: {response.status}")
-                    if response.status == 200:
-                        data = await response.json()
-                        logger.info(f"📦 LiveKit API data: {data}")
-                        rooms = data.get('rooms', [])
-                        logger.info(f"🏠 Found {len(rooms)} rooms total")
-                        
-                        # Find the specified room
-                        for room in rooms:
-                            if room.get('name') == room_name:
-                                # LiveKit API returns 'num_participants' (snake_case), not 'numParticipants' (camelCase)
-                                num_participants = room.get('num_participants', 0)
-                                num_publishers = room.get('num_publishers', 0)
-                                print(f"\n📦 ROOM FOUND: {room_name}")
-                                print(f"   Participants: {num_participants}, Publishers: {num_publishers}")
-                                logger.info(f"✅ Room {room_name} found with {num_participants} participants ({num_publishers} publishers)")
-                                return {
-                                    'name': room_name,
-                                    'num_participants': num_participants,
-                                    'num_publishers': num_publishers,
-                                    'is_active': True
-                                }
-                        
-                        # Room not found
-                        logger.info(f"Room {room_name} not found (inactive)")
-                        return {
-                            'name': room_name,
-                            'num_participants': 0,
-                            'is_active': False
-                        }
-                    else:
-                        text = await response.text()
-                        logger.error(f"LiveKit API error: {response.status} - {text}")
-                        return {
-                            'name': room_name,
-                            'num_participants': 0,
-                            'is_active': False
-                        }
-                    
         except Exception as e:
             logger.error(f"Error getting room info for {room_name}: {str(e)}")
             return {
@@ -170,5 +224,185 @@ class LiveKitService:
                 'is_active': False
             }
 
-# Global instance
-livekit_service = LiveKitService()
\ No newline at end of file
+
+class RoomStatusCache:
+    """
+    Shared room -> participants map fed by a single ListRooms poller
+    
+    All waiting clients read from the same snapshot, so N pollers cost one
+    ListRooms call per interval instead of N. The background loop only polls
+    while someone has asked for a room recently; a read that finds the
+    snapshot older than max_age refreshes it inline (single-flight).
+    """
+    
+    def __init__(self, service: LiveKitService, interval: float, max_age: float, idle_after: float = 30.0):
+        self.service = service
+        self.interval = interval
+        self.max_age = max_age
+        self.idle_after = idle_after
+        self._rooms = {}
+        self._refreshed_at = None  # time.monotonic() of last successful refresh
+        self._last_demand = 0.0
+        self._lock = asyncio.Lock()
+        self._task = None
+    
+    def _age(self):
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+    
+    def _is_fresh(self) -> bool:
+        age = self._age()
+        return age is not None and age <= self.max_age
+    
+    async def refresh(self):
+        """Fetch the room list once and replace the snapshot"""
+        async with self._lock:
+            rooms = await self.service.list_rooms()
+            self._rooms = rooms
+            self._refreshed_at = time.monotonic()
+    
+    async def get(self, room_name: str) -> dict:
+        """Room info for room_name, never older than max_age seconds"""
+        self._last_demand = time.monotonic()
+        
+        if not self._is_fresh():
+            try:
+                async with self._lock:
+                    # Another waiter may have refreshed while we queued on the lock
+                    if not self._is_fresh():
+                        self._rooms = await self.service.list_rooms()
+                        self._refreshed_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Room status refresh failed: {str(e)}")
+                return {
+                    'name': room_name,
+                    'num_participants': 0,
+                    'is_active': False,
+                    'age_seconds': None
+                }
+        
+        info = self._rooms.get(room_name) or {
+            'name': room_name,
+            'num_participants': 0,
+            'is_active': False
+        }
+        return {**info, 'age_seconds': round(self._age(), 3)}
+    
+    def apply_participant_count(self, room_name: str, num_participants: int):
+        """Update one room in the snapshot from a pushed (webhook) event"""
+        if num_participants <= 0:
+            self._rooms.pop(room_name, None)
+            return
+        room = self._rooms.get(room_name) or {'name': room_name, 'num_publishers': 0}
+        self._rooms[room_name] = {**room, 'num_participants': num_participants, 'is_active': True}
+    
+    async def _run(self):
+        while True:
+            if time.monotonic() - self._last_demand <= self.idle_after:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.warning(f"Room status poll failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        """Start the background poller (call from app startup)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background poller (call from app shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+class RoomEventHub:
+    """
+    Fans LiveKit webhook events out to per-room subscribers (SSE streams)
+    
+    Keeps the identities seen joining each room so clients can be told
+    when the other party joins or leaves, and pushes the participant count
+    reported in the webhook into the room status cache. The identity sets
+    are per process (best effort after a restart); the count is not.
+    """
+    
+    QUEUE_SIZE = 100
+    
+    def __init__(self, cache: RoomStatusCache):
+        self.cache = cache
+        self._subscribers = defaultdict(set)
+        self._participants = defaultdict(set)
+    
+    def subscribe(self, room_name: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._subscribers[room_name].add(queue)
+        return queue
+    
+    def unsubscribe(self, room_name: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(room_name)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[room_name]
+    
+    def participants(self, room_name: str) -> list:
+        return sorted(self._participants.get(room_name, ()))
+    
+    def publish(self, event) -> dict:
+        """Apply a parsed WebhookEvent and push it to the room's subscribers"""
+        room_name = event.room.name
+        identity = event.participant.identity if event.HasField('participant') else None
+        
+        if event.event == 'participant_joined' and identity:
+            self._participants[room_name].add(identity)
+        elif event.event == 'participant_left' and identity:
+            self._participants[room_name].discard(identity)
+        elif event.event == 'room_finished':
+            self._participants.pop(room_name, None)
+        
+        present = self._participants.get(room_name, set())
+        # The server's own count; the identity set above only holds webhooks this process received
+        num_participants = 0 if event.event == 'room_finished' else event.room.num_participants
+        if event.event in ('participant_joined', 'participant_left', 'room_finished'):
+            self.cache.apply_participant_count(room_name, num_participants)
+        
+        payload = {
+            'event': event.event,
+            'room_name': room_name,
+            'identity': identity,
+            'role': identity.split('_', 1)[0] if identity else None,
+            'participants': sorted(present),
+            'num_participants': num_participants,
+            'created_at': event.created_at
+        }
+        
+        for queue in list(self._subscribers.get(room_name, ())):
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than block the webhook
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(payload)
+        
+        logger.info(f"LiveKit webhook {event.event} for {room_name} ({identity}), "
+                    f"{len(self._subscribers.get(room_name, ()))} subscriber(s)")
+        return payload
+
+
+# Global instances
+livekit_service = LiveKitService()
+
+room_status_cache = RoomStatusCache(
+    livekit_service,
+    interval=livekit_service.settings.LIVEKIT_ROOM_POLL_INTERVAL_SECONDS,
+    max_age=livekit_service.settings.LIVEKIT_ROOM_STATUS_MAX_AGE_SECONDS
+)
+
+room_event_hub = RoomEventHub(room_status_cache)
@@ -0,0 +1,105 @@
+"""
+In-process metrics registry
+Collects counters and latency histograms and renders them in the
+Prometheus text exposition format for the /metrics endpoint
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+# Latency buckets in seconds (LLM calls routinely take several seconds)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key)
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{str(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe registry of counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str):
+        """Register a HELP line for a metric"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1):
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None, buckets=DEFAULT_BUCKETS):
+        """Record a value in a histogram"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in series.items():
+                    for bound, count in zip(h.buckets, h.counts):
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {h.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {h.total}")
+                    lines.append(f"{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded values"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Global instance
+metrics = MetricsRegistry()
@@ -0,0 +1,353 @@
+"""
+Patient notifications
+Buffers notification rows published by request handlers and writes them
+with one multi-row INSERT ... RETURNING per flush, keeps a cached unread
+counter per user and pushes new rows to the user's open SSE streams.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import List, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from config import settings
+from database import SessionLocal
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("notifications_written_total", "Notification rows inserted by the batched writer")
+metrics.describe("notifications_dropped_total", "Notification rows dropped (row rejected by the database, or buffer full)")
+
+# Columns returned by the batched INSERT and sent to clients
+NOTIFICATION_FIELDS = ("id", "user_id", "title", "message", "category", "data", "is_read", "created_at")
+
+
+def notification(user_id: int, title: str, message: str, category: str = "general", data: Optional[dict] = None) -> dict:
+    """One row for NotificationService.publish"""
+    return {
+        "user_id": user_id,
+        "title": title,
+        "message": message,
+        "category": category,
+        "data": data,
+        "is_read": False,
+    }
+
+
+def _payload(row) -> dict:
+    payload = dict(row._mapping)
+    created_at = payload.get("created_at")
+    if created_at is not None:
+        payload["created_at"] = created_at.isoformat()
+    return payload
+
+
+class NotificationService:
+    """
+    Batched notification writer, unread counter cache and per-user push hub
+
+    publish() is called after the triggering transaction has committed, so
+    a notification never points at work that was rolled back. Rows are
+    buffered and the background loop inserts them every `flush_interval`
+    seconds (sooner once `batch_size` rows are waiting); without a running
+    loop (scripts, tests) publish() writes immediately. Buffered rows are
+    flushed on shutdown. If the database is unreachable the batch is kept
+    for the next flush (at most `max_pending` rows, oldest dropped first);
+    if the batch itself is rejected, its rows are retried one by one and
+    rows the database refuses (e.g. a deleted user) are logged and dropped.
+
+    Unread counts are cached for `unread_ttl` seconds and adjusted in place
+    when this process inserts or marks rows read; the TTL bounds how stale
+    a count can get when several app instances share the table. Like the
+    room event hub, SSE subscribers are per process.
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        unread_ttl: float,
+        max_pending: int = 50000,
+        session_factory=SessionLocal
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self._pending: List[dict] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._unread = TTLCache(maxsize=10000, ttl=unread_ttl)
+        self._unread_lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task = None
+
+    # Writing
+
+    def publish(self, rows: List[dict]):
+        """Queue notification rows (see notification()); safe to call from sync handlers"""
+        if not rows:
+            return
+        with self._pending_lock:
+            self._pending.extend(rows)
+            self._trim_pending()
+            backlog = len(self._pending)
+
+        if self._task is None or self._task.done():
+            self.flush()
+        elif backlog >= self.batch_size:
+            self._call_in_loop(self._wakeup.set)
+
+    def _trim_pending(self):
+        """Drop the oldest buffered rows beyond max_pending (caller holds _pending_lock)"""
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            metrics.inc("notifications_dropped_total", {"reason": "buffer_full"}, overflow)
+            logger.error(f"Notification buffer full, dropped the {overflow} oldest rows")
+
+    def _insert(self, db, rows: List[dict]) -> List[dict]:
+        from models import Notification
+
+        result = db.execute(
+            insert(Notification).returning(*[getattr(Notification, field) for field in NOTIFICATION_FIELDS]),
+            rows
+        )
+        return [_payload(row) for row in result]
+
+    def _insert_one_by_one(self, db, rows: List[dict]) -> List[dict]:
+        """Fallback after a rejected batch: keep every row the database accepts"""
+        inserted = []
+        for position, row in enumerate(rows):
+            try:
+                inserted.extend(self._insert(db, [row]))
+                db.commit()
+            except (OperationalError, InterfaceError) as e:
+                # Database went away mid-way: keep the rest for the next flush
+                db.rollback()
+                with self._pending_lock:
+                    self._pending[:0] = rows[position:]
+                    self._trim_pending()
+                logger.warning(f"Notification flush interrupted, {len(rows) - position} rows kept: {str(e)}")
+                break
+            except Exception as e:
+                db.rollback()
+                metrics.inc("notifications_dropped_total", {"reason": "rejected"})
+                logger.error(f"Dropped notification for user {row.get('user_id')}: {str(e)}")
+        return inserted
+
+    def _write(self) -> List[dict]:
+        """Insert everything buffered in one statement; returns the inserted rows"""
+        with self._write_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return []
+
+            db = self.session_factory()
+            try:
+                inserted = self._insert(db, rows)
+                db.commit()
+            except (OperationalError, InterfaceError):
+                db.rollback()
+                # Database unreachable: keep the rows for the next flush
+                with self._pending_lock:
+                    self._pending[:0] = rows
+                    self._trim_pending()
+                db.close()
+                raise
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Notification batch of {len(rows)} rejected, inserting rows one by one: {str(e)}")
+                try:
+                    inserted = self._insert_one_by_one(db, rows)
+                finally:
+                    db.close()
+            else:
+                db.close()
+
+        metrics.inc("notifications_written_total", amount=len(inserted))
+        counts = defaultdict(int)
+        for payload in inserted:
+            counts[payload["user_id"]] += 1
+        for user_id, count in counts.items():
+            self._adjust_unread(user_id, count)
+        return inserted
+
+    def flush(self) -> int:
+        """Write buffered rows now (from a worker thread or without the loop); returns how many"""
+        inserted = self._write()
+        if inserted:
+            self._call_in_loop(self._deliver, inserted)
+        return len(inserted)
+
+    # Unread counter
+
+    def _adjust_unread(self, user_id: int, delta: int):
+        with self._unread_lock:
+            cached = self._unread.get(user_id)
+            if cached is not None:
+                self._unread[user_id] = max(cached + delta, 0)
+
+    def cached_unread(self, user_id: int) -> Optional[int]:
+        with self._unread_lock:
+            return self._unread.get(user_id)
+
+    def unread_count(self, db, user_id: int) -> int:
+        """Unread notifications of a user (COUNT on the partial index when not cached)"""
+        from models import Notification
+
+        cached = self.cached_unread(user_id)
+        if cached is not None:
+            return cached
+        count = db.execute(
+            select(func.count()).select_from(Notification).where(
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            )
+        ).scalar_one()
+        with self._unread_lock:
+            self._unread[user_id] = count
+        return count
+
+    def mark_read(self, db, user_id: int, ids: Optional[List[int]] = None, is_read: bool = True) -> List[int]:
+        """
+        Set is_read on the user's notifications (all of them when ids is None)
+
+        Only rows whose flag actually changes are updated, so the returned
+        ids give the exact counter adjustment.
+        """
+        from models import Notification
+
+        statement = (
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read == (not is_read))
+            .values(is_read=is_read, read_at=func.now() if is_read else None)
+            .returning(Notification.id)
+            .execution_options(synchronize_session=False)
+        )
+        if ids is not None:
+            statement = statement.where(Notification.id.in_(ids))
+        try:
+            changed = [row_id for (row_id,) in db.execute(statement)]
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        if changed:
+            self._adjust_unread(user_id, -len(changed) if is_read else len(changed))
+            self._call_in_loop(self._deliver_read, user_id, changed, is_read)
+        return changed
+
+    # Push
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[user_id]
+
+    def _call_in_loop(self, callback, *args):
+        """Run callback on the event loop thread (the subscriber queues are not thread-safe)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            callback(*args)
+        else:
+            loop.call_soon_threadsafe(callback, *args)
+
+    def _push(self, user_id: int, message: dict):
+        for queue in list(self._subscribers.get(user_id, ())):
+            if queue.full():
+                # Slow consumer: drop the oldest event rather than block the writer
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+
+    def _deliver(self, inserted: List[dict]):
+        for payload in inserted:
+            user_id = payload["user_id"]
+            if user_id in self._subscribers:
+                self._push(user_id, {"event": "notification", "data": payload})
+                self._push_unread(user_id)
+
+    def _deliver_read(self, user_id: int, ids: List[int], is_read: bool):
+        if user_id in self._subscribers:
+            self._push(user_id, {"event": "read", "data": {"ids": ids, "is_read": is_read}})
+            self._push_unread(user_id)
+
+    def _push_unread(self, user_id: int):
+        count = self.cached_unread(user_id)
+        if count is not None:
+            self._push(user_id, {"event": "unread_count", "data": {"unread_count": count}})
+
+    # Background writer
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                inserted = await asyncio.to_thread(self._write)
+            except Exception as e:
+                logger.warning(f"Notification flush failed: {str(e)}")
+                continue
+            self._deliver(inserted)
+
+    def start(self):
+        """Start the background writer (call from app startup)"""
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background writer and flush what is still buffered (call from app shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            self._deliver(await asyncio.to_thread(self._write))
+        except Exception as e:
+            logger.warning(f"Final notification flush failed: {str(e)}")
+
+
+# Global instance
+notification_service = NotificationService(
+    batch_size=settings.NOTIFICATION_BATCH_SIZE,
+    flush_interval=settings.NOTIFICATION_FLUSH_INTERVAL_SECONDS,
+    unread_ttl=settings.NOTIFICATION_UNREAD_TTL_SECONDS,
+    max_pending=settings.NOTIFICATION_MAX_PENDING
+)
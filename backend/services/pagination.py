@@ -0,0 +1,147 @@
+"""
+Pagination helpers for admin list endpoints
+Keyset (cursor) pagination on (created_at, id) and cheap totals: exact,
+cached exact, or a planner estimate
+"""
+import base64
+import json
+import threading
+from datetime import datetime
+from typing import Optional, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy import and_, or_, text
+
+from config import settings
+
+COUNT_MODES = ("exact", "cached", "estimate", "none")
+
+_count_cache = TTLCache(maxsize=1024, ttl=settings.ADMIN_COUNT_CACHE_TTL_SECONDS)
+_count_lock = threading.Lock()
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    payload = [created_at.isoformat() if created_at else None, row_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except Exception:
+        raise InvalidCursorError("Invalid pagination cursor")
+
+
+def order_newest_first(query, model):
+    """
+    Stable order shared by offset and keyset pages
+
+    Legacy rows without created_at count as oldest (NULLS LAST on every
+    dialect), matching after_cursor and newer_than_cursor.
+    """
+    return query.order_by(model.created_at.desc().nulls_last(), model.id.desc())
+
+
+def after_cursor(query, model, cursor: str):
+    """Rows strictly after the cursor in newest-first order (uses the (created_at, id) index)"""
+    created_at, row_id = decode_cursor(cursor)
+    if created_at is None:
+        # created_at has a server default; legacy rows without one come last, by id
+        return query.filter(model.created_at.is_(None), model.id < row_id)
+    return query.filter(
+        or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id),
+            model.created_at.is_(None)
+        )
+    )
+
+
+def fetch_page(query, model, limit: int, cursor: Optional[str] = None, skip: int = 0):
+    """
+    One page of rows newest first, plus the cursor for the next page
+
+    With a cursor, the page starts right after it (keyset: cost does not
+    grow with depth); otherwise offset `skip` is used for compatibility.
+    Returns (rows, next_cursor) where next_cursor is None on the last page.
+    """
+    if cursor:
+        query = after_cursor(query, model, cursor)
+    query = order_newest_first(query, model)
+    if not cursor and skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more and rows else None
+    return rows, next_cursor
+
+
+def _estimate(db, query) -> Optional[int]:
+    """Row estimate from the PostgreSQL planner (no table scan)"""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    statement = query.statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_total(db, query, mode: str = "exact") -> Tuple[Optional[int], bool]:
+    """
+    Total rows for a filtered query
+
+    Modes: exact (COUNT every time), cached (exact COUNT memoized for
+    ADMIN_COUNT_CACHE_TTL_SECONDS per filter set), estimate (planner row
+    estimate; falls back to cached elsewhere), none (skip counting).
+    Returns (total, is_estimate); is_estimate is True only for planner
+    estimates, cached totals are exact counts up to the TTL old.
+    """
+    if mode == "none":
+        return None, False
+    if mode == "exact":
+        return query.order_by(None).count(), False
+
+    if mode == "estimate":
+        estimate = _estimate(db, query.order_by(None))
+        if estimate is not None:
+            return estimate, True
+
+    statement = query.order_by(None).statement.compile(dialect=db.bind.dialect)
+    key = (str(statement), tuple(sorted((k, str(v)) for k, v in statement.params.items())))
+    with _count_lock:
+        cached = _count_cache.get(key)
+    if cached is not None:
+        return cached, False
+
+    total = query.order_by(None).count()
+    with _count_lock:
+        _count_cache[key] = total
+    return total, False
+
+
+def invalidate_counts():
+    """Drop memoized totals after writes that change list filters (e.g. bulk verification)"""
+    with _count_lock:
+        _count_cache.clear()
+
+
+def newer_than_cursor(query, model, cursor: str):
+    """Rows strictly newer than the cursor (for polling with ?since=)"""
+    created_at, row_id = decode_cursor(cursor)
+    if created_at is None:
+        return query.filter(or_(model.created_at.isnot(None), model.id > row_id))
+    return query.filter(
+        or_(
+            model.created_at > created_at,
+            and_(model.created_at == created_at, model.id > row_id)
+        )
+    )
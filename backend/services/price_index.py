@@ -0,0 +1,304 @@
+"""
+Medicine price index
+Writes every pharmacy quote's items to quotation_line_items next to the
+quoted_items JSON, keeps each pharmacy's latest unit price per medicine and
+the min/median/max across those prices. A new quote only recomputes the
+medicines it contains, so comparisons and benchmarks are plain index reads.
+"""
+import logging
+import re
+import statistics
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+
+from services.analytics import db_timestamp
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+BACKFILL_BATCH_SIZE = 2000
+
+
+def medicine_key(name: str) -> str:
+    """Grouping key for a medicine name: lowercased with whitespace collapsed"""
+    return re.sub(r"\s+", " ", name or "").strip().lower()[:200]
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)).quantize(CENTS)
+
+
+def _dialect_insert(db):
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert
+
+
+def line_item_rows(response) -> List[dict]:
+    """quotation_line_items rows for a flushed QuotationResponse (accepts old medicine_name items too)"""
+    rows = []
+    for position, item in enumerate(response.quoted_items or []):
+        name = (item.get("medicine") or item.get("medicine_name") or "").strip()
+        if not name or item.get("unit_price") is None:
+            continue
+        quantity = int(item.get("quantity") or 0)
+        total_price = item.get("total_price")
+        rows.append({
+            "quotation_response_id": response.id,
+            "quotation_request_id": response.quotation_request_id,
+            "pharmacy_id": response.pharmacy_id,
+            "position": position,
+            "medicine_name": name[:200],
+            "medicine_key": medicine_key(name),
+            "quantity": quantity,
+            "unit_price": _money(item["unit_price"]),
+            "total_price": _money(total_price if total_price is not None else quantity * item["unit_price"]),
+        })
+    return rows
+
+
+def record_quote(db, response, quoted_at: Optional[datetime] = None):
+    """
+    Add a new quote to the line items and the price index, in the caller's transaction
+
+    The pharmacy's latest price is upserted only if this quote is newer
+    than the one on file; then the statistics of the quote's medicines are
+    recomputed (see refresh_medicines).
+    """
+    from models import QuotationLineItem, PharmacyMedicinePrice
+
+    rows = line_item_rows(response)
+    if not rows:
+        return
+    db.execute(insert(QuotationLineItem), rows)
+
+    quoted_at = db_timestamp(db, quoted_at or datetime.now(timezone.utc))
+    latest = {row["medicine_key"]: row for row in rows}  # A repeated medicine keeps its last line
+    dialect_insert = _dialect_insert(db)
+    statement = dialect_insert(PharmacyMedicinePrice).values([
+        {
+            "pharmacy_id": response.pharmacy_id,
+            "medicine_key": key,
+            "unit_price": row["unit_price"],
+            "quotation_response_id": response.id,
+            "quoted_at": quoted_at,
+        }
+        for key, row in latest.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["pharmacy_id", "medicine_key"],
+        set_={
+            "unit_price": statement.excluded.unit_price,
+            "quotation_response_id": statement.excluded.quotation_response_id,
+            "quoted_at": statement.excluded.quoted_at,
+        },
+        where=PharmacyMedicinePrice.quoted_at <= statement.excluded.quoted_at
+    ))
+
+    refresh_medicines(db, {key: row["medicine_name"] for key, row in latest.items()})
+
+
+def _stats(prices: List[Decimal]) -> dict:
+    if not prices:
+        return {"pharmacy_count": 0, "min_price": None, "median_price": None, "max_price": None}
+    return {
+        "pharmacy_count": len(prices),
+        "min_price": min(prices),
+        "median_price": _money(statistics.median(prices)),
+        "max_price": max(prices),
+    }
+
+
+def refresh_medicines(db, names: Dict[str, str]):
+    """
+    Recompute min/median/max for the given medicine keys ({key: display name})
+
+    The index rows are locked first, in key order, so two quotes for the
+    same medicine recompute one after the other: the second one's SELECT
+    of latest prices starts after the first committed and sees its price.
+    """
+    from models import MedicinePriceIndex, PharmacyMedicinePrice
+
+    keys = sorted(names)
+    dialect_insert = _dialect_insert(db)
+    db.execute(
+        dialect_insert(MedicinePriceIndex)
+        .values([{"medicine_key": key, "medicine_name": names[key], "pharmacy_count": 0} for key in keys])
+        .on_conflict_do_nothing(index_elements=["medicine_key"])
+    )
+    db.execute(
+        select(MedicinePriceIndex.medicine_key)
+        .where(MedicinePriceIndex.medicine_key.in_(keys))
+        .order_by(MedicinePriceIndex.medicine_key)
+        .with_for_update()
+    ).all()
+
+    prices = defaultdict(list)
+    for key, unit_price in db.execute(
+        select(PharmacyMedicinePrice.medicine_key, PharmacyMedicinePrice.unit_price)
+        .where(PharmacyMedicinePrice.medicine_key.in_(keys))
+    ):
+        prices[key].append(unit_price)
+
+    now = db_timestamp(db, datetime.now(timezone.utc))
+    db.execute(update(MedicinePriceIndex), [
+        {"medicine_key": key, "medicine_name": names[key], "updated_at": now, **_stats(prices[key])}
+        for key in keys
+    ])
+
+
+def rebuild(db) -> dict:
+    """
+    Rebuild line items, latest prices and the index from quoted_items JSON
+
+    For the initial backfill (see migrations/migrate_quotation_line_items.py)
+    or after manual edits to quotes. Runs in the caller's transaction.
+    """
+    from models import QuotationResponse, QuotationStatus, QuotationLineItem, PharmacyMedicinePrice, MedicinePriceIndex
+
+    for table in (MedicinePriceIndex, PharmacyMedicinePrice, QuotationLineItem):
+        db.execute(delete(table))
+
+    latest: Dict[tuple, dict] = {}
+    names: Dict[str, str] = {}
+    line_items = 0
+    batch: List[dict] = []
+    query = (
+        select(QuotationResponse)
+        .where(QuotationResponse.status != QuotationStatus.DRAFT)  # Unpublished auto quotes are not prices yet
+        .order_by(QuotationResponse.created_at, QuotationResponse.id)
+    )
+    for response in db.execute(query.execution_options(yield_per=BACKFILL_BATCH_SIZE)).scalars():
+        rows = line_item_rows(response)
+        batch.extend(rows)
+        for row in rows:
+            latest[(response.pharmacy_id, row["medicine_key"])] = {
+                "pharmacy_id": response.pharmacy_id,
+                "medicine_key": row["medicine_key"],
+                "unit_price": row["unit_price"],
+                "quotation_response_id": response.id,
+                "quoted_at": response.created_at or db_timestamp(db, datetime.now(timezone.utc)),
+            }
+            names[row["medicine_key"]] = row["medicine_name"]
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            db.execute(insert(QuotationLineItem), batch)
+            line_items += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(QuotationLineItem), batch)
+        line_items += len(batch)
+
+    prices = defaultdict(list)
+    for entry in latest.values():
+        prices[entry["medicine_key"]].append(entry["unit_price"])
+    if latest:
+        db.execute(insert(PharmacyMedicinePrice), list(latest.values()))
+    if names:
+        db.execute(insert(MedicinePriceIndex), [
+            {"medicine_key": key, "medicine_name": name, **_stats(prices[key])} for key, name in names.items()
+        ])
+
+    logger.info(f"Rebuilt price index: {line_items} line items, {len(names)} medicines")
+    return {"line_items": line_items, "pharmacy_prices": len(latest), "medicines": len(names)}
+
+
+def _market(entry) -> Optional[dict]:
+    if entry is None:
+        return None
+    return {
+        "pharmacy_count": entry.pharmacy_count,
+        "min_price": float(entry.min_price) if entry.min_price is not None else None,
+        "median_price": float(entry.median_price) if entry.median_price is not None else None,
+        "max_price": float(entry.max_price) if entry.max_price is not None else None,
+    }
+
+
+def price_comparison(db, request_id: int) -> List[dict]:
+    """Per medicine of a quotation request: every pharmacy's quoted price, cheapest first, plus the market range"""
+    from models import QuotationLineItem, MedicinePriceIndex, Pharmacy
+
+    items = db.execute(
+        select(
+            QuotationLineItem.medicine_key,
+            QuotationLineItem.medicine_name,
+            QuotationLineItem.quotation_response_id,
+            QuotationLineItem.pharmacy_id,
+            QuotationLineItem.quantity,
+            QuotationLineItem.unit_price,
+            QuotationLineItem.total_price,
+            Pharmacy.pharmacy_name
+        )
+        .outerjoin(Pharmacy, Pharmacy.id == QuotationLineItem.pharmacy_id)
+        .where(QuotationLineItem.quotation_request_id == request_id)
+        .order_by(QuotationLineItem.medicine_key, QuotationLineItem.unit_price, QuotationLineItem.id)
+    ).all()
+    if not items:
+        return []
+
+    keys = {item.medicine_key for item in items}
+    market = {
+        entry.medicine_key: entry
+        for entry in db.execute(select(MedicinePriceIndex).where(MedicinePriceIndex.medicine_key.in_(keys))).scalars()
+    }
+
+    medicines: Dict[str, dict] = {}
+    for item in items:
+        medicine = medicines.setdefault(item.medicine_key, {
+            "medicine_key": item.medicine_key,
+            "medicine_name": item.medicine_name,
+            "quotes": [],
+            "market": _market(market.get(item.medicine_key))
+        })
+        medicine["quotes"].append({
+            "quotation_response_id": item.quotation_response_id,
+            "pharmacy_id": item.pharmacy_id,
+            "pharmacy_name": item.pharmacy_name,
+            "quantity": item.quantity,
+            "unit_price": float(item.unit_price),
+            "total_price": float(item.total_price)
+        })
+    for medicine in medicines.values():
+        medicine["cheapest_pharmacy_id"] = medicine["quotes"][0]["pharmacy_id"]
+    return list(medicines.values())
+
+
+def market_benchmarks(db, pharmacy_id: int, names: Iterable[str]) -> List[dict]:
+    """Market range of each medicine next to this pharmacy's own latest price"""
+    from models import MedicinePriceIndex, PharmacyMedicinePrice
+
+    requested = {medicine_key(name): name for name in names if medicine_key(name)}
+    if not requested:
+        return []
+    market = {
+        entry.medicine_key: entry
+        for entry in db.execute(
+            select(MedicinePriceIndex).where(MedicinePriceIndex.medicine_key.in_(requested))
+        ).scalars()
+    }
+    own = dict(db.execute(
+        select(PharmacyMedicinePrice.medicine_key, PharmacyMedicinePrice.unit_price).where(
+            PharmacyMedicinePrice.pharmacy_id == pharmacy_id,
+            PharmacyMedicinePrice.medicine_key.in_(requested)
+        )
+    ).all())
+
+    results = []
+    for key, name in requested.items():
+        entry = market.get(key)
+        your_price = own.get(key)
+        median = entry.median_price if entry is not None else None
+        results.append({
+            "medicine_key": key,
+            "medicine_name": entry.medicine_name if entry is not None else name,
+            "market": _market(entry),
+            "your_latest_price": float(your_price) if your_price is not None else None,
+            # >1.0 means this pharmacy quotes above the market median
+            "your_price_vs_median": round(float(your_price / median), 3) if your_price is not None and median else None
+        })
+    return results
@@ -0,0 +1,116 @@
+"""
+Pharmacy price lists
+Parses a pharmacy's catalog CSV (medicine, unit_price, optional in_stock)
+and replaces its stored price list in one transaction. The auto-quote
+engine (services/auto_quote.py) prices prescriptions from these rows.
+"""
+import csv
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert
+
+from config import settings
+from services.price_index import CENTS, medicine_key
+
+logger = logging.getLogger(__name__)
+
+# Errors returned in the response (the upload is rejected if there are any)
+MAX_REPORTED_ERRORS = 100
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"0", "false", "no", "n"}
+
+
+class PriceListError(ValueError):
+    """The CSV cannot be used; errors lists row-level problems when there are any"""
+
+    def __init__(self, message: str, errors: Optional[List[dict]] = None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def parse_price_list(stream, max_items: int = settings.PRICE_LIST_MAX_ITEMS) -> List[dict]:
+    """
+    Catalog rows from a CSV with a `medicine` (or `medicine_name`) and a
+    `unit_price` column; `in_stock` is optional and defaults to true.
+    A medicine listed twice keeps its last row.
+    """
+    reader = csv.DictReader(stream)
+    fields = set(reader.fieldnames or [])
+    name_field = "medicine" if "medicine" in fields else "medicine_name"
+    if name_field not in fields or "unit_price" not in fields:
+        raise PriceListError("CSV header must have `medicine` and `unit_price` columns")
+
+    items = {}
+    errors = []
+
+    def fail(row_no, field, message):
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "field": field, "message": message})
+
+    for row_no, row in enumerate(reader, start=2):
+        name = (row.get(name_field) or "").strip()
+        if not name and not any((value or "").strip() for value in row.values() if isinstance(value, str)):
+            continue  # Blank line
+        if not name or len(name) > 200:
+            fail(row_no, name_field, "Medicine name is required (at most 200 characters)")
+            continue
+        try:
+            unit_price = Decimal((row.get("unit_price") or "").strip()).quantize(CENTS)
+            if not unit_price.is_finite() or unit_price <= 0:
+                raise InvalidOperation
+        except InvalidOperation:
+            fail(row_no, "unit_price", "unit_price must be a positive number")
+            continue
+        in_stock = (row.get("in_stock") or "true").strip().lower()
+        if in_stock not in TRUE_VALUES | FALSE_VALUES:
+            fail(row_no, "in_stock", "in_stock must be true or false")
+            continue
+
+        items[medicine_key(name)] = {
+            "medicine_name": name,
+            "medicine_key": medicine_key(name),
+            "unit_price": unit_price,
+            "in_stock": in_stock in TRUE_VALUES,
+        }
+        if len(items) > max_items:
+            raise PriceListError(f"Price lists are limited to {max_items} medicines")
+
+    if errors:
+        raise PriceListError("Price list has invalid rows; nothing was changed", errors)
+    if not items:
+        raise PriceListError("Price list is empty")
+    return list(items.values())
+
+
+def replace_price_list(db, pharmacy_id: int, items: List[dict], **options):
+    """
+    Swap the pharmacy's whole catalog for items and update its settings
+    (auto_quote, auto_publish, delivery_charge, estimated_delivery_time)
+    """
+    from models import PharmacyPriceList, PharmacyPriceListItem
+
+    try:
+        price_list = db.get(PharmacyPriceList, pharmacy_id)
+        if price_list is None:
+            price_list = PharmacyPriceList(pharmacy_id=pharmacy_id)
+            db.add(price_list)
+        for name, value in options.items():
+            if value is not None:
+                setattr(price_list, name, value)
+        price_list.item_count = len(items)
+        price_list.uploaded_at = func.now()
+        db.flush()
+
+        db.execute(delete(PharmacyPriceListItem).where(PharmacyPriceListItem.pharmacy_id == pharmacy_id))
+        db.execute(insert(PharmacyPriceListItem), [{"pharmacy_id": pharmacy_id, **item} for item in items])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    db.refresh(price_list)
+    logger.info(f"Pharmacy {pharmacy_id} uploaded a price list with {len(items)} medicines")
+    return price_list
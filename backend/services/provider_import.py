@@ -0,0 +1,371 @@
+"""
+Bulk provider onboarding from CSV
+Loads doctors, pharmacies or clinics in one pass instead of one signup call
+per provider:
+
+1. Every row is validated with the signup schema; duplicates inside the
+   file are caught while parsing.
+2. Valid rows are staged into a temporary table (COPY on PostgreSQL) and
+   checked against existing providers with one join per unique column.
+3. Passwords of the surviving rows are hashed in a process pool.
+4. Everything is inserted with a single INSERT ... SELECT ... RETURNING.
+
+Problems are reported per CSV row; plaintext passwords never reach the
+database.
+"""
+import csv
+import io
+import logging
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import bcrypt
+from pydantic import ValidationError
+from sqlalchemy import Column, Integer, MetaData, String, Table, delete, func, insert, literal, select, true, union_all
+
+from config import settings
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Rows per task sent to the hashing pool
+HASH_CHUNK_SIZE = 64
+# Errors returned in the response (the counts always cover every row)
+MAX_REPORTED_ERRORS = 1000
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    bcrypt-hash a chunk of passwords (same scheme as auth.get_password_hash)
+
+    Runs inside a worker process, so it must stay a module-level function.
+    """
+    return [bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8") for password in passwords]
+
+
+def is_bcrypt_hash(value: str) -> bool:
+    return len(value) == 60 and value[:4] in ("$2a$", "$2b$", "$2y$")
+
+
+class ImportKind:
+    """One importable provider type"""
+
+    def __init__(self, model_name: str, schema_name: str, fields: List[str], unique: List[str]):
+        self.model_name = model_name
+        self.schema_name = schema_name
+        self.fields = fields  # Model columns filled from the CSV
+        self.unique = unique  # Columns that must not collide with existing providers
+
+    @property
+    def model(self):
+        import models
+        return getattr(models, self.model_name)
+
+    @property
+    def schema(self):
+        import schemas
+        return getattr(schemas, self.schema_name)
+
+
+KINDS = {
+    "doctors": ImportKind(
+        "Doctor", "DoctorCreate",
+        ["phone", "full_name", "specialization", "license_number"],
+        unique=["phone", "license_number"]
+    ),
+    "pharmacies": ImportKind(
+        "Pharmacy", "PharmacyCreate",
+        ["phone", "pharmacy_name", "owner_name", "license_number", "street_address", "city",
+         "state", "postal_code", "country", "email", "alternate_phone"],
+        unique=["phone", "license_number", "email"]
+    ),
+    "clinics": ImportKind(
+        "Clinic", "ClinicSignup",
+        ["clinic_name", "phone", "license_number", "address", "city", "state",
+         "postal_code", "email", "contact_person"],
+        unique=["phone", "license_number"]
+    ),
+}
+
+
+class ImportReport:
+    """Row-level outcome of one import"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.failed_rows = set()
+        self.errors: List[dict] = []
+
+    def fail(self, row_no: int, field: Optional[str], message: str):
+        self.failed_rows.add(row_no)
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_no, "field": field, "message": message})
+
+
+class ProviderImporter:
+    """Validates, stages and inserts provider CSVs; owns the password hashing pool"""
+
+    def __init__(self, max_workers: int, max_rows: int):
+        self.max_workers = max_workers
+        self.max_rows = max_rows
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self):
+        """Stop worker processes (call from app shutdown)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ---- 1. Parse and validate ----
+
+    def parse(self, kind: ImportKind, stream, report: ImportReport):
+        """
+        Validated rows keyed by CSV line number, plus their passwords
+
+        A row may carry `password` (hashed here) or `hashed_password` (an
+        existing bcrypt hash, e.g. when migrating from another system).
+        """
+        reader = csv.DictReader(stream)
+        missing = [name for name in ("phone", "license_number") if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing required columns: {', '.join(missing)}")
+
+        rows: Dict[int, dict] = {}
+        passwords: Dict[int, str] = {}
+        seen = {column: {} for column in kind.unique}
+
+        for record in reader:
+            row_no = reader.line_num
+            report.total_rows += 1
+            if report.total_rows > self.max_rows:
+                raise ValueError(f"CSV has more than {self.max_rows} rows; split it into smaller files")
+
+            # Empty cells are left out so schema defaults (e.g. country) apply
+            values = {
+                key.strip(): value.strip() for key, value in record.items()
+                if key and isinstance(value, str) and value.strip()
+            }
+            prehashed = values.pop("hashed_password", None)
+            if prehashed is not None:
+                if not is_bcrypt_hash(prehashed):
+                    report.fail(row_no, "hashed_password", "Not a bcrypt hash")
+                    continue
+                # The signup schema requires a password; this one is never used
+                values["password"] = "prehashed"
+
+            try:
+                validated = kind.schema(**values)
+            except ValidationError as e:
+                for error in e.errors():
+                    field = ".".join(str(part) for part in error["loc"]) or None
+                    report.fail(row_no, field, error["msg"])
+                continue
+
+            data = {field: getattr(validated, field, None) for field in kind.fields}
+            duplicate = False
+            for column in kind.unique:
+                value = data.get(column)
+                if value is None:
+                    continue
+                if value in seen[column]:
+                    report.fail(row_no, column, f"Duplicate {column} in file (first seen on row {seen[column][value]})")
+                    duplicate = True
+                else:
+                    seen[column][value] = row_no
+            if duplicate:
+                continue
+
+            rows[row_no] = data
+            passwords[row_no] = prehashed or validated.password
+
+        return rows, passwords
+
+    # ---- 2. Stage and check against existing providers ----
+
+    def _temp_table(self, db, prefix: str, columns: List[str], created: List[Table]) -> Table:
+        table = Table(
+            f"{prefix}_{uuid.uuid4().hex[:8]}", MetaData(),
+            Column("row_no", Integer, primary_key=True),
+            *[Column(name, String) for name in columns],
+            prefixes=["TEMPORARY"]
+        )
+        table.create(db.connection())
+        created.append(table)
+        return table
+
+    def _drop_temp_tables(self, db, tables: List[Table]):
+        """Temp tables live as long as the pooled connection, so always drop them"""
+        while tables:
+            tables.pop().drop(db.connection(), checkfirst=True)
+
+    def _copy(self, db, table: Table, columns: List[str], rows: List[list]):
+        """Bulk-load rows into a staging table (COPY FROM STDIN on PostgreSQL)"""
+        if not rows:
+            return
+        if db.bind.dialect.name == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)  # None -> empty unquoted field -> NULL
+            buffer.seek(0)
+            raw = db.connection().connection
+            with raw.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+        else:
+            db.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+    def stage(self, db, kind: ImportKind, rows: Dict[int, dict], report: ImportReport, temp_tables: List[Table]) -> Table:
+        """Stage valid rows and drop the ones colliding with existing providers (set-wise)"""
+        staging = self._temp_table(db, "import_staging", kind.fields, temp_tables)
+        self._copy(
+            db, staging, ["row_no"] + kind.fields,
+            [[row_no] + [data[field] for field in kind.fields] for row_no, data in rows.items()]
+        )
+
+        model = kind.model
+        conflicts = union_all(*[
+            select(staging.c.row_no, literal(column).label("field"))
+            .join(model, getattr(model, column) == staging.c[column])
+            for column in kind.unique
+        ]).subquery()
+        for row_no, field in db.execute(select(conflicts.c.row_no, conflicts.c.field)):
+            report.fail(row_no, field, f"{field} already registered")
+            rows.pop(row_no, None)
+
+        db.execute(delete(staging).where(staging.c.row_no.in_(select(conflicts.c.row_no))))
+        return staging
+
+    # ---- 3. Hash ----
+
+    def hash_all(self, passwords: Dict[int, str]) -> Dict[int, str]:
+        """bcrypt every plaintext password in the worker pool; bcrypt hashes pass through"""
+        plain = [(row_no, password) for row_no, password in passwords.items() if not is_bcrypt_hash(password)]
+        hashed = {row_no: password for row_no, password in passwords.items() if is_bcrypt_hash(password)}
+
+        chunks = [plain[i:i + HASH_CHUNK_SIZE] for i in range(0, len(plain), HASH_CHUNK_SIZE)]
+        results = self.pool.map(hash_passwords, [[password for _, password in chunk] for chunk in chunks])
+        for chunk, chunk_hashes in zip(chunks, results):
+            for (row_no, _), value in zip(chunk, chunk_hashes):
+                hashed[row_no] = value
+        return hashed
+
+    # ---- 4. Insert ----
+
+    def insert(self, db, kind: ImportKind, staging: Table, hashes: Dict[int, str],
+               verified: bool, admin_id: Optional[int], temp_tables: List[Table]) -> Dict[int, int]:
+        """One INSERT ... SELECT of every staged row; returns {row_no: new id}"""
+        if db.bind.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        hash_table = self._temp_table(db, "import_hashes", ["hashed_password"], temp_tables)
+        self._copy(db, hash_table, ["row_no", "hashed_password"], [[row_no, value] for row_no, value in hashes.items()])
+
+        model = kind.model
+        columns = {field: staging.c[field] for field in kind.fields}
+        columns["hashed_password"] = hash_table.c.hashed_password
+        columns["is_verified"] = literal(verified)
+        columns["is_active"] = literal(True)
+        if verified and hasattr(model, "verified_at"):
+            columns["verified_at"] = func.now()
+            columns["verified_by"] = literal(admin_id)
+
+        source = (
+            select(*columns.values())
+            .join(hash_table, hash_table.c.row_no == staging.c.row_no)
+            .where(true())  # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT
+        )
+        statement = (
+            dialect_insert(model)
+            .from_select(list(columns), source)
+            # A provider registered between staging and insert is skipped, not fatal
+            .on_conflict_do_nothing()
+            .returning(model.id, model.phone)
+        )
+        created_by_phone = dict((phone, row_id) for row_id, phone in db.execute(statement))
+
+        phones = dict(db.execute(select(staging.c.row_no, staging.c.phone)).all())
+        return {row_no: created_by_phone[phone] for row_no, phone in phones.items() if phone in created_by_phone}
+
+    def run(self, kind_name: str, stream, dry_run: bool = False, verified: bool = False,
+            admin_id: Optional[int] = None, session_factory=SessionLocal) -> dict:
+        """Import a CSV text stream; blocking, so call it from a worker thread"""
+        kind = KINDS[kind_name]
+        report = ImportReport()
+        timings = {}
+        started = time.perf_counter()
+
+        rows, passwords = self.parse(kind, stream, report)
+        timings["validate"] = time.perf_counter() - started
+
+        db = session_factory()
+        created: Dict[int, int] = {}
+        temp_tables: List[Table] = []
+        try:
+            mark = time.perf_counter()
+            staging = self.stage(db, kind, rows, report, temp_tables)
+            timings["stage"] = time.perf_counter() - mark
+
+            if not dry_run and rows:
+                mark = time.perf_counter()
+                hashes = self.hash_all({row_no: passwords[row_no] for row_no in rows})
+                timings["hash"] = time.perf_counter() - mark
+
+                mark = time.perf_counter()
+                created = self.insert(db, kind, staging, hashes, verified, admin_id, temp_tables)
+                timings["insert"] = time.perf_counter() - mark
+                for row_no in rows:
+                    if row_no not in created:
+                        report.fail(row_no, "phone", "Conflicted with a provider registered during the import")
+
+            self._drop_temp_tables(db, temp_tables)
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        except Exception:
+            db.rollback()
+            try:
+                self._drop_temp_tables(db, temp_tables)
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Could not drop import staging tables: {str(e)}")
+            raise
+        finally:
+            db.close()
+
+        if created:
+            from services.dashboard_stats import dashboard_stats
+            from services.pagination import invalidate_counts
+            invalidate_counts()
+            dashboard_stats.invalidate()
+
+        logger.info(f"Imported {len(created)} of {report.total_rows} {kind_name} rows")
+        return {
+            "kind": kind_name,
+            "dry_run": dry_run,
+            "total_rows": report.total_rows,
+            "valid_rows": len(rows) if dry_run else len(created),
+            "imported": len(created),
+            "failed": len(report.failed_rows),
+            "errors": sorted(report.errors, key=lambda error: error["row"]),
+            "errors_truncated": len(report.errors) >= MAX_REPORTED_ERRORS,
+            "timings_seconds": {step: round(seconds, 3) for step, seconds in timings.items()},
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+
+
+# Global instance
+provider_importer = ProviderImporter(
+    max_workers=settings.IMPORT_HASH_WORKERS,
+    max_rows=settings.IMPORT_MAX_ROWS
+)
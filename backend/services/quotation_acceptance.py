@@ -0,0 +1,204 @@
+"""
+Quotation acceptance
+Accepts a pharmacy or lab quotation in one short transaction: the parent
+request row is locked, then set-based UPDATEs guarded by the expected
+status flip the request and its responses and RETURN their final state.
+Two devices accepting different quotes for the same request at the same
+time get one success and one conflict instead of two accepted quotes.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import case, select, update
+
+logger = logging.getLogger(__name__)
+
+
+class QuotationAcceptanceError(ValueError):
+    """Acceptance refused; status_code is the HTTP status the router should return"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _rollback_and_raise(db, status_code: int, detail: str):
+    db.rollback()
+    raise QuotationAcceptanceError(status_code, detail)
+
+
+def accept_pharmacy_quotation(db, response_id: int, patient_id: int) -> dict:
+    """
+    Accept one pharmacy quotation and reject the request's other open quotes (and drafts)
+
+    Runs: SELECT ... FOR UPDATE of the request row, UPDATE of the request
+    (only while it is still pending/quoted) and one UPDATE of every quoted
+    response with CASE id WHEN accepted THEN ACCEPTED ELSE REJECTED. The
+    status guards make the statements safe even where FOR UPDATE is a
+    no-op (SQLite serializes the writers instead).
+    """
+    from models import Pharmacy, QuotationRequest, QuotationResponse, QuotationStatus
+
+    try:
+        row = db.execute(
+            select(
+                QuotationResponse.quotation_request_id,
+                QuotationResponse.status,
+                QuotationRequest.patient_id,
+                QuotationRequest.status.label("request_status"),
+                Pharmacy.pharmacy_name
+            )
+            .join(QuotationRequest, QuotationRequest.id == QuotationResponse.quotation_request_id)
+            .outerjoin(Pharmacy, Pharmacy.id == QuotationResponse.pharmacy_id)
+            .where(QuotationResponse.id == response_id)
+            .with_for_update(of=QuotationRequest)
+        ).first()
+
+        if row is None:
+            _rollback_and_raise(db, 404, "Quotation not found")
+        if row.patient_id != patient_id:
+            _rollback_and_raise(db, 403, "You can only accept quotations for your own requests")
+        if row.request_status == QuotationStatus.ACCEPTED:
+            _rollback_and_raise(db, 409, "A quotation has already been accepted for this request")
+        if row.request_status not in (QuotationStatus.PENDING, QuotationStatus.QUOTED):
+            _rollback_and_raise(db, 400, f"Cannot accept a quotation for a {row.request_status.value} request")
+        if row.status != QuotationStatus.QUOTED:
+            _rollback_and_raise(db, 400, f"Cannot accept quotation with status: {row.status.value}")
+
+        now = datetime.utcnow()
+        request_row = db.execute(
+            update(QuotationRequest)
+            .where(
+                QuotationRequest.id == row.quotation_request_id,
+                QuotationRequest.status.in_([QuotationStatus.PENDING, QuotationStatus.QUOTED])
+            )
+            .values(status=QuotationStatus.ACCEPTED, updated_at=now)
+            .returning(QuotationRequest.id, QuotationRequest.status, QuotationRequest.updated_at)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if request_row is None:
+            # Lost the race to a concurrent acceptance that committed after our SELECT
+            _rollback_and_raise(db, 409, "A quotation has already been accepted for this request")
+
+        responses = db.execute(
+            update(QuotationResponse)
+            .where(
+                QuotationResponse.quotation_request_id == row.quotation_request_id,
+                # Unpublished auto-quote drafts are closed as well
+                QuotationResponse.status.in_([QuotationStatus.QUOTED, QuotationStatus.DRAFT])
+            )
+            .values(
+                status=case(
+                    (QuotationResponse.id == response_id, QuotationStatus.ACCEPTED),
+                    else_=QuotationStatus.REJECTED
+                ),
+                updated_at=now
+            )
+            .returning(QuotationResponse.id, QuotationResponse.status, QuotationResponse.total_amount)
+            .execution_options(synchronize_session=False)
+        ).all()
+        accepted = next((response for response in responses if response.id == response_id), None)
+        if accepted is None or accepted.status != QuotationStatus.ACCEPTED:
+            _rollback_and_raise(db, 409, "The quotation changed while it was being accepted")
+
+        db.commit()
+    except QuotationAcceptanceError:
+        raise
+    except Exception:
+        db.rollback()
+        raise
+
+    rejected = [response.id for response in responses if response.id != response_id]
+    logger.info(f"Quotation {response_id} accepted for request {request_row.id}; rejected {rejected}")
+    return {
+        "quotation_id": accepted.id,
+        "status": accepted.status.value,
+        "total_amount": float(accepted.total_amount),
+        "pharmacy_name": row.pharmacy_name or "Unknown",
+        "quotation_request_id": request_row.id,
+        "request_status": request_row.status.value,
+        "accepted_at": request_row.updated_at,
+        "rejected_quotation_ids": rejected
+    }
+
+
+def accept_lab_test_quotation(db, response_id: int, patient_id: int) -> dict:
+    """
+    Accept one lab quotation: lock the request, move it from pending to
+    accepted and mark the response accepted, in one transaction
+
+    A request can only have one accepted lab quotation; a second
+    acceptance (same or another response) is a 409.
+    """
+    from models import LabTestQuotationRequest, LabTestQuotationResponse
+
+    try:
+        row = db.execute(
+            select(
+                LabTestQuotationResponse.quotation_request_id,
+                LabTestQuotationResponse.is_accepted,
+                LabTestQuotationRequest.patient_id,
+                LabTestQuotationRequest.status.label("request_status")
+            )
+            .join(LabTestQuotationRequest, LabTestQuotationRequest.id == LabTestQuotationResponse.quotation_request_id)
+            .where(LabTestQuotationResponse.id == response_id)
+            .with_for_update(of=LabTestQuotationRequest)
+        ).first()
+
+        if row is None:
+            _rollback_and_raise(db, 404, "Quotation response not found")
+        if row.patient_id != patient_id:
+            _rollback_and_raise(db, 403, "Not authorized")
+        if row.is_accepted:
+            _rollback_and_raise(db, 400, "Quotation already accepted")
+        if row.request_status != "pending":
+            _rollback_and_raise(db, 409, f"Cannot accept a quotation for a request that is {row.request_status}")
+
+        request_row = db.execute(
+            update(LabTestQuotationRequest)
+            .where(
+                LabTestQuotationRequest.id == row.quotation_request_id,
+                LabTestQuotationRequest.status == "pending"
+            )
+            .values(status="accepted")
+            .returning(LabTestQuotationRequest.id, LabTestQuotationRequest.status)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if request_row is None:
+            _rollback_and_raise(db, 409, "A quotation has already been accepted for this request")
+
+        accepted = db.execute(
+            update(LabTestQuotationResponse)
+            .where(
+                LabTestQuotationResponse.id == response_id,
+                LabTestQuotationResponse.is_accepted == False
+            )
+            .values(is_accepted=True, accepted_at=datetime.utcnow())
+            .returning(
+                LabTestQuotationResponse.id,
+                LabTestQuotationResponse.clinic_id,
+                LabTestQuotationResponse.total_amount,
+                LabTestQuotationResponse.accepted_at
+            )
+            .execution_options(synchronize_session=False)
+        ).first()
+        if accepted is None:
+            _rollback_and_raise(db, 400, "Quotation already accepted")
+
+        db.commit()
+    except QuotationAcceptanceError:
+        raise
+    except Exception:
+        db.rollback()
+        raise
+
+    logger.info(f"Lab quotation {response_id} accepted for request {request_row.id}")
+    return {
+        "response_id": accepted.id,
+        "clinic_id": accepted.clinic_id,
+        "total_amount": accepted.total_amount,
+        "accepted_at": accepted.accepted_at,
+        "quotation_request_id": request_row.id,
+        "request_status": request_row.status
+    }
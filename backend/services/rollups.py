@@ -0,0 +1,316 @@
+"""
+Analytics rollups
+Maintains per-day rollup tables for appointments, AI consultations and
+quotation requests so admin charts read O(days) rows instead of scanning
+the raw tables.
+
+Each run looks only at source rows created or updated since the rollup's
+watermark, collects the local days they belong to, and rebuilds exactly
+those days (delete + INSERT ... SELECT ... GROUP BY). Rebuilding whole
+days keeps the job idempotent, so status changes are picked up, and the
+overlap left by the safety lag is harmless.
+"""
+import asyncio
+import logging
+import threading
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import String, cast, delete, func, insert, literal, or_, select, text
+
+from config import settings
+from database import SessionLocal
+from services.analytics import db_timestamp, local_date_expression
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_try_advisory_xact_lock: one rollup run at a time across instances
+ADVISORY_LOCK_KEY = 4_203_900
+
+
+class Rollup:
+    """One watermark-tracked source table feeding a rollup table"""
+
+    def __init__(self, name: str, model_name: str, change_columns: List[str], rebuild_day: Callable):
+        self.name = name
+        self.model_name = model_name
+        self.change_columns = change_columns  # Timestamps that mark a row as new or changed
+        self.rebuild_day = rebuild_day  # (db, day, start, end) -> None
+
+    @property
+    def model(self):
+        import models
+        return getattr(models, self.model_name)
+
+
+def _rebuild_appointments(db, day: date, start, end):
+    from models import Appointment, Doctor, DailyAppointmentRollup
+
+    db.execute(delete(DailyAppointmentRollup).where(DailyAppointmentRollup.day == day))
+    rows = (
+        select(
+            literal(day).label("day"),
+            cast(Appointment.status, String).label("status"),
+            Appointment.doctor_id,
+            Doctor.specialization,
+            func.count().label("count")
+        )
+        .select_from(Appointment)
+        .join(Doctor, Doctor.id == Appointment.doctor_id)
+        .where(Appointment.created_at >= start, Appointment.created_at < end)
+        .group_by(Appointment.status, Appointment.doctor_id, Doctor.specialization)
+    )
+    db.execute(
+        insert(DailyAppointmentRollup).from_select(
+            ["day", "status", "doctor_id", "specialization", "count"], rows
+        )
+    )
+
+
+def _rebuild_consultations(db, day: date, start, end):
+    from models import AIConsultation, DailyConsultationRollup
+
+    db.execute(delete(DailyConsultationRollup).where(DailyConsultationRollup.day == day))
+    count = db.query(func.count(AIConsultation.id)).filter(
+        AIConsultation.created_at >= start, AIConsultation.created_at < end
+    ).scalar()
+    if count:
+        db.add(DailyConsultationRollup(day=day, count=count))
+        db.flush()
+
+
+def _quotation_rebuilder(kind: str, model_name: str):
+    def rebuild(db, day: date, start, end):
+        import models
+        from models import DailyQuotationRollup
+
+        model = getattr(models, model_name)
+        db.execute(
+            delete(DailyQuotationRollup).where(
+                DailyQuotationRollup.day == day, DailyQuotationRollup.kind == kind
+            )
+        )
+        outcome = func.coalesce(cast(model.status, String), "pending")
+        rows = (
+            select(
+                literal(day).label("day"),
+                literal(kind).label("kind"),
+                outcome.label("outcome"),
+                func.count().label("count")
+            )
+            .select_from(model)
+            .where(model.created_at >= start, model.created_at < end)
+            .group_by(outcome)
+        )
+        db.execute(
+            insert(DailyQuotationRollup).from_select(["day", "kind", "outcome", "count"], rows)
+        )
+    return rebuild
+
+
+ROLLUPS = [
+    Rollup("appointments", "Appointment", ["created_at", "updated_at"], _rebuild_appointments),
+    Rollup("consultations", "AIConsultation", ["created_at"], _rebuild_consultations),
+    Rollup("quotations_pharmacy", "QuotationRequest", ["created_at", "updated_at"],
+           _quotation_rebuilder("pharmacy", "QuotationRequest")),
+    Rollup("quotations_lab", "LabTestQuotationRequest", ["created_at", "updated_at"],
+           _quotation_rebuilder("lab", "LabTestQuotationRequest")),
+]
+
+
+class RollupJob:
+    """
+    Scheduled incremental maintenance of the daily rollup tables
+
+    Rows are attributed to days in `tz`. The new watermark is the run's
+    start time minus `lag`, so rows committed late by slow transactions are
+    still seen by the next run. Overlapping runs are skipped: in-process by
+    a lock, across instances by a PostgreSQL advisory lock.
+    """
+
+    def __init__(self, interval: float, tz: str, lag: float, session_factory=SessionLocal):
+        self.interval = interval
+        self.zone = ZoneInfo(tz)
+        self.lag = timedelta(seconds=lag)
+        self.session_factory = session_factory
+        self.last_run: Optional[dict] = None
+        self._running = threading.Lock()
+        self._task = None
+
+    def day_bounds(self, db, day: date):
+        """[start, end) of a local day in `tz`, as database bind values"""
+        start = datetime.combine(day, dt_time.min).replace(tzinfo=self.zone)
+        end = datetime.combine(day + timedelta(days=1), dt_time.min).replace(tzinfo=self.zone)
+        return db_timestamp(db, start.astimezone(timezone.utc)), db_timestamp(db, end.astimezone(timezone.utc))
+
+    def _dirty_days(self, db, rollup: Rollup, since: Optional[datetime]) -> List[date]:
+        model = rollup.model
+        day = local_date_expression(db, model.created_at, self.zone, datetime.now(timezone.utc))
+        query = db.query(day).distinct()
+        if since is not None:
+            since = db_timestamp(db, since)
+            query = query.filter(or_(*[getattr(model, column) >= since for column in rollup.change_columns]))
+        days = []
+        for (value,) in query:
+            if value is None:
+                continue
+            days.append(date.fromisoformat(value) if isinstance(value, str) else value)
+        return sorted(days)
+
+    def run_rollup(self, db, rollup: Rollup, started_at: datetime) -> int:
+        """Fold changes since the watermark into one rollup; returns days rebuilt"""
+        from models import RollupWatermark
+
+        mark = db.get(RollupWatermark, rollup.name)
+        since = None
+        if mark is not None:
+            since = mark.watermark if mark.watermark.tzinfo else mark.watermark.replace(tzinfo=timezone.utc)
+
+        days = self._dirty_days(db, rollup, since)
+        for day in days:
+            start, end = self.day_bounds(db, day)
+            rollup.rebuild_day(db, day, start, end)
+
+        new_watermark = db_timestamp(db, started_at - self.lag)
+        if mark is None:
+            db.add(RollupWatermark(name=rollup.name, watermark=new_watermark))
+        else:
+            mark.watermark = new_watermark
+        return len(days)
+
+    def run_once(self, rebuild: bool = False) -> dict:
+        """Run every rollup in one transaction; rebuild=True ignores the watermarks"""
+        # The schedule and the admin endpoint share this job: one run per process at a time
+        if not self._running.acquire(blocking=False):
+            return {"skipped": "the rollup job is already running"}
+        try:
+            return self._run_locked(rebuild)
+        finally:
+            self._running.release()
+
+    def _run_locked(self, rebuild: bool) -> dict:
+        from models import RollupWatermark
+
+        db = self.session_factory()
+        try:
+            if db.bind.dialect.name == "postgresql":
+                locked = db.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY}
+                ).scalar()
+                if not locked:
+                    db.rollback()
+                    return {"skipped": "another instance is running the rollup job"}
+
+            if rebuild:
+                # Also drops days whose source rows were deleted since they were rolled up
+                from models import DailyAppointmentRollup, DailyConsultationRollup, DailyQuotationRollup
+                for table in (RollupWatermark, DailyAppointmentRollup, DailyConsultationRollup, DailyQuotationRollup):
+                    db.execute(delete(table))
+
+            started_at = datetime.now(timezone.utc)
+            rebuilt: Dict[str, int] = {}
+            for rollup in ROLLUPS:
+                rebuilt[rollup.name] = self.run_rollup(db, rollup, started_at)
+            db.commit()
+
+            self.last_run = {
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "duration_seconds": round((datetime.now(timezone.utc) - started_at).total_seconds(), 3),
+                "days_rebuilt": rebuilt
+            }
+            return self.last_run
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            try:
+                # Blocking DB work stays off the event loop
+                result = await asyncio.to_thread(self.run_once)
+                if any(result.get("days_rebuilt", {}).values()):
+                    logger.info(f"Analytics rollups updated: {result['days_rebuilt']}")
+            except Exception as e:
+                logger.error(f"Analytics rollup run failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start the scheduled job (call from app startup)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the scheduled job (call from app shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def read_rollups(db, start: date, end: date, dimension: str = "status") -> dict:
+    """
+    Per-day series from the rollup tables for [start, end]
+
+    dimension picks the appointment breakdown: status, doctor or specialization.
+    """
+    from models import DailyAppointmentRollup, DailyConsultationRollup, DailyQuotationRollup
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    index = {day: i for i, day in enumerate(days)}
+
+    def series_of(rows) -> Dict[str, List[int]]:
+        series: Dict[str, List[int]] = {}
+        for day, key, count in rows:
+            day = date.fromisoformat(day) if isinstance(day, str) else day
+            series.setdefault(str(key), [0] * len(days))[index[day]] += int(count)
+        return series
+
+    group = {
+        "status": DailyAppointmentRollup.status,
+        "doctor": DailyAppointmentRollup.doctor_id,
+        "specialization": func.coalesce(DailyAppointmentRollup.specialization, "unknown"),
+    }[dimension]
+    appointments = series_of(
+        db.query(DailyAppointmentRollup.day, group, func.sum(DailyAppointmentRollup.count))
+        .filter(DailyAppointmentRollup.day >= start, DailyAppointmentRollup.day <= end)
+        .group_by(DailyAppointmentRollup.day, group)
+    )
+
+    consultations = [0] * len(days)
+    for day, count in db.query(DailyConsultationRollup.day, DailyConsultationRollup.count).filter(
+        DailyConsultationRollup.day >= start, DailyConsultationRollup.day <= end
+    ):
+        consultations[index[date.fromisoformat(day) if isinstance(day, str) else day]] = count
+
+    quotations = series_of(
+        db.query(
+            DailyQuotationRollup.day,
+            DailyQuotationRollup.kind + ":" + DailyQuotationRollup.outcome,
+            DailyQuotationRollup.count
+        ).filter(DailyQuotationRollup.day >= start, DailyQuotationRollup.day <= end)
+    )
+
+    return {
+        "days": [day.isoformat() for day in days],
+        "appointments": {
+            "dimension": dimension,
+            "series": appointments,
+            "total": [sum(values) for values in zip(*appointments.values())] if appointments else [0] * len(days)
+        },
+        "consultations": consultations,
+        "quotations": quotations
+    }
+
+
+# Global instance
+rollup_job = RollupJob(
+    interval=settings.ROLLUP_INTERVAL_SECONDS,
+    tz=settings.ANALYTICS_DEFAULT_TIMEZONE,
+    lag=settings.ROLLUP_SAFETY_LAG_SECONDS
+)
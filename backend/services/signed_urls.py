@@ -0,0 +1,77 @@
+"""
+Signed URLs for locally stored uploads
+Local files are served from /uploads/<path>?expires=<unix>&sig=<hmac>, so a
+leaked link stops working once it expires. Vercel Blob URLs are returned
+unchanged.
+"""
+import base64
+import hashlib
+import hmac
+import time
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+
+from config import settings
+
+UPLOADS_PREFIX = "/uploads/"
+
+
+def _signature(path: str, expires: int) -> str:
+    message = f"{path}:{expires}".encode()
+    digest = hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+
+def _expiry(now: Optional[float] = None) -> int:
+    """
+    Expiry rounded up to the next TTL boundary
+
+    Every link issued within the same window is byte-identical, so browsers
+    and nginx can keep serving it from cache; each link is valid for between
+    one and two TTLs.
+    """
+    ttl = settings.UPLOADS_URL_TTL_SECONDS
+    now = int(now if now is not None else time.time())
+    return (now // ttl + 2) * ttl
+
+
+def sign_upload_url(url: Optional[str], now: Optional[float] = None) -> Optional[str]:
+    """Append expires/sig to a local /uploads/ URL; other values pass through"""
+    if not isinstance(url, str) or not url.startswith(UPLOADS_PREFIX) or "?" in url:
+        return url
+    path = url[len(UPLOADS_PREFIX):]
+    expires = _expiry(now)
+    return f"{url}?expires={expires}&sig={_signature(path, expires)}"
+
+
+def sign_urls(payload: Any) -> Any:
+    """Return a copy of a response payload with every /uploads/ URL signed"""
+    if isinstance(payload, str):
+        return sign_upload_url(payload)
+    if isinstance(payload, dict):
+        return {key: sign_urls(value) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [sign_urls(item) for item in payload]
+    return payload
+
+
+def verify_upload_signature(path: str, expires: Optional[int], sig: Optional[str]) -> bool:
+    """True if sig was issued for path and has not expired"""
+    if expires is None or not sig:
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(path, expires), sig)
+
+
+class SignedUploadsJSONResponse(JSONResponse):
+    """
+    Default response class: signs /uploads/ URLs anywhere in a JSON payload
+
+    Stored records keep the plain /uploads/<path> URL; links are signed
+    only on the way out, so every endpoint returns fresh, expiring links.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return super().render(sign_urls(content))